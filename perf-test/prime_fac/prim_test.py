@@ -1,6 +1,7 @@
 
 import os
 import random
+import sys
 
 from perf_tester.cperf_test import CPerformanceTester
 
@@ -12,7 +13,17 @@ def gen_data():
     """
     return str(random.randint(100_000, 100_000_000))
 
-def main():
+def gen_composite(digits: int) -> str:
+    """Returns a composite number with the given digit count (two factors of about half the digits)."""
+    low = random.randint(10 ** (digits // 2 - 1), 10 ** (digits // 2) - 1)
+    high_digits = digits - len(str(low))
+    while True:
+        n = low * random.randint(10 ** (high_digits - 1), 10**high_digits - 1)
+        if len(str(n)) == digits:
+            return str(n)
+
+def bench_prime_factorization():
+    """Suite factory picked up by `python -m perf_tester run prim_test.py`."""
     tester = CPerformanceTester(num_tests=100, gen_data=gen_data, dir = 
  os.path.dirname(os.path.realpath(__file__)))
     
@@ -21,8 +32,21 @@ def main():
     tester.add_program("Prime Factor Naive", "prime_naive.exe", lambda data: [data])
     tester.add_program("Prime Factor Optimized", "prime_optimized.exe", lambda data: [data])
     tester.add_program("Prime Factor Pollard", "prime_pollard.exe", lambda data: [data])
+    return tester
+
+def main():
+    tester = bench_prime_factorization()
     
-    tester.compare_performance()
+    if "--sweep" in sys.argv:
+        # Scaling over the digit count; n of the complexity models is the number itself.
+        tester.sweep(
+            range(4, 19, 2),
+            gen_composite,
+            size_of=lambda digits: 10**digits,
+            csv_path="prime_sweep.csv",
+        )
+    else:
+        tester.compare_performance()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
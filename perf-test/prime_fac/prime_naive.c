@@ -1,20 +1,28 @@
 #include <stdio.h>
 #include <stdlib.h>
 
-int main(int argc, char *argv[]) {
-    if (argc != 2) {
-        fprintf(stderr, "Usage: %s <number>\n", argv[0]);
-        return 1;
-    }
-    unsigned long long n = strtoull(argv[1], NULL, 10);
+#include "perf_server.h"
+
+static void run(const char *input, perf_result *out) {
+    unsigned long long n = strtoull(input, NULL, 10);
     unsigned long long orig = n;
-    printf("Prime factors of %llu: ", orig);
+    perf_result_printf(out, "Prime factors of %llu: ", orig);
     for (unsigned long long i = 2; i <= n; i++) {
         while (n % i == 0) {
-            printf("%llu ", i);
+            perf_result_printf(out, "%llu ", i);
             n /= i;
         }
     }
-    printf("\n");
+}
+
+int main(int argc, char *argv[]) {
+    if (perf_server_requested(argc, argv)) return perf_server_run(run);
+    if (argc != 2) {
+        fprintf(stderr, "Usage: %s <number>\n", argv[0]);
+        return 1;
+    }
+    perf_result out = {0};
+    run(argv[1], &out);
+    printf("%s\n", out.data);
     return 0;
 }
\ No newline at end of file
@@ -3,29 +3,37 @@
 #include <stdlib.h>
 #include <math.h>
 
-int main(int argc, char *argv[]){
-    if (argc != 2) {
-        fprintf(stderr, "Usage: %s <number>\n", argv[0]);
-        return 1;
-    }
-    unsigned long long n = strtoull(argv[1], NULL, 10);
+#include "perf_server.h"
+
+static void run(const char *input, perf_result *out) {
+    unsigned long long n = strtoull(input, NULL, 10);
     unsigned long long orig = n;
-    printf("Prime factors of %llu: ", orig);
-    
+    perf_result_printf(out, "Prime factors of %llu: ", orig);
+
     // Remove factors of 2.
     while(n % 2 == 0) {
-        printf("2 ");
+        perf_result_printf(out, "2 ");
         n /= 2;
     }
     // Check odd divisors.
     for(unsigned long long i = 3; i <= sqrt(n); i += 2){
         while(n % i == 0) {
-            printf("%llu ", i);
+            perf_result_printf(out, "%llu ", i);
             n /= i;
         }
     }
     if(n > 2)
-        printf("%llu ", n);
-    printf("\n");
+        perf_result_printf(out, "%llu ", n);
+}
+
+int main(int argc, char *argv[]){
+    if (perf_server_requested(argc, argv)) return perf_server_run(run);
+    if (argc != 2) {
+        fprintf(stderr, "Usage: %s <number>\n", argv[0]);
+        return 1;
+    }
+    perf_result out = {0};
+    run(argv[1], &out);
+    printf("%s\n", out.data);
     return 0;
 }
\ No newline at end of file
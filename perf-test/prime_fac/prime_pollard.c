@@ -3,6 +3,9 @@
 #include <stdlib.h>
 #include <math.h>
 #include <time.h>
+
+#include "perf_server.h"
+
 unsigned long long gcd(unsigned long long a, unsigned long long b) {
     while(b != 0) {
         unsigned long long t = b;
@@ -31,7 +34,13 @@ unsigned long long pollard_rho(unsigned long long n) {
     return d;
 }
 
-void factorize(unsigned long long n) {
+// A 64-bit number has at most 64 prime factors.
+typedef struct {
+    unsigned long long factors[64];
+    int count;
+} factor_list;
+
+void factorize(unsigned long long n, factor_list *list) {
     if(n == 1) return;
     // Check for primality (naively) for small n.
     int isPrime = 1;
@@ -39,29 +48,47 @@ void factorize(unsigned long long n) {
         if(n % i == 0) { isPrime = 0; break; }
     }
     if(isPrime) {
-        printf("%llu ", n);
+        list->factors[list->count++] = n;
         return;
     }
     unsigned long long divisor = pollard_rho(n);
-    factorize(divisor);
-    factorize(n / divisor);
+    factorize(divisor, list);
+    factorize(n / divisor, list);
 }
+
+static int compare_factors(const void *a, const void *b) {
+    unsigned long long x = *(const unsigned long long *)a;
+    unsigned long long y = *(const unsigned long long *)b;
+    return (x > y) - (x < y);
+}
+
+static void run(const char *input, perf_result *out) {
+    unsigned long long n = strtoull(input, NULL, 10);
+    factor_list list = {{0}, 0};
+    factorize(n, &list);
+    // Same answer format as the other programs: factors in ascending order.
+    qsort(list.factors, list.count, sizeof(list.factors[0]), compare_factors);
+    perf_result_printf(out, "Prime factors of %llu: ", n);
+    for(int i = 0; i < list.count; i++) {
+        perf_result_printf(out, "%llu ", list.factors[i]);
+    }
+}
+
 int main(int argc, char *argv[]){
+    srand(time(NULL));
+    if (perf_server_requested(argc, argv)) return perf_server_run(run);
     if(argc != 2){
         fprintf(stderr, "Usage: %s <number>\n", argv[0]);
         return 1;
     }
-    srand(time(NULL));
-    unsigned long long n = strtoull(argv[1], NULL, 10);
-    printf("Prime factors of %llu: ", n);
-    
-    clock_t begin = clock();
+    perf_result out = {0};
 
-    factorize(n);
+    clock_t begin = clock();
+    run(argv[1], &out);
     clock_t end = clock();
     double ts = (double)(end-begin) / CLOCKS_PER_SEC; 
-    // print("%f", ts);
-    printf("%f\n", ts);
-    printf("\n");
+    printf("%s\n", out.data);
+    // The timing goes to stderr, so stdout only holds the answer.
+    fprintf(stderr, "%f\n", ts);
     return 0;
 }
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Command line entry point:
+
+    python -m perf_tester run <paths> [-j N] [-k PATTERN]   discover and run benchmark suites
+    python -m perf_tester list <paths> [-k PATTERN]         list the discovered suites
+    python -m perf_tester build [DIR]                       compile the changed C files of DIR
+    python -m perf_tester startup [--runs N]                benchmark the cold start of the CLI
+    python -m perf_tester selfbench [--store DIR] [--quick] benchmark the harness overhead
+
+Only argparse is imported up front; every command imports what it needs, so
+`list` and `--help` stay fast (see runner.STARTUP_TARGET).
+"""
+import argparse
+import sys
+from typing import Optional
+
+
+def _run(args: argparse.Namespace) -> int:
+    import time
+
+    from perf_tester.runner import discover, print_report, run_suites
+
+    suites = discover(args.paths, args.pattern)
+    if not suites:
+        print("No benchmark suites found")
+        return 1
+    start = time.perf_counter()
+    reports = run_suites(suites, args.jobs)
+    print_report(reports, time.perf_counter() - start)
+    return 1 if any(report.error is not None for report in reports) else 0
+
+
+def _list(args: argparse.Namespace) -> int:
+    from perf_tester.runner import discover
+
+    for suite in discover(args.paths, args.pattern):
+        print(suite.id)
+    return 0
+
+
+def _build(args: argparse.Namespace) -> int:
+    from perf_tester.cli import compile_c_files
+
+    compile_c_files(args.directory, args.jobs)
+    return 0
+
+
+def _startup(args: argparse.Namespace) -> int:
+    from perf_tester.runner import STARTUP_TARGET, measure_cold_start
+
+    target = STARTUP_TARGET if args.target is None else args.target
+    cli, bare = measure_cold_start(["-m", "perf_tester", "list", *args.paths], args.runs)
+    overhead = cli - bare
+    print(
+        f"Cold start: {cli * 1e3:.1f} ms (interpreter {bare * 1e3:.1f} ms, "
+        f"CLI {overhead * 1e3:.1f} ms, target {target * 1e3:.0f} ms) "
+        + ("ok" if overhead <= target else "OVER TARGET")
+    )
+    return 0 if overhead <= target else 1
+
+
+def _selfbench(args: argparse.Namespace) -> int:
+    from perf_tester.selfbench import run_selfbench
+
+    return run_selfbench(args.store, args.quick)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="perf-tester", description="perf_tester command line")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="discover and run benchmark suites")
+    run.add_argument("paths", nargs="+", help="files, directories or file.py::bench_name")
+    run.add_argument("-j", "--jobs", type=int, help="concurrent suites (default: available cores)")
+    run.add_argument("-k", "--pattern", help="only suites whose name matches this shell pattern")
+    run.set_defaults(handler=_run)
+
+    list_ = commands.add_parser("list", help="list the discovered suites")
+    list_.add_argument("paths", nargs="*", default=["."])
+    list_.add_argument("-k", "--pattern")
+    list_.set_defaults(handler=_list)
+
+    build = commands.add_parser("build", help="compile the changed C files of a directory")
+    build.add_argument("directory", nargs="?", default=".")
+    build.add_argument("-j", "--jobs", type=int)
+    build.set_defaults(handler=_build)
+
+    startup = commands.add_parser("startup", help="benchmark the cold start of the CLI")
+    startup.add_argument("paths", nargs="*", default=["."], help="paths passed to `list`")
+    startup.add_argument("--runs", type=int, default=10)
+    startup.add_argument("--target", type=float, help="seconds over the bare interpreter start")
+    startup.set_defaults(handler=_startup)
+
+    selfbench = commands.add_parser("selfbench", help="benchmark the overhead of perf_tester itself")
+    selfbench.add_argument("--store", default=".perf_selfbench", help="result store of the self-benchmark runs")
+    selfbench.add_argument("--quick", action="store_true", help="fewer iterations and smaller inputs")
+    selfbench.set_defaults(handler=_selfbench)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
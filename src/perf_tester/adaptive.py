@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from math import inf, sqrt
+from statistics import NormalDist
+from typing import Optional
+
+from perf_tester.samples import SampleStore
+
+CONVERGED = "converged"
+MAX_SAMPLES = "max samples"
+TIME_BUDGET = "time budget"
+
+
+@dataclass
+class AdaptiveConfig:
+    """Stopping rules for adaptive sampling.
+
+    A label stops once the confidence interval of its mean is narrower than
+    rel_ci_width * mean (after at least min_samples), when it reaches max_samples,
+    or when the whole run exceeds time_budget seconds.
+    """
+
+    rel_ci_width: float = 0.02
+    min_samples: int = 10
+    max_samples: int = 10_000
+    time_budget: Optional[float] = None
+    confidence: float = 0.95
+
+    def relative_ci_width(self, samples: SampleStore) -> float:
+        """Width of the normal approximation CI of the mean, relative to the mean."""
+        running = samples.running
+        if running.count < 2 or running.mean == 0:
+            return inf
+        z = NormalDist().inv_cdf((1 + self.confidence) / 2)
+        return 2 * z * running.stddev() / sqrt(running.count) / abs(running.mean)
+
+    def stop_reason(self, samples: SampleStore, elapsed: float) -> Optional[str]:
+        if len(samples) >= self.min_samples and self.relative_ci_width(samples) <= self.rel_ci_width:
+            return CONVERGED
+        if len(samples) >= self.max_samples:
+            return MAX_SAMPLES
+        if self.time_budget is not None and elapsed >= self.time_budget:
+            return TIME_BUDGET
+        return None
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Worker agent for distributed runs. Start one per machine (or several on one
+machine with different ports) and point a coordinator.Coordinator at them:
+
+    PERF_AGENT_SECRET=... python -m perf_tester.agent --port 7878
+
+An agent compiles and runs whatever an authenticated coordinator ships to it, so
+anyone holding the shared secret can run code on the host. It listens on 127.0.0.1
+by default; only bind it to other interfaces (--host) on a trusted network, e.g.
+behind a firewall or an SSH tunnel, as the protocol is not encrypted.
+
+Protocol: one JSON object per line in both directions.
+    -> {"type": "hello"}                            <- {"type": "challenge", "nonce"}
+    -> {"type": "auth", "mac"}                      <- {"type": "host", "info": {...}}
+       (mac: hex HMAC-SHA256 of the nonce with the shared secret; nothing else is
+       accepted before it, and a wrong mac closes the connection)
+    -> {"type": "have", "files": {name: sha256}}    <- {"type": "need", "files": [name, ...]}
+    -> {"type": "file", "name", "data", "mode"}     (base64 content, one per needed file;
+                                                     mode is masked to 0o755)
+    -> {"type": "shard", "id", "programs", "builds", "inputs", "histogram"}
+    <- {"type": "sample", "id", "label", "value"}   (streamed while the shard runs)
+    <- {"type": "histogram", "id", "label", "state"} (instead of the samples if the shard
+       has a histogram config: one LogHistogram.to_dict() per label after the shard)
+    <- {"type": "done", "id"} or {"type": "error", "message"}
+Messages are at most MAX_MESSAGE bytes, and at most MAX_AUTH_MESSAGE bytes before
+authentication; a larger message closes the connection.
+Shipped .c sources are compiled on the agent with the build cache of cli.run_builds,
+so a source that did not change since the last shard is neither sent nor rebuilt.
+Programs can only be files of the agent's work directory, and builds only use the
+flag sets of cli.OPTIMIZATION_VARIANTS.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import platform
+import secrets
+import socket
+import socketserver
+import sys
+import tempfile
+from typing import Any, BinaryIO, Optional
+
+from perf_tester.cli import OPTIMIZATION_VARIANTS, BuildJob, compiler_version
+from perf_tester.cperf_test import CPerformanceTester
+from perf_tester.samples import RecordingResults
+from perf_tester.statistics import LogHistogram
+from perf_tester.utils.system_utils import available_cores
+
+DEFAULT_PORT = 7878
+SECRET_ENV = "PERF_AGENT_SECRET"
+# Frame size limits (one JSON line), so a peer cannot make the other side buffer
+# without bound. Shipped files are sent base64 encoded in a single message.
+MAX_MESSAGE = 256 * 1024 * 1024
+MAX_AUTH_MESSAGE = 4096
+# Permission bits a shipped file may get: no setuid/setgid/sticky, no group/other write.
+FILE_MODE_MASK = 0o755
+
+# Host properties that have to match for timings of different hosts to be comparable.
+COMPARABLE_KEYS = ("system", "machine", "cpu_model", "cores", "compiler")
+
+
+def send_message(wfile: BinaryIO, message: dict[str, Any]) -> None:
+    wfile.write(json.dumps(message).encode() + b"\n")
+    wfile.flush()
+
+
+class MessageTooLarge(ValueError):
+    """Raised for a message line longer than the limit; the stream cannot be resynchronized."""
+
+
+def read_message(rfile: BinaryIO, limit: int = MAX_MESSAGE) -> Optional[dict[str, Any]]:
+    """Next message, or None if the peer closed the connection.
+    Raises MessageTooLarge before parsing a message longer than limit bytes."""
+    line = rfile.readline(limit + 1)
+    if len(line) > limit:
+        raise MessageTooLarge(f"Message exceeds {limit} bytes")
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def auth_mac(secret: str, nonce: str) -> str:
+    return hmac.new(secret.encode(), nonce.encode(), hashlib.sha256).hexdigest()
+
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+
+def host_info() -> dict[str, Any]:
+    return {
+        "hostname": socket.gethostname(),
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "cpu_model": cpu_model(),
+        "cores": len(available_cores()),
+        "compiler": compiler_version(),
+        "python": platform.python_version(),
+    }
+
+
+def comparability_issues(infos: dict[str, dict[str, Any]]) -> list[str]:
+    """Differences in COMPARABLE_KEYS between the hosts, one message per property."""
+    issues: list[str] = []
+    for key in COMPARABLE_KEYS:
+        values = {host: info.get(key) for host, info in infos.items()}
+        if len(set(map(str, values.values()))) > 1:
+            details = ", ".join(f"{host}={value}" for host, value in values.items())
+            issues.append(f"Hosts differ in {key}: {details}")
+    return issues
+
+
+class AgentHandler(socketserver.StreamRequestHandler):
+    """Serves one coordinator connection; files are kept in the agent's work directory."""
+
+    server: "AgentServer"
+
+    def handle(self) -> None:
+        if not self.authenticate():
+            return
+        while True:
+            try:
+                message = read_message(self.rfile)
+            except MessageTooLarge as e:
+                send_message(self.wfile, {"type": "error", "message": str(e)})
+                return
+            if message is None:
+                return
+            try:
+                self.dispatch(message)
+            except Exception as e:  # reported to the coordinator instead of killing the agent
+                send_message(self.wfile, {"type": "error", "message": f"{type(e).__name__}: {e}"})
+
+    def authenticate(self) -> bool:
+        """Challenge-response on the shared secret; answers with the host info on success."""
+        try:
+            hello = read_message(self.rfile, MAX_AUTH_MESSAGE)
+            if not isinstance(hello, dict) or hello.get("type") != "hello":
+                return False
+            nonce = secrets.token_hex(32)
+            send_message(self.wfile, {"type": "challenge", "nonce": nonce})
+            auth = read_message(self.rfile, MAX_AUTH_MESSAGE)
+        except ValueError:  # not JSON or too large
+            return False
+        if not isinstance(auth, dict) or auth.get("type") != "auth":
+            return False
+        if not hmac.compare_digest(str(auth.get("mac", "")), auth_mac(self.server.secret, nonce)):
+            send_message(self.wfile, {"type": "error", "message": "Authentication failed"})
+            return False
+        send_message(self.wfile, {"type": "host", "info": host_info()})
+        return True
+
+    def dispatch(self, message: dict[str, Any]) -> None:
+        kind = message["type"]
+        if kind == "have":
+            send_message(self.wfile, {"type": "need", "files": self.missing(message["files"])})
+        elif kind == "file":
+            self.store(message["name"], base64.b64decode(message["data"]), message.get("mode", 0o644))
+        elif kind == "shard":
+            self.run_shard(message)
+        else:
+            raise ValueError(f"Unknown message type {kind!r}")
+
+    def path(self, name: str) -> str:
+        if os.path.basename(name) != name:
+            raise ValueError(f"Invalid file name {name!r}")
+        return os.path.join(self.server.workdir, name)
+
+    def missing(self, files: dict[str, str]) -> list[str]:
+        return [
+            name
+            for name, digest in files.items()
+            if not os.path.exists(self.path(name)) or file_digest(self.path(name)) != digest
+        ]
+
+    def store(self, name: str, data: bytes, mode: int) -> None:
+        path = self.path(name)
+        with open(path, "wb") as f:
+            f.write(data)
+        os.chmod(path, int(mode) & FILE_MODE_MASK)
+
+    def run_shard(self, shard: dict[str, Any]) -> None:
+        shard_id = shard["id"]
+        inputs = iter(shard["inputs"])
+        tester = CPerformanceTester(len(shard["inputs"]), lambda: next(inputs), self.server.workdir)
+        for program in shard["programs"]:
+            index = program["index"]
+            tester.add_program(
+                program["name"],
+                self.path(program["path"]),
+                lambda args, index=index: args[index],
+                program["server"],
+            )
+        allowed_flags = set(OPTIMIZATION_VARIANTS.values())
+        for build in shard["builds"]:
+            flags = tuple(build["flags"])
+            if flags not in allowed_flags:
+                raise ValueError(f"Build flags {' '.join(flags)!r} are not an optimization variant")
+            tester.variant_builds.append(
+                BuildJob(self.path(build["source"]), self.path(build["output"]), flags)
+            )
+        histogram = shard.get("histogram")
+        if histogram is None:
+            tester.results = RecordingResults(
+                lambda label, value: send_message(
+                    self.wfile, {"type": "sample", "id": shard_id, "label": label, "value": value}
+                )
+            )
+        tester.run_tests()
+        if histogram is not None:
+            for label, samples in tester.results.items():
+                state = LogHistogram.from_values(samples, **histogram).to_dict()
+                send_message(self.wfile, {"type": "histogram", "id": shard_id, "label": label, "state": state})
+        send_message(self.wfile, {"type": "done", "id": shard_id})
+
+
+class AgentServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], workdir: str, secret: str):
+        if not secret:
+            raise ValueError("An agent needs a shared secret")
+        super().__init__(address, AgentHandler)
+        self.workdir = workdir
+        self.secret = secret
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="perf_tester worker agent")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument("--workdir", help="directory for shipped files (default: a new temp dir)")
+    parser.add_argument(
+        "--secret-file", help=f"file holding the shared secret (default: the {SECRET_ENV} variable)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.secret_file:
+        with open(args.secret_file) as f:
+            secret = f.read().strip()
+    else:
+        secret = os.environ.get(SECRET_ENV, "")
+    if not secret:
+        parser.error(f"a shared secret is required: set {SECRET_ENV} or pass --secret-file")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="perf_agent_")
+    os.makedirs(workdir, exist_ok=True)
+    with AgentServer((args.host, args.port), workdir, secret) as server:
+        host, port = server.server_address[:2]
+        # The coordinator side (and scripts starting agents) parse this line.
+        print(f"perf_tester agent listening on {host}:{port} (workdir {workdir})", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
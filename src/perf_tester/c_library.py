@@ -0,0 +1,50 @@
+import ctypes
+import os
+import subprocess
+from typing import Any, Optional, Sequence
+
+from perf_tester.cli import INCLUDE_DIR
+
+SHARED_LIBRARY_SUFFIX = ".dll" if os.name == "nt" else ".so"
+
+
+def compile_shared_library(
+    sources: Sequence[str],
+    output: Optional[str] = None,
+    flags: Optional[Sequence[str]] = None,
+) -> str:
+    """Compiles C sources into a shared library and returns its path.
+    By default the library is placed next to the first source file."""
+    if output is None:
+        output = os.path.splitext(sources[0])[0] + SHARED_LIBRARY_SUFFIX
+    command = ["gcc", "-shared", "-fPIC", *sources, "-o", output]
+    command += list(flags) if flags is not None else ["-O2"]
+    command += ["-I", INCLUDE_DIR, "-lm"]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Error compiling {output}:\n{result.stderr}")
+    return output
+
+
+class CFunction:
+    """An exported symbol of a shared library loaded with ctypes.
+    It is called with the tuple of arguments produced by a marshalling function,
+    so it can be registered like any Python function in a PerformanceTester."""
+
+    def __init__(
+        self,
+        library_path: str,
+        symbol: str,
+        restype: Any = ctypes.c_int,
+        argtypes: Optional[Sequence[Any]] = None,
+    ):
+        self.library_path = os.path.abspath(library_path)
+        self.library = ctypes.CDLL(self.library_path)
+        self.__name__ = symbol
+        self._func = getattr(self.library, symbol)
+        self._func.restype = restype
+        if argtypes is not None:
+            self._func.argtypes = list(argtypes)
+
+    def __call__(self, args: Sequence[Any]) -> Any:
+        return self._func(*args)
@@ -0,0 +1,66 @@
+import itertools
+import time
+import types
+from collections.abc import Iterable
+from statistics import median
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def _empty(_: Any) -> None:
+    return None
+
+
+def time_loop(func: Callable[[T], Any], special_data: T, number: int) -> float:
+    """Total time of `number` back-to-back calls, timed with one timer pair."""
+    timer = time.perf_counter
+    loop = itertools.repeat(None, number)
+    start_time = timer()
+    for _ in loop:
+        func(special_data)
+    return timer() - start_time
+
+
+def timer_overhead(samples: int = 10_000) -> float:
+    """Median cost of two back-to-back perf_counter calls."""
+    timer = time.perf_counter
+    deltas: list[float] = []
+    for _ in range(samples):
+        start_time = timer()
+        end_time = timer()
+        deltas.append(end_time - start_time)
+    return median(deltas)
+
+
+def empty_call_overhead(
+    func: Callable[..., Any], special_data: Any, number: int, overhead: float, repeat: int = 5
+) -> float:
+    """Per-call cost of the timing loop itself, measured with an empty callable.
+    Python functions are compared against an empty Python function, everything else
+    against a trivial builtin, since calling a builtin is considerably cheaper."""
+    baseline = _empty if isinstance(func, types.FunctionType) else callable
+    return min(
+        (time_loop(baseline, special_data, number) - overhead) / number for _ in range(repeat)
+    )
+
+
+def autorange(func: Callable[[T], Any], special_data: T, min_sample_time: float) -> int:
+    """Like timeit.Timer.autorange: the smallest number of calls from the sequence
+    1, 2, 5, 10, 20, 50, ... whose total time is at least min_sample_time."""
+    number = 1
+    while True:
+        for multiplier in (1, 2, 5):
+            if time_loop(func, special_data, number * multiplier) >= min_sample_time:
+                return number * multiplier
+        number *= 10
+
+
+def time_drain(res: Any) -> float:
+    """Time needed to exhaust an iterable result, 0 for anything else."""
+    if not isinstance(res, Iterable):
+        return 0.0
+    start_time = time.perf_counter()
+    for _ in res:
+        pass
+    return time.perf_counter() - start_time
@@ -1,26 +1,138 @@
 #!/usr/bin/env python3
+import functools
+import hashlib
+import json
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+# Headers shipped with perf_tester, e.g. perf_server.h for the server mode protocol.
+INCLUDE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "include")
+
+DEFAULT_FLAGS: tuple[str, ...] = ("-O0",)
+CACHE_FILE = ".perf_build_cache.json"
+
+# A commonly used optimization-level matrix for add_program_variants.
+OPTIMIZATION_VARIANTS: dict[str, tuple[str, ...]] = {
+    "O0": ("-O0",),
+    "O2": ("-O2",),
+    "O3": ("-O3",),
+    "native": ("-O3", "-march=native"),
+}
+
+
+@dataclass(frozen=True)
+class BuildJob:
+    """One source file compiled with one set of flags into one executable."""
+
+    source: str
+    output: str
+    flags: tuple[str, ...] = DEFAULT_FLAGS
+
+    @property
+    def command(self) -> list[str]:
+        return ["gcc", self.source, "-o", self.output, *self.flags, "-I", INCLUDE_DIR, "-lm"]
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_version(compiler: str = "gcc") -> str:
+    result = subprocess.run([compiler, "--version"], capture_output=True, text=True)
+    return result.stdout.splitlines()[0] if result.stdout else ""
+
+
+def build_key(job: BuildJob) -> str:
+    """Hash of everything that determines the executable: source, shipped headers,
+    compiler version and the full command line."""
+    digest = hashlib.sha256()
+    with open(job.source, "rb") as f:
+        digest.update(f.read())
+    for header in sorted(os.listdir(INCLUDE_DIR)):
+        with open(os.path.join(INCLUDE_DIR, header), "rb") as f:
+            digest.update(f.read())
+    digest.update(compiler_version(job.command[0]).encode())
+    digest.update("\0".join(job.command[1:]).encode())
+    return digest.hexdigest()
+
+
+def variant_output(source: str, variant: str) -> str:
+    """Executable path of a source compiled as the given variant, e.g. prime_naive-O3."""
+    return f"{os.path.splitext(source)[0]}-{variant}"
+
+
+def plan_builds(directory: str, flags: tuple[str, ...] = DEFAULT_FLAGS) -> list[BuildJob]:
+    """One job per .c file in directory, compiled to an executable without extension."""
+    return [
+        BuildJob(
+            os.path.join(directory, filename),
+            os.path.join(directory, os.path.splitext(filename)[0]),
+            flags,
+        )
+        for filename in sorted(os.listdir(directory))
+        if filename.endswith(".c")
+    ]
+
+
+def _load_cache(directory: str) -> dict[str, str]:
+    try:
+        with open(os.path.join(directory, CACHE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_cache(directory: str, cache: dict[str, str]) -> None:
+    with open(os.path.join(directory, CACHE_FILE), "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def _compile(job: BuildJob) -> subprocess.CompletedProcess:
+    print(f"Compiling {os.path.basename(job.source)} -> {os.path.basename(job.output)}")
+    return subprocess.run(job.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+
+def run_builds(jobs: list[BuildJob], max_workers: Optional[int] = None) -> list[BuildJob]:
+    """Compiles all jobs whose build key changed since the last successful build.
+    Cache misses are compiled in parallel. Returns the jobs that were compiled."""
+    caches: dict[str, dict[str, str]] = {}
+    misses: list[tuple[BuildJob, str]] = []
+    for job in dict.fromkeys(jobs):
+        directory = os.path.dirname(job.output) or "."
+        cache = caches.setdefault(directory, _load_cache(directory))
+        key = build_key(job)
+        if cache.get(os.path.basename(job.output)) == key and os.path.exists(job.output):
+            continue
+        misses.append((job, key))
+
+    if not misses:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        results = list(pool.map(_compile, [job for job, _ in misses]))
+
+    compiled: list[BuildJob] = []
+    for (job, key), result in zip(misses, results):
+        directory = os.path.dirname(job.output) or "."
+        if result.returncode != 0:
+            print(f"Error compiling {job.source}:\n{result.stderr}")
+            caches[directory].pop(os.path.basename(job.output), None)
+            continue
+        print(f"Successfully compiled {job.source} to {job.output}")
+        caches[directory][os.path.basename(job.output)] = key
+        compiled.append(job)
+    for directory, cache in caches.items():
+        _store_cache(directory, cache)
+    return compiled
+
+
+def compile_c_files(directory: str, max_workers: Optional[int] = None) -> list[BuildJob]:
+    """Compiles every changed .c file in directory."""
+    print(f"Scanning directory: {directory}")
+    return run_builds(plan_builds(directory), max_workers)
 
 
 def compile_c_files_in_current_directory():
-    current_dir = os.getcwd()
-    print(f"Scanning directory: {current_dir}")
-    for filename in os.listdir(current_dir):
-        if filename.endswith(".c"):
-            filepath = os.path.join(current_dir, filename)
-            # Create output name by removing the .c extension
-            executable = os.path.splitext(filename)[0]
-            output_path = os.path.join(current_dir, executable)
-            command = ["gcc", filepath, "-o", output_path, "-O0"]
-            
-            print(f"Compiling {filename} -> {executable}")
-            result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            
-            if result.returncode != 0:
-                print(f"Error compiling {filename}:\n{result.stderr}")
-            else:
-                print(f"Successfully compiled {filename} to {executable}")
+    compile_c_files(os.getcwd())
 
 if __name__ == "__main__":
-    compile_c_files_in_current_directory()
\ No newline at end of file
+    compile_c_files_in_current_directory()
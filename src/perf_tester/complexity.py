@@ -0,0 +1,278 @@
+import csv
+from collections import defaultdict
+from dataclasses import dataclass
+from math import exp, isfinite, log, sqrt
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from perf_tester.samples import SampleStore
+from perf_tester.statistics import Metric, default_mean, default_median
+from perf_tester.utils.table_printer import print_table
+
+# Candidate models t(n) = a + b * f(n), ordered from the simplest to the most complex.
+# On a (near) tie the simpler model wins. "n^k" is fitted as t(n) = c * n^k.
+MODELS: Dict[str, Optional[Callable[[float], float]]] = {
+    "O(1)": None,
+    "O(log n)": lambda n: log(n),
+    "O(sqrt n)": sqrt,
+    "O(n)": lambda n: n,
+    "O(n log n)": lambda n: n * log(n),
+    "O(n^2)": lambda n: n * n,
+    "O(n^k)": None,
+}
+
+_TIME = Metric("time", default_median, "s")
+
+
+def _format_time(value: float) -> str:
+    scaled, unit = _TIME.scale_value(value)
+    return f"{scaled:7.3f} {unit}"
+
+
+@dataclass
+class Fit:
+    """Least squares fit of one complexity model to (n, time) points.
+    For "O(n^k)" `coefficient` is c and `exponent` is k, otherwise the model
+    is intercept + coefficient * f(n). `error` is the relative residual sum of squares."""
+
+    model: str
+    intercept: float
+    coefficient: float
+    error: float
+    exponent: Optional[float] = None
+
+    def predict(self, n: float) -> float:
+        if self.model == "O(n^k)":
+            return self.coefficient * n ** self.exponent
+        basis = MODELS[self.model]
+        return self.intercept + (self.coefficient * basis(n) if basis else 0.0)
+
+    def describe(self) -> str:
+        if self.model == "O(n^k)":
+            return f"O(n^{self.exponent:.2f})"
+        return self.model
+
+
+def _relative_error(fit: Fit, ns: Sequence[float], times: Sequence[float]) -> float:
+    return sum(((fit.predict(n) - t) / t) ** 2 for n, t in zip(ns, times))
+
+
+def _fit_linear(model: str, ns: Sequence[float], times: Sequence[float]) -> Fit:
+    """Weighted least squares of t = a + b * f(n) with weights 1/t^2, so every point
+    counts by its relative error. a and b are constrained to be non-negative."""
+    basis = MODELS[model]
+    weights = [1 / (t * t) for t in times]
+    total = sum(weights)
+    mean_t = sum(w * t for w, t in zip(weights, times)) / total
+    if basis is None:
+        return Fit(model, mean_t, 0.0, 0.0)
+    xs = [basis(n) for n in ns]
+    mean_x = sum(w * x for w, x in zip(weights, xs)) / total
+    sxx = sum(w * (x - mean_x) ** 2 for w, x in zip(weights, xs))
+    sxt = sum(w * (x - mean_x) * (t - mean_t) for w, x, t in zip(weights, xs, times))
+    b = sxt / sxx if sxx > 0 else 0.0
+    a = mean_t - b * mean_x
+    if b < 0:
+        a, b = mean_t, 0.0
+    elif a < 0:
+        sxx0 = sum(w * x * x for w, x in zip(weights, xs))
+        a, b = 0.0, sum(w * x * t for w, x, t in zip(weights, xs, times)) / sxx0
+    return Fit(model, a, b, 0.0)
+
+
+def _fit_power(ns: Sequence[float], times: Sequence[float]) -> Fit:
+    """Ordinary least squares of log t = log c + k log n."""
+    xs = [log(n) for n in ns]
+    ys = [log(t) for t in times]
+    mean_x = default_mean(xs)
+    mean_y = default_mean(ys)
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    k = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx if sxx > 0 else 0.0
+    return Fit("O(n^k)", 0.0, exp(mean_y - k * mean_x), 0.0, k)
+
+
+def fit_complexity(
+    ns: Sequence[float], times: Sequence[float], tolerance: float = 0.1
+) -> List[Fit]:
+    """
+    Fits all candidate models to the measured times and returns them best first.
+    A model only beats a simpler one if its relative error is more than
+    `tolerance` lower, so noise does not promote e.g. O(n) to O(n^1.02).
+    """
+    if len(ns) < 3:
+        raise ValueError("At least three input sizes are needed to fit a complexity model")
+    if min(ns) <= 0 or min(times) <= 0:
+        raise ValueError("Input sizes and times must be positive")
+    fits = [
+        _fit_power(ns, times) if model == "O(n^k)" else _fit_linear(model, ns, times)
+        for model in MODELS
+    ]
+    for fit in fits:
+        fit.error = _relative_error(fit, ns, times)
+    fits = [fit for fit in fits if isfinite(fit.error)]
+    best_error = min(fit.error for fit in fits)
+    best = next(fit for fit in fits if fit.error <= best_error * (1 + tolerance) + 1e-12)
+    return [best] + sorted((fit for fit in fits if fit is not best), key=lambda fit: fit.error)
+
+
+def crossover_points(
+    first: Fit, second: Fit, lo: float, hi: float, steps: int = 256
+) -> List[float]:
+    """Input sizes in [lo, hi] where the predicted times of two fits are equal.
+    Sign changes are searched on a geometric grid and refined by bisection."""
+    def diff(n: float) -> float:
+        return first.predict(n) - second.predict(n)
+
+    ratio = (hi / lo) ** (1 / steps)
+    grid = [lo * ratio**i for i in range(steps + 1)]
+    points: List[float] = []
+    for left, right in zip(grid, grid[1:]):
+        d_left, d_right = diff(left), diff(right)
+        if d_left == 0:
+            points.append(left)
+        elif d_left * d_right < 0:
+            for _ in range(60):
+                middle = sqrt(left * right)
+                if diff(middle) * d_left > 0:
+                    left = middle
+                else:
+                    right = middle
+            points.append(sqrt(left * right))
+    return points
+
+
+class SweepResult:
+    """Times of every label over a range of input sizes, with the fitted models.
+    Samples are kept per size, so a label that got no samples at some size (e.g. all
+    dropped as noisy) is fitted on the sizes it was actually measured at."""
+
+    def __init__(self, sizes: Sequence[Hashable], ns: Sequence[float], extrapolate: float = 100.0):
+        self.sizes = list(sizes)
+        self.ns = list(ns)
+        self.extrapolate = extrapolate
+        self.samples: Dict[str, Dict[Hashable, SampleStore]] = defaultdict(dict)
+        self.fits: Dict[str, List[Fit]] = {}
+        self.unfitted: List[str] = []
+
+    def add(self, label: str, size: Hashable, samples: SampleStore) -> None:
+        self.samples[label][size] = samples
+
+    def measured(self, label: str) -> List[Tuple[Hashable, float, SampleStore]]:
+        """(size, n, samples) of every size with samples of the label, in sweep order."""
+        stores = self.samples[label]
+        return [
+            (size, n, stores[size])
+            for size, n in zip(self.sizes, self.ns)
+            if len(stores.get(size, ())) > 0
+        ]
+
+    def medians(self, label: str) -> List[float]:
+        return [default_median(store) for _, _, store in self.measured(label)]
+
+    def fit(self, tolerance: float = 0.1) -> None:
+        """Fits every label measured at three or more sizes; the others are listed in unfitted."""
+        self.unfitted = []
+        for label in self.samples:
+            measured = self.measured(label)
+            if len(measured) < 3:
+                self.unfitted.append(label)
+                continue
+            ns = [n for _, n, _ in measured]
+            self.fits[label] = fit_complexity(ns, self.medians(label), tolerance)
+
+    def best(self, label: str) -> Fit:
+        return self.fits[label][0]
+
+    def crossovers(self) -> List[Tuple[str, str, float]]:
+        """Predicted input sizes at which one label overtakes another, using the best fits.
+        The search extends by a factor of `extrapolate` beyond the measured sizes."""
+        lo, hi = min(self.ns) / self.extrapolate, max(self.ns) * self.extrapolate
+        labels = list(self.fits)
+        points: List[Tuple[str, str, float]] = []
+        for i, first in enumerate(labels):
+            for second in labels[i + 1:]:
+                for n in crossover_points(self.best(first), self.best(second), lo, hi):
+                    points.append((first, second, n))
+        return points
+
+    def print_tables(self) -> None:
+        for label in self.samples:
+            fit = self.fits[label][0] if label in self.fits else None
+            table: List[List[Any]] = [[label, "n", "median", "mean", "fit", "residual"], ["__sep"]]
+            for size, n, store in self.measured(label):
+                measured = default_median(store)
+                row: List[Any] = [size, f"{n:.4g}", _format_time(measured), _format_time(default_mean(store))]
+                if fit is None:
+                    row += ["-", "-"]
+                else:
+                    predicted = fit.predict(n)
+                    row += [_format_time(predicted), f"{(measured - predicted) / predicted * 100:+.1f}%"]
+                table.append(row)
+            print_table(table)
+
+        summary: List[List[Any]] = [["Label", "best fit", "rel. error", "runner-up"], ["__sep"]]
+        for label, fits in self.fits.items():
+            runner_up = fits[1].describe() if len(fits) > 1 else "-"
+            summary.append([label, fits[0].describe(), f"{fits[0].error:.3g}", runner_up])
+        print_table(summary)
+        if self.unfitted:
+            print(f"Not fitted (measured at fewer than three sizes): {', '.join(self.unfitted)}")
+
+        smallest, largest = min(self.ns), max(self.ns)
+        for first, second, n in self.crossovers():
+            where = "measured" if smallest <= n <= largest else "extrapolated"
+            print(f"Crossover {first} / {second} at n ≈ {n:.4g} ({where})")
+
+    def write_csv(self, path: str) -> None:
+        """Writes the measured curve and the best-fit prediction, one row per label and measured size."""
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["label", "size", "n", "samples", "median", "mean", "fit_model", "fit"])
+            for label in self.samples:
+                fit = self.fits[label][0] if label in self.fits else None
+                for size, n, store in self.measured(label):
+                    writer.writerow([
+                        label,
+                        size,
+                        repr(n),
+                        len(store),
+                        repr(default_median(store)),
+                        repr(default_mean(store)),
+                        fit.describe() if fit else "",
+                        repr(fit.predict(n)) if fit else "",
+                    ])
+
+
+def run_sweep(
+    tester: Any,
+    sizes: Sequence[Hashable],
+    gen_sized: Callable[[Any], Any],
+    size_of: Optional[Callable[[Any], float]] = None,
+    csv_path: Optional[str] = None,
+    tolerance: float = 0.1,
+    run: Optional[Callable[[], Any]] = None,
+) -> SweepResult:
+    """
+    Runs the tests once per size with gen_sized(size) as data generator and fits the
+    median times. run measures one size (default tester.run_tests), e.g. a bound
+    run_tests_adaptive to sweep in a run mode. size_of maps a size parameter to the
+    n of the models, e.g. lambda digits: 10**digits when sweeping over the digit
+    count of a number. The tester's generator and results are restored afterwards.
+    """
+    size_of = size_of or float
+    run = run or tester.run_tests
+    result = SweepResult(sizes, [float(size_of(size)) for size in sizes])
+    generate_data, results = tester.generate_data, tester.results
+    try:
+        for size in sizes:
+            tester.generate_data = lambda size=size: gen_sized(size)
+            tester.results = defaultdict(SampleStore)
+            run()
+            for label, store in tester.results.items():
+                result.add(label, size, store)
+    finally:
+        tester.generate_data, tester.results = generate_data, results
+    result.fit(tolerance)
+    result.print_tables()
+    if csv_path is not None:
+        result.write_csv(csv_path)
+    return result
@@ -0,0 +1,265 @@
+import base64
+import os
+import socket
+import threading
+from collections import defaultdict
+from typing import Any, Optional, Sequence
+
+from perf_tester.agent import (
+    DEFAULT_PORT,
+    SECRET_ENV,
+    auth_mac,
+    comparability_issues,
+    file_digest,
+    read_message,
+    send_message,
+)
+from perf_tester.cperf_test import CPerformanceTester
+from perf_tester.parallel import split_blocks
+from perf_tester.samples import SampleStore
+from perf_tester.statistics import LogHistogram
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return (host, int(port)) if host else (address, DEFAULT_PORT)
+
+
+class AgentConnection:
+    """Client side of one agent connection (see perf_tester.agent for the protocol)."""
+
+    def __init__(self, address: str, secret: str, timeout: Optional[float] = None):
+        self.address = address
+        self.secret = secret
+        self.sock = socket.create_connection(parse_address(address), timeout=timeout)
+        self.rfile = self.sock.makefile("rb")
+        self.wfile = self.sock.makefile("wb")
+        self.info: dict[str, Any] = {}
+
+    def request(self, message: dict[str, Any]) -> dict[str, Any]:
+        send_message(self.wfile, message)
+        return self.receive()
+
+    def receive(self) -> dict[str, Any]:
+        reply = read_message(self.rfile)
+        if reply is None:
+            raise ConnectionError(f"Agent {self.address} closed the connection")
+        if reply["type"] == "error":
+            raise RuntimeError(f"Agent {self.address}: {reply['message']}")
+        return reply
+
+    def hello(self) -> dict[str, Any]:
+        """Authenticates with the shared secret and returns the agent's host info."""
+        nonce = self.request({"type": "hello"})["nonce"]
+        self.info = self.request({"type": "auth", "mac": auth_mac(self.secret, nonce)})["info"]
+        return self.info
+
+    def ship(self, files: dict[str, str]) -> list[str]:
+        """Sends the files (name -> local path) the agent does not already have.
+        Returns the names that were transferred."""
+        needed = self.request(
+            {"type": "have", "files": {name: file_digest(path) for name, path in files.items()}}
+        )["files"]
+        for name in needed:
+            with open(files[name], "rb") as f:
+                data = base64.b64encode(f.read()).decode()
+            mode = os.stat(files[name]).st_mode & 0o777
+            send_message(self.wfile, {"type": "file", "name": name, "data": data, "mode": mode})
+        return needed
+
+    def close(self) -> None:
+        for stream in (self.rfile, self.wfile):
+            stream.close()
+        self.sock.close()
+
+
+class Coordinator:
+    """
+    Distributes the programs of a CPerformanceTester over worker agents.
+    All inputs are generated and transformed locally and split into one shard per
+    agent; every agent runs all programs on its shard and streams the samples back.
+    Samples are merged into the tester's results (and StatsCollection), and every
+    sample is tagged with the agent it was measured on (`tagged`, `host_results`).
+    Hosts that differ in CPU, core count, platform or compiler are reported and,
+    with strict=True, refused. secret is the agents' shared secret (default: the
+    PERF_AGENT_SECRET environment variable).
+    With a LogHistogram (its range and precision are used) the agents send one
+    fixed-size histogram per label and shard instead of every sample; they are merged
+    into `histograms` (and per host into `host_results`) and samples are not tagged.
+    """
+
+    def __init__(
+        self,
+        agents: Sequence[str],
+        strict: bool = False,
+        timeout: Optional[float] = None,
+        secret: Optional[str] = None,
+        histogram: Optional[LogHistogram] = None,
+    ):
+        if not agents:
+            raise ValueError("At least one agent address is needed")
+        self.secret = secret if secret is not None else os.environ.get(SECRET_ENV, "")
+        if not self.secret:
+            raise ValueError(f"The agents' shared secret is needed: pass secret= or set {SECRET_ENV}")
+        self.agents = list(agents)
+        self.strict = strict
+        self.timeout = timeout
+        self.connections: list[AgentConnection] = []
+        self.hosts: dict[str, dict[str, Any]] = {}
+        self.issues: list[str] = []
+        self.shipped: dict[str, list[str]] = {}
+        self.histogram = histogram
+        self.tagged: list[tuple[str, str, float]] = []
+        self.host_results: dict[str, dict[str, Any]] = defaultdict(
+            lambda: defaultdict(SampleStore)
+        )
+        self.histograms: dict[str, LogHistogram] = {}
+        self._lock = threading.Lock()
+
+    def connect(self) -> list[str]:
+        """Connects to all agents and checks that they are comparable.
+        Returns the comparability issues found."""
+        for address in self.agents:
+            connection = AgentConnection(address, self.secret, self.timeout)
+            self.connections.append(connection)
+            self.hosts[address] = connection.hello()
+        self.issues = comparability_issues(self.hosts)
+        if self.issues and self.strict:
+            self.close()
+            raise RuntimeError("Agents are not comparable:\n" + "\n".join(self.issues))
+        return self.issues
+
+    def close(self) -> None:
+        for connection in self.connections:
+            connection.close()
+        self.connections.clear()
+
+    def __enter__(self) -> "Coordinator":
+        self.connect()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def files_to_ship(tester: CPerformanceTester) -> dict[str, str]:
+        """All C sources of the tester directory plus prebuilt programs without a source."""
+        files = {
+            name: os.path.join(tester.dir, name)
+            for name in sorted(os.listdir(tester.dir))
+            if name.endswith(".c")
+        }
+        variant_outputs = {os.path.basename(job.output) for job in tester.variant_builds}
+        for _, program_path, _ in tester.programs:
+            name = os.path.basename(program_path)
+            source = f"{os.path.splitext(name)[0]}.c"
+            path = program_path if os.path.isabs(program_path) else os.path.join(tester.dir, program_path)
+            if source not in files and name not in variant_outputs and os.path.isfile(path):
+                files[name] = path
+        for job in tester.variant_builds:
+            files.setdefault(os.path.basename(job.source), job.source)
+        return files
+
+    def _shard(self, tester: CPerformanceTester, shard_id: int, inputs: list[list[list[str]]]) -> dict:
+        return {
+            "type": "shard",
+            "id": shard_id,
+            "programs": [
+                {
+                    "name": name,
+                    "path": os.path.basename(program_path),
+                    "server": name in tester.server_programs,
+                    "index": index,
+                }
+                for index, (name, program_path, _) in enumerate(tester.programs)
+            ],
+            "builds": [
+                {
+                    "source": os.path.basename(job.source),
+                    "output": os.path.basename(job.output),
+                    "flags": list(job.flags),
+                }
+                for job in tester.variant_builds
+            ],
+            "inputs": inputs,
+            "histogram": None if self.histogram is None else self.histogram.config(),
+        }
+
+    def _run_shard(self, connection: AgentConnection, tester: CPerformanceTester, shard: dict) -> None:
+        send_message(connection.wfile, shard)
+        while True:
+            message = connection.receive()
+            if message["type"] == "done":
+                return
+            if message["type"] == "sample":
+                label, value = message["label"], message["value"]
+                with self._lock:
+                    tester.results[label].append(value)
+                    self.host_results[connection.address][label].append(value)
+                    self.tagged.append((connection.address, label, value))
+            elif message["type"] == "histogram":
+                label, histogram = message["label"], LogHistogram.from_dict(message["state"])
+                with self._lock:
+                    self._merge(self.histograms, label, histogram)
+                    self._merge(self.host_results[connection.address], label, histogram)
+
+    @staticmethod
+    def _merge(histograms: dict[str, Any], label: str, histogram: LogHistogram) -> None:
+        if label not in histograms:
+            histograms[label] = LogHistogram(**histogram.config())
+        histograms[label].merge(histogram)
+
+    def run(self, tester: CPerformanceTester) -> None:
+        """Runs tester.num_tests inputs of every program, split over the agents."""
+        if not self.connections:
+            self.connect()
+        files = self.files_to_ship(tester)
+        for connection in self.connections:
+            self.shipped[connection.address] = connection.ship(files)
+
+        inputs = []
+        for _ in range(tester.num_tests):
+            data = tester.generate_data()
+            inputs.append([list(map(str, data_func(data))) for _, _, data_func in tester.programs])
+        blocks = split_blocks(inputs, len(self.connections))
+
+        errors: list[BaseException] = []
+
+        def worker(connection: AgentConnection, shard: dict) -> None:
+            try:
+                self._run_shard(connection, tester, shard)
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=worker, args=(connection, self._shard(tester, i, block)))
+            for i, (connection, block) in enumerate(zip(self.connections, blocks))
+            if block
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def compare_performance(self, tester: CPerformanceTester) -> None:
+        """Distributed counterpart of CPerformanceTester.compare_performance."""
+        self.run(tester)
+        collection = tester.stats_collection
+        results: dict[str, Any] = {**tester.results, **self.histograms}
+        collection.add_all_stats(results, groups=tester.program_groups)
+        for label in results:
+            counts = ", ".join(
+                f"{host}: {len(stores[label])}"
+                for host, stores in sorted(self.host_results.items())
+                if label in stores
+            )
+            collection.set_info(label, "hosts", counts)
+        collection.add_note(f"Distributed over {len(self.connections)} agent(s)")
+        for address, names in self.shipped.items():
+            if names:
+                collection.add_note(f"Shipped to {address}: {', '.join(names)}")
+        for issue in self.issues:
+            collection.add_note(f"Warning: {issue}")
+        collection.print_all_stats()
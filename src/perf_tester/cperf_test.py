@@ -1,18 +1,61 @@
+import asyncio
+import functools
 import os
-import subprocess
+import random
 import sys
 import time
-from collections import defaultdict
+from collections import Counter, defaultdict
 from collections.abc import Iterable
-from typing import Any, Callable, Generic, TypeVar
+from contextlib import ExitStack
+from typing import Any, Callable, Generic, Optional, Sequence, TypeVar
 
-from perf_tester.cli import compile_c_files_in_current_directory
-from perf_tester.statistics import StatsCollection
-from perf_tester.utils.progress_bar import ProgressBar
+from perf_tester.adaptive import AdaptiveConfig
+from perf_tester.cli import (
+    DEFAULT_FLAGS,
+    BuildJob,
+    compiler_version,
+    plan_builds,
+    run_builds,
+    variant_output,
+)
+from perf_tester.complexity import SweepResult, run_sweep
+from perf_tester.memory import build_rss_launcher, c_memory_metrics, measure_peak_rss
+from perf_tester.modes import SERIAL, require_mode, select_mode
+from perf_tester.parallel import run_parallel
+from perf_tester.prefetch import InputPrefetcher, input_generation_note
+from perf_tester.profiling import PerfRecorder
+from perf_tester.result_cache import ResultCache, program_fingerprint
+from perf_tester.result_store import ResultStore, RunWriter
+from perf_tester.samples import RecordingResults, SampleStore
+from perf_tester.scheduling import NoiseMonitor, Schedule
+from perf_tester.selfbench import Overheads
+from perf_tester.server_mode import DEFAULT_TIMEOUT, ProgramServer
+from perf_tester.statistics import LogHistogram, Metric, StatsCollection, default_mean, running_mean
+from perf_tester.utils.process_utils import (
+    HAS_ASYNC_RUSAGE,
+    OutputDigest,
+    check_child,
+    resolve_program,
+    run_child,
+    run_child_async,
+)
+from perf_tester.utils.dashboard import Dashboard
+from perf_tester.utils.system_utils import available_cores
 
 A = TypeVar("A")
 T = TypeVar("T")
 
+# Run modes that time every invocation in this process (see _time_invocation).
+SERIAL_MODES = (SERIAL, "adaptive", "prefetch", "schedule/noise", "cache")
+
+
+def rusage_metrics() -> list[Metric]:
+    """Metrics over the per-child resource usage recorded by the asyncio engine."""
+    return [
+        Metric("user", default_mean, "s", series="user"),
+        Metric("sys", default_mean, "s", series="sys"),
+    ]
+
 
 class CPerformanceTester(Generic[A]):
     """Compares the performance of one or more compiled C programs.
@@ -20,68 +63,630 @@ class CPerformanceTester(Generic[A]):
     The execution times are recorded in a StatsCollection and printed using the table printer.
 
     The interface is kept similar to the original PerformanceTester.
+
+    Program output is sent to /dev/null unless output_limit > 0, in which case the
+    first output_limit bytes of the latest invocation are kept in `outputs`.
+    With validate=True the normalized stdout of every program is hashed and programs
+    whose answer differs from the others for the same input are flagged
+    (serial and asyncio runs).
+    Server mode programs that do not answer a request within server_timeout seconds
+    are killed and the run fails with server_mode.ServerTimeoutError.
     """
 
-    def __init__(self, num_tests: int, gen_data: Callable[[], A], dir):
+    def __init__(
+        self,
+        num_tests: int,
+        gen_data: Callable[[], A],
+        dir,
+        output_limit: int = 0,
+        validate: bool = False,
+        server_timeout: Optional[float] = DEFAULT_TIMEOUT,
+    ):
         self.num_tests = num_tests
         self.programs: list[tuple[str, str, Callable[[A], T]]] = []
+        self.server_programs: set[str] = set()
+        self.program_groups: dict[str, str] = {}
+        self.variant_builds: list[BuildJob] = []
+        self.stop_reasons: dict[str, str] = {}
+        self.pure_data: set[str] = set()
+        self.prep_times: dict[str, SampleStore] = defaultdict(SampleStore)
+        self.generator_times = SampleStore()
+        self.program_flags: dict[str, tuple[str, ...]] = {}
+        self.run_writer: Optional[RunWriter] = None
+        self.memory: dict[str, dict[str, SampleStore]] = defaultdict(
+            lambda: defaultdict(SampleStore)
+        )
         self.generate_data: Callable[[], A] = gen_data
-        self.results: dict[str, list[float]] = defaultdict(list)
+        self.results: dict[str, SampleStore] = defaultdict(SampleStore)
+        self.histograms: dict[str, LogHistogram] = {}
+        self.child_usage: dict[str, dict[str, SampleStore]] = defaultdict(
+            lambda: defaultdict(SampleStore)
+        )
         self.stats_collection = StatsCollection()
         self.dir = dir
+        self.output_limit = output_limit
+        self.outputs: dict[str, bytes] = {}
+        self.validate = validate
+        self.server_timeout = server_timeout
+        self.output_digests: dict[str, tuple[str, list[str]]] = {}
+        self.mismatches: dict[str, int] = defaultdict(int)
+        self.mismatch_examples: dict[str, list[str]] = {}
+        self.perf_recorder: Optional[PerfRecorder] = None
         
     def prompt_description(self):
         return
 
     # def store 
 
+    def record_to(self, store: ResultStore, metadata: Optional[dict[str, Any]] = None) -> str:
+        """Streams every sample into the result store as it is measured, until the
+        end of the next compare_performance. Returns the id of the recorded run."""
+        self.run_writer = store.open_run({"tester": "c", **(metadata or {})}, self._label_metadata)
+        self.results = RecordingResults(self.run_writer.append, self.results)
+        return self.run_writer.run_id
+
+    def _stop_recording(self) -> None:
+        """Closes the run writer of record_to (its file and lock); samples measured
+        afterwards are no longer recorded."""
+        if self.run_writer is None:
+            return
+        self.run_writer.close()
+        self.run_writer = None
+        for store in self.results.values():
+            store.sink = None
+        self.results = defaultdict(SampleStore, self.results)
+
+    def _label_metadata(self, label: str) -> dict[str, Any]:
+        return {
+            "group": self.program_groups.get(label),
+            "flags": list(self.program_flags.get(label, DEFAULT_FLAGS)),
+        }
+
     def add_program(
-        self, name: str, program_path: str, data_func: Callable[[A], T]
+        self,
+        name: str,
+        program_path: str,
+        data_func: Callable[[A], T],
+        server: bool = False,
+        pure_data: bool = False,
     ) -> None:
         """Add a compiled C program to test with its name, the executable path,
         and a data preparation function.
 
         The data preparation function converts the general data into a form (e.g. a list of command-line arguments)
         that the C program can use.
+        With server=True the program is started once in server mode (see include/perf_server.h)
+        and the timings it reports itself are recorded instead of the process run time.
+        pure_data=True declares the data function pure, so prefetched runs may
+        memoize its result per input.
         """
         if not name:
             name = program_path
         self.programs.append((name, program_path, data_func))
+        if server:
+            self.server_programs.add(name)
+        if pure_data:
+            self.pure_data.add(name)
+
+    def add_program_variants(
+        self,
+        name: str,
+        source: str,
+        data_func: Callable[[A], T],
+        variants: dict[str, tuple[str, ...]],
+        server: bool = False,
+    ) -> None:
+        """Add one C source compiled once per variant, e.g. cli.OPTIMIZATION_VARIANTS.
+        Every variant is registered as its own program labelled "name [variant]",
+        and all variants are reported in one group."""
+        source_path = os.path.join(self.dir, source)
+        for variant, flags in variants.items():
+            label = f"{name} [{variant}]"
+            output = variant_output(source_path, variant)
+            self.variant_builds.append(BuildJob(source_path, output, tuple(flags)))
+            self.add_program(label, output, data_func, server)
+            self.program_groups[label] = name
+            self.program_flags[label] = tuple(flags)
+
+    def build(self) -> None:
+        """Compiles the C sources in the tester directory and all registered variants.
+        Unchanged sources are skipped, see cli.run_builds."""
+        run_builds(plan_builds(self.dir) + self.variant_builds)
 
     def run_tests(self) -> None:
-        prog_bar = ProgressBar(self.num_tests)
-        compile_c_files_in_current_directory()
-        for i in range(self.num_tests):
-            prog_bar.update(i)
-            data = self.generate_data()
-            for name, program_path, data_func in self.programs:
-                args = data_func(data)
-                command = [program_path] + list(args)
-                start_time = time.perf_counter()
-                completed = subprocess.run(
-                    command,
-                    capture_output=True,
-                    shell=True,
-                    cwd=self.dir,
-                    text=True,
+        self.build()
+        with self._dashboard(self.num_tests) as prog_bar, ExitStack() as stack:
+            servers = self._start_servers(stack)
+            for i in range(self.num_tests):
+                prog_bar.update(i)
+                data = self.generate_data()
+                for name, program_path, data_func in self.programs:
+                    args = data_func(data)
+                    self.results[name].append(self._time_invocation(name, program_path, args, servers))
+                self._validate_iteration()
+
+    def _add_cached(self, name: str, samples: SampleStore) -> None:
+        """Adds cached samples as a plain store, so they are not streamed into the
+        run recorded with record_to as if they had just been measured."""
+        store = SampleStore(self.results.get(name, ()))
+        store.extend(samples)
+        self.results[name] = store
+
+    def run_tests_cached(self, cache: ResultCache) -> list[str]:
+        """Like run_tests, but programs whose fingerprint (binary hash, see result_cache)
+        is in the cache reuse the stored samples and only the others are run. With a
+        cache seed the random module is seeded before the inputs are generated.
+        Output validation only compares the programs that actually ran.
+        Returns the names served from the cache."""
+        self.build()
+        compiler = compiler_version()
+        cached: list[str] = []
+        misses = []
+        keys: dict[str, str] = {}
+        for entry in self.programs:
+            name, program_path, data_func = entry
+            try:
+                keys[name] = program_fingerprint(
+                    resolve_program(program_path, self.dir),
+                    data_func,
+                    self.generate_data,
+                    self.num_tests,
+                    cache.seed,
+                    compiler,
+                    name in self.server_programs,
                 )
-                print(completed.stdout.format())
-                if completed.stderr:
-                    raise Exception(completed.stderr) 
-                end_time = time.perf_counter()
-                self.results[name].append(end_time - start_time)
+            except OSError:  # not a file (e.g. found on PATH), always measured
+                misses.append(entry)
+                continue
+            samples = cache.get(keys[name])
+            if samples is None:
+                misses.append(entry)
+            else:
+                self._add_cached(name, samples)
+                cached.append(name)
+        if misses:
+            if cache.seed is not None:
+                random.seed(cache.seed)
+            programs, self.programs = self.programs, misses
+            try:
+                self.run_tests()
+            finally:
+                self.programs = programs
+            for name, _, _ in misses:
+                if name in keys:
+                    cache.put(keys[name], name, self.results[name])
+        cache.save()
+        return cached
+
+    def run_memory_pass(self, num_tests: int) -> bool:
+        """Separate pass that records the peak RSS of every invocation through the
+        launcher of memory.build_rss_launcher, so the tester's own RSS is not included.
+        Programs are executed directly (server mode programs with argv input), so the
+        timing pass is not affected. Returns False if the launcher is not available."""
+        self.build()
+        launcher = build_rss_launcher(self.dir)
+        if launcher is None:
+            return False
+        with self._dashboard(num_tests, live=False) as prog_bar:
+            for i in range(num_tests):
+                prog_bar.update(i)
+                data = self.generate_data()
+                for name, program_path, data_func in self.programs:
+                    command = [resolve_program(program_path, self.dir)] + list(data_func(data))
+                    self.memory[name]["peak_rss"].append(measure_peak_rss(launcher, command, self.dir))
+        return True
+
+    def run_tests_prefetched(self, mode: str = "thread") -> None:
+        """Like run_tests, but arguments are generated and transformed ahead of time by an
+        InputPrefetcher, so the loop only pulls ready inputs. Generator and data
+        function times are recorded separately from the measured times."""
+        self.build()
+        entries = [(name, data_func) for name, _, data_func in self.programs]
+        prefetcher = InputPrefetcher(
+            self.generate_data, entries, self.num_tests, self.pure_data, mode
+        )
+        with self._dashboard(self.num_tests) as prog_bar, ExitStack() as stack:
+            servers = self._start_servers(stack)
+            for i, prepared in enumerate(prefetcher):
+                prog_bar.update(i)
+                self.generator_times.append(prepared.gen_time)
+                for (name, program_path, _), args, prep_time in zip(
+                    self.programs, prepared.special_data, prepared.prep_times
+                ):
+                    self.prep_times[name].append(prep_time)
+                    self.results[name].append(self._time_invocation(name, program_path, args, servers))
+                self._validate_iteration()
+
+    def run_tests_scheduled(self, schedule: Schedule, monitor: Optional[NoiseMonitor] = None) -> None:
+        """Like run_tests, but the programs run in a randomized order per iteration
+        (see Schedule) and iterations under detected interference are flagged or dropped."""
+        self.build()
+        with self._dashboard(self.num_tests) as prog_bar, ExitStack() as stack:
+            servers = self._start_servers(stack)
+
+            def measure(entry: tuple[str, str, Callable], data: A) -> float:
+                name, program_path, data_func = entry
+                return self._time_invocation(name, program_path, data_func(data), servers)
+
+            for i, timings in enumerate(
+                schedule.run(self.programs, self.generate_data, measure, self.num_tests, monitor)
+            ):
+                prog_bar.update(i)
+                for name, times in timings.items():
+                    self.results[name].extend(times)
+                self._validate_iteration()
+
+    def run_tests_adaptive(self, config: AdaptiveConfig) -> None:
+        """Runs every program until its estimate converges (see AdaptiveConfig).
+        Converged programs are dropped from the loop; the stop reason is recorded."""
+        self.build()
+        active = list(self.programs)
+        start_time = time.perf_counter()
+        with self._dashboard(len(active)) as prog_bar, ExitStack() as stack:
+            servers = self._start_servers(stack)
+            while active:
+                data = self.generate_data()
+                for entry in list(active):
+                    name, program_path, data_func = entry
+                    args = data_func(data)
+                    self.results[name].append(self._time_invocation(name, program_path, args, servers))
+                    reason = config.stop_reason(self.results[name], time.perf_counter() - start_time)
+                    if reason is not None:
+                        self.stop_reasons[name] = reason
+                        active.remove(entry)
+                        prog_bar.step()
+                self._validate_iteration()
+
+    def _dashboard(self, total: int, live: bool = True) -> Dashboard:
+        """Live progress display; with live=True it also shows running stats per program."""
+        labels = [name for name, _, _ in self.programs]
+        return Dashboard(total, self.results if live else None, labels)
+
+    def _start_servers(self, stack: ExitStack) -> dict[str, ProgramServer]:
+        return {
+            name: stack.enter_context(ProgramServer(program_path, self.dir, self.server_timeout))
+            for name, program_path, _ in self.programs
+            if name in self.server_programs
+        }
+
+    def _time_invocation(
+        self, name: str, program_path: str, args: Iterable[str], servers: dict[str, ProgramServer]
+    ) -> float:
+        args = list(args)
+        digest = OutputDigest() if self.validate else None
+        if name in servers:
+            elapsed, result = servers[name].request(args)
+            output = result.encode()
+            if digest is not None:
+                digest.update(output)
+        else:
+            command = [resolve_program(program_path, self.dir)] + args
+            child = run_child(command, self.dir, self.output_limit, digest)
+            check_child(command, child)
+            elapsed, output = child.wall, child.stdout
+            if self.perf_recorder is not None:
+                self.perf_recorder.offer(name, elapsed, command)
+        if self.output_limit:
+            self.outputs[name] = output[: self.output_limit]
+        if digest is not None:
+            self.output_digests[name] = (digest.hexdigest(), args)
+        return elapsed
+
+    def _validate_iteration(self) -> None:
+        """Compares the output hashes of all programs that ran on the current input.
+        Programs that disagree with the most common answer count as mismatches."""
+        if len(self.output_digests) > 1:
+            answers = Counter(digest for digest, _ in self.output_digests.values())
+            expected, _ = answers.most_common(1)[0]
+            for name, (digest, args) in self.output_digests.items():
+                if digest != expected:
+                    self.mismatches[name] += 1
+                    self.mismatch_examples.setdefault(name, args)
+        self.output_digests.clear()
+
+    @staticmethod
+    def time_program(program_path: str, args: Iterable[str], cwd) -> float:
+        """Runs the program once with the given arguments and returns the elapsed time.
+        The program is executed directly (no shell) with stdout sent to /dev/null."""
+        command = [resolve_program(program_path, cwd)] + list(args)
+        child = run_child(command, cwd, stdout_limit=0)
+        check_child(command, child)
+        return child.wall
+
+    def run_tests_parallel(
+        self, workers: Optional[int] = None, histogram: Optional[LogHistogram] = None
+    ) -> int:
+        """Generates all data up front and runs the programs block-wise on a pool of
+        worker processes pinned to separate cores.
+        With a histogram (its range and precision are used) every worker returns one
+        histogram per block, which are merged into `histograms` instead of `results`.
+        Returns the number of workers used."""
+        self.build()
+        data = [self.generate_data() for _ in range(self.num_tests)]
+        entries = [
+            (name, program_path, data_func, name in self.server_programs)
+            for name, program_path, data_func in self.programs
+        ]
+        run_block = functools.partial(self._run_block, cwd=self.dir, timeout=self.server_timeout)
+        timings, used_workers = run_parallel(
+            entries, run_block, data, workers, None if histogram is None else histogram.config()
+        )
+        for (name, _, _), res in zip(self.programs, timings):
+            if histogram is None:
+                self.results[name].extend(res)
+            elif name in self.histograms:
+                self.histograms[name].merge(res)
+            else:
+                self.histograms[name] = res
+        return used_workers
+
+    @staticmethod
+    def _run_block(
+        entry: tuple[str, str, Callable, bool], data_block: list[A], cwd, timeout: Optional[float]
+    ) -> list[float]:
+        _, program_path, data_func, server = entry
+        return CPerformanceTester.run_test_mp(program_path, data_func, data_block, cwd, server, timeout)
 
     @staticmethod
     def run_test_mp(
-        func: Callable[[T], Any], data_func: Callable[[A], T], data_block: list[A]
+        program_path: str,
+        data_func: Callable[[A], T],
+        data_block: list[A],
+        cwd,
+        server: bool = False,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
     ) -> list[float]:
-        return []
+        """Times the program on every element of data_block. Executed inside a worker process."""
+        if server:
+            timings: list[float] = []
+            with ProgramServer(program_path, cwd, timeout) as program_server:
+                for data in data_block:
+                    elapsed, _ = program_server.request(list(data_func(data)))
+                    timings.append(elapsed)
+            return timings
+        return [
+            CPerformanceTester.time_program(program_path, data_func(data), cwd)
+            for data in data_block
+        ]
+
+    def run_tests_async(self, concurrency: Optional[int] = None) -> int:
+        """Runs the program invocations on an asyncio event loop with at most `concurrency`
+        children alive at once (see process_utils.run_child_async). Children are started
+        without a shell; their output and exit are watched by the loop, and where pidfds
+        are supported (Linux) they are reaped with os.wait4, so user/sys CPU time is
+        recorded per child (peak RSS: see run_memory_pass). Returns the concurrency used."""
+        if self.server_programs:
+            raise ValueError("Server mode programs are not supported by the asyncio engine")
+        self.build()
+        concurrency = max(1, concurrency or len(available_cores()))
+        asyncio.run(self._run_all_async(concurrency))
+        return concurrency
+
+    async def _run_all_async(self, concurrency: int) -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        with self._dashboard(self.num_tests * len(self.programs)) as prog_bar:
 
-    def compare_performance(self) -> None:
-        """Runs the tests and prints the performance statistics using the StatsCollection."""
-        self.run_tests()
+            async def invoke(command: list[str], digest: Optional[OutputDigest]):
+                async with semaphore:
+                    child = await run_child_async(command, self.dir, self.output_limit, digest)
+                prog_bar.step()
+                return child
 
-        for name, res in self.results.items():
-            self.stats_collection.add_stats(name, res)
+            invocations: list[tuple[int, str, list[str], list[str], Optional[OutputDigest], Any]] = []
+            for i in range(self.num_tests):
+                data = self.generate_data()
+                for name, program_path, data_func in self.programs:
+                    args = list(data_func(data))
+                    command = [resolve_program(program_path, self.dir)] + args
+                    digest = OutputDigest() if self.validate else None
+                    invocations.append((i, name, command, args, digest, invoke(command, digest)))
+            children = await asyncio.gather(*(invocation[-1] for invocation in invocations))
+
+        iteration = 0
+        for (i, name, command, args, digest, _), child in zip(invocations, children):
+            check_child(command, child)
+            if i != iteration:
+                self._validate_iteration()
+                iteration = i
+            if self.output_limit:
+                self.outputs[name] = child.stdout
+            if digest is not None:
+                self.output_digests[name] = (digest.hexdigest(), args)
+            self.results[name].append(child.wall)
+            if HAS_ASYNC_RUSAGE:
+                usage = self.child_usage[name]
+                usage["user"].append(child.user)
+                usage["sys"].append(child.sys)
+        self._validate_iteration()
+
+    def sweep(
+        self,
+        sizes: Sequence[Any],
+        gen_sized: Callable[[Any], A],
+        size_of: Optional[Callable[[Any], float]] = None,
+        csv_path: Optional[str] = None,
+        parallel: bool = False,
+        workers: Optional[int] = None,
+        use_async: bool = False,
+        concurrency: Optional[int] = None,
+        adaptive: Optional[AdaptiveConfig] = None,
+        prefetch: Optional[str] = None,
+        schedule: Optional[Schedule] = None,
+        noise: Optional[NoiseMonitor] = None,
+    ) -> SweepResult:
+        """Runs num_tests iterations per input size with gen_sized(size) as generator,
+        fits every label to the candidate complexity models and prints one table per
+        label, the best fits and the predicted crossover points (see complexity.run_sweep).
+        Every size is measured in the run mode selected by parallel, use_async, adaptive,
+        prefetch or schedule/noise, as in compare_performance (combining them raises
+        ValueError); labels measured at fewer than three sizes are not fitted."""
+        mode = select_mode({
+            "parallel": parallel,
+            "use_async": use_async,
+            "adaptive": adaptive is not None,
+            "prefetch": prefetch is not None,
+            "schedule/noise": schedule is not None or noise is not None,
+        })
+        runs: dict[str, Callable[[], Any]] = {
+            SERIAL: self.run_tests,
+            "parallel": lambda: self.run_tests_parallel(workers),
+            "use_async": lambda: self.run_tests_async(concurrency),
+            "adaptive": lambda: self.run_tests_adaptive(adaptive),  # type: ignore
+            "prefetch": lambda: self.run_tests_prefetched(prefetch),  # type: ignore
+            "schedule/noise": lambda: self.run_tests_scheduled(schedule or Schedule(), noise),
+        }
+        return run_sweep(self, sizes, gen_sized, size_of, csv_path, run=runs[mode])
+
+    def compare_performance(
+        self,
+        parallel: bool = False,
+        workers: Optional[int] = None,
+        use_async: bool = False,
+        concurrency: Optional[int] = None,
+        adaptive: Optional[AdaptiveConfig] = None,
+        prefetch: Optional[str] = None,
+        memory: int = 0,
+        schedule: Optional[Schedule] = None,
+        noise: Optional[NoiseMonitor] = None,
+        perf_record: Optional[PerfRecorder] = None,
+        overheads: Optional[Overheads] = None,
+        cache: Optional[ResultCache] = None,
+        histogram: Optional[LogHistogram] = None,
+    ) -> None:
+        """Runs the tests and prints the performance statistics using the StatsCollection.
+        With parallel=True the programs are distributed over a process pool. With a
+        LogHistogram as well, the workers send back fixed-size histograms (with its range
+        and precision) that are merged, instead of all samples; the table is answered
+        from the histograms and the samples are not kept or recorded.
+        With use_async=True they run on the asyncio engine, which adds per-child
+        user/sys CPU time columns to the table (where pidfds are supported).
+        With an AdaptiveConfig every program runs until it converges
+        instead of num_tests times.
+        With prefetch="thread" or "process" arguments are prepared in the background.
+        With memory > 0 a separate pass of that many iterations records the peak RSS
+        of every invocation.
+        With a Schedule and/or a NoiseMonitor the programs run in a randomized,
+        seeded order and noisy iterations are flagged or dropped.
+        With a PerfRecorder (and perf installed) the slowest serial invocations of the
+        timing pass are replayed under `perf record` in a separate pass and their stacks
+        are written as collapsed stacks.
+        With Overheads (see selfbench) the spawn cost of an empty program is subtracted
+        from every sample of the non server mode programs in the table, in serial modes
+        only (spawns cost more under the concurrency of parallel and asyncio runs).
+        With a ResultCache (plain serial runs) unchanged programs reuse their cached
+        samples and only rebuilt or changed ones are run; cached rows are marked.
+        parallel, use_async, adaptive, prefetch, schedule/noise and cache each select a
+        run mode; combining them raises ValueError, as does a PerfRecorder with parallel
+        or asyncio runs."""
+        mode = select_mode({
+            "parallel": parallel,
+            "use_async": use_async,
+            "adaptive": adaptive is not None,
+            "prefetch": prefetch is not None,
+            "schedule/noise": schedule is not None or noise is not None,
+            "cache": cache is not None,
+        })
+        if histogram is not None:
+            require_mode("histogram", mode, ("parallel",))
+        if perf_record is not None:
+            require_mode("perf_record", mode, SERIAL_MODES)
+        if perf_record is not None and perf_record.available:
+            perf_record.expect(self.num_tests)
+            self.perf_recorder = perf_record
+        try:
+            if mode == "parallel":
+                used_workers = self.run_tests_parallel(workers, histogram)
+                self.stats_collection.add_note(
+                    f"Parallel run: {used_workers} worker process(es)"
+                    + (", merged histograms" if histogram is not None else "")
+                )
+            elif mode == "use_async":
+                used_concurrency = self.run_tests_async(concurrency)
+                if HAS_ASYNC_RUSAGE:
+                    self.stats_collection.register_metrics(rusage_metrics())
+                self.stats_collection.add_note(f"Asyncio engine: concurrency {used_concurrency}")
+            elif mode == "adaptive":
+                self.run_tests_adaptive(adaptive)  # type: ignore
+            elif mode == "prefetch":
+                self.run_tests_prefetched(prefetch)  # type: ignore
+                self.stats_collection.add_note(input_generation_note(self.generator_times, self.results))
+            elif mode == "schedule/noise":
+                schedule = schedule or Schedule()
+                self.run_tests_scheduled(schedule, noise)
+                self.stats_collection.add_note(schedule.note())
+            elif mode == "cache":
+                cached = self.run_tests_cached(cache)  # type: ignore
+                for name, _, _ in self.programs:
+                    self.stats_collection.set_info(name, "cache", "cached" if name in cached else "measured")
+                self.stats_collection.add_note(cache.note())
+            else:
+                self.run_tests()
+        finally:
+            self.perf_recorder = None
+            # All samples are measured; also releases the run writer if a program failed.
+            self._stop_recording()
+
+        if perf_record is not None:
+            if perf_record.available:
+                paths = perf_record.write(self.results, self.dir)
+                self.stats_collection.add_note(
+                    f"perf stacks of iterations above p{perf_record.percentile:g}, replayed "
+                    f"after the timing pass, written to {perf_record.outdir} ({len(paths)} file(s))"
+                )
+            else:
+                self.stats_collection.add_note("perf not found, profiling skipped")
+
+        if memory > 0 and not self.run_memory_pass(memory):
+            self.stats_collection.add_note(
+                "Peak RSS launcher not available (needs fork, wait4 and gcc), memory pass skipped"
+            )
+
+        series: dict[str, dict[str, SampleStore]] = defaultdict(dict)
+        for name, usage in self.child_usage.items():
+            series[name].update(usage)
+        if self.memory:
+            self.stats_collection.register_metrics(c_memory_metrics())
+            for name, usage in self.memory.items():
+                series[name].update(usage)
+        if self.prep_times:
+            self.stats_collection.register_metric(
+                Metric("prep", default_mean, "s", series="prep", moment=running_mean)
+            )
+            for name, times in self.prep_times.items():
+                series[name]["prep"] = times
+        results: dict[str, Any] = self.results
+        if overheads is not None and mode in SERIAL_MODES:
+            spawned = {name: times for name, times in self.results.items() if name not in self.server_programs}
+            subtracted, clamped = overheads.subtract(spawned, overheads.spawn)
+            results = {**self.results, **subtracted}
+            for name, count in clamped.items():
+                self.stats_collection.set_info(name, "clamped", str(count))
+            self.stats_collection.add_note(overheads.note(overheads.spawn, sum(clamped.values())))
+        elif overheads is not None:
+            self.stats_collection.add_note(f"Spawn overhead not subtracted in {mode} runs")
+        if self.histograms:
+            results = {**results, **self.histograms}
+        self.stats_collection.add_all_stats(
+            results, groups=self.program_groups, series=series
+        )
+        for name, reason in self.stop_reasons.items():
+            self.stats_collection.set_info(name, "n", str(len(self.results[name])))
+            self.stats_collection.set_info(name, "stop", reason)
+        if noise is not None:
+            for name, count in noise.noisy_samples.items():
+                self.stats_collection.set_info(name, "noisy", str(count))
+            self.stats_collection.add_note(noise.note())
+        if self.validate:
+            self._add_validation_info()
 
         self.stats_collection.print_all_stats()
+
+    def _add_validation_info(self) -> None:
+        for name, _, _ in self.programs:
+            count = self.mismatches.get(name, 0)
+            self.stats_collection.set_info(name, "output", f"DIFFERS ({count})" if count else "ok")
+        for name, args in self.mismatch_examples.items():
+            self.stats_collection.add_note(
+                f"Output of {name} differs from the other programs, e.g. for arguments {args}"
+            )
@@ -0,0 +1,90 @@
+/*
+ * perf_server.h - persistent "server mode" protocol for perf_tester.
+ *
+ * A benchmark program that is started with the flag --perf-server stays alive,
+ * reads one input per line from stdin and answers every input with exactly one line:
+ *
+ *     <elapsed nanoseconds>\t<result>\n
+ *
+ * The elapsed time covers only the handler call and is measured with CLOCK_MONOTONIC.
+ * Before the first input the program announces itself with "PERF_SERVER 1\n".
+ *
+ * Usage:
+ *     static void run(const char *input, perf_result *out) {
+ *         perf_result_printf(out, "%llu ", ...);
+ *     }
+ *     int main(int argc, char *argv[]) {
+ *         if (perf_server_requested(argc, argv)) return perf_server_run(run);
+ *         ...
+ *     }
+ */
+#ifndef PERF_SERVER_H
+#define PERF_SERVER_H
+
+#include <stdarg.h>
+#include <stdio.h>
+#include <string.h>
+#include <time.h>
+
+#ifndef PERF_SERVER_MAX_INPUT
+#define PERF_SERVER_MAX_INPUT 4096
+#endif
+#ifndef PERF_SERVER_MAX_RESULT
+#define PERF_SERVER_MAX_RESULT 4096
+#endif
+
+typedef struct {
+    char data[PERF_SERVER_MAX_RESULT];
+    size_t len;
+} perf_result;
+
+typedef void (*perf_handler)(const char *input, perf_result *out);
+
+/* Appends formatted text to the result. Output beyond the buffer is truncated,
+ * a NULL result discards the output. */
+static void perf_result_printf(perf_result *out, const char *fmt, ...) {
+    if (out == NULL || out->len >= sizeof(out->data) - 1) return;
+    va_list args;
+    va_start(args, fmt);
+    int written = vsnprintf(out->data + out->len, sizeof(out->data) - out->len, fmt, args);
+    va_end(args);
+    if (written < 0) return;
+    out->len += (size_t)written;
+    if (out->len >= sizeof(out->data)) out->len = sizeof(out->data) - 1;
+}
+
+static int perf_server_requested(int argc, char *argv[]) {
+    return argc == 2 && strcmp(argv[1], "--perf-server") == 0;
+}
+
+static long long perf_server_elapsed_ns(const struct timespec *begin, const struct timespec *end) {
+    return (long long)(end->tv_sec - begin->tv_sec) * 1000000000LL + (end->tv_nsec - begin->tv_nsec);
+}
+
+static int perf_server_run(perf_handler handler) {
+    char line[PERF_SERVER_MAX_INPUT];
+    perf_result out;
+    struct timespec begin, end;
+
+    printf("PERF_SERVER 1\n");
+    fflush(stdout);
+    while (fgets(line, sizeof(line), stdin) != NULL) {
+        line[strcspn(line, "\r\n")] = '\0';
+        out.len = 0;
+        out.data[0] = '\0';
+
+        clock_gettime(CLOCK_MONOTONIC, &begin);
+        handler(line, &out);
+        clock_gettime(CLOCK_MONOTONIC, &end);
+
+        /* Keep the answer on one line. */
+        for (size_t i = 0; i < out.len; i++) {
+            if (out.data[i] == '\n' || out.data[i] == '\r') out.data[i] = ' ';
+        }
+        printf("%lld\t%s\n", perf_server_elapsed_ns(&begin, &end), out.data);
+        fflush(stdout);
+    }
+    return 0;
+}
+
+#endif /* PERF_SERVER_H */
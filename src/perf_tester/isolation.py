@@ -0,0 +1,183 @@
+import gc
+import multiprocessing as mp
+import pickle
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable
+
+from perf_tester.samples import RunningStats, SampleStore
+from perf_tester.statistics import Metric
+
+GC_MODES = ("track", "disable", "collect")
+
+
+@dataclass
+class IsolationConfig:
+    """
+    Isolation of the Python timing loop.
+    gc="disable": the collector is off during the timed calls and a full collection
+    runs (untimed) after every call, so no call pays for another call's garbage.
+    gc="collect": the collector stays on, but a full collection still runs after every call.
+    gc="track": the collector is left alone, collections are only counted.
+    In every mode the collections and pause time inside the timed calls are reported
+    per label. With fork=True every function runs in a fresh forked worker that reads
+    the pre-generated inputs from shared memory, so functions cannot warm caches or
+    fragment the heap for each other.
+    """
+
+    gc: str = "disable"
+    fork: bool = False
+
+    def __post_init__(self):
+        if self.gc not in GC_MODES:
+            raise ValueError(f"Unknown gc mode {self.gc!r}, expected one of {', '.join(GC_MODES)}")
+
+    def describe(self) -> str:
+        text = {
+            "track": "GC enabled",
+            "disable": "GC disabled in timed calls, collected between calls",
+            "collect": "GC enabled, collected between calls",
+        }[self.gc]
+        return f"Isolation: {text}" + (", one forked worker per function" if self.fork else "")
+
+
+def _running_total(running: RunningStats) -> float:
+    return running.mean * running.count if running.count else 0.0
+
+
+def gc_metrics(between: bool = True) -> list[Metric]:
+    """Total pause time inside the timed calls and, unless the collector was only
+    tracked, of the collections between calls. The collection counts are info columns."""
+    metrics = [Metric("gc pause", sum, "s", series="gc_pause", moment=_running_total)]
+    if between:
+        metrics.append(Metric("gc between", sum, "s", series="gc_between", moment=_running_total))
+    return metrics
+
+
+class GcMonitor:
+    """
+    Counts garbage collections and their pause time through gc.callbacks and
+    applies the collection mode of an IsolationConfig around each timed call.
+    Per label it records the collections and pause time inside every call
+    (gc_runs, gc_pause) and the duration of the collection after it (gc_between).
+    """
+
+    def __init__(self, mode: str = "disable"):
+        self.mode = mode
+        self.runs = 0
+        self.pause = 0.0
+        self.series: dict[str, dict[str, SampleStore]] = defaultdict(lambda: defaultdict(SampleStore))
+        self._start = 0.0
+        self._was_enabled = gc.isenabled()
+
+    def _callback(self, phase: str, info: dict[str, Any]) -> None:
+        if phase == "start":
+            self._start = time.perf_counter()
+        else:
+            self.runs += 1
+            self.pause += time.perf_counter() - self._start
+
+    def install(self) -> None:
+        self._was_enabled = gc.isenabled()
+        gc.collect()
+        gc.callbacks.append(self._callback)
+        if self.mode == "disable":
+            gc.disable()
+
+    def uninstall(self) -> None:
+        if self._callback in gc.callbacks:
+            gc.callbacks.remove(self._callback)
+        if self._was_enabled:
+            gc.enable()
+
+    def begin(self) -> tuple[int, float]:
+        return self.runs, self.pause
+
+    def end(self, label: str, begin: tuple[int, float]) -> None:
+        runs, pause = begin
+        stats = self.series[label]
+        stats["gc_runs"].append(self.runs - runs)
+        stats["gc_pause"].append(self.pause - pause)
+        if self.mode != "track":
+            start = time.perf_counter()
+            gc.collect()
+            stats["gc_between"].append(time.perf_counter() - start)
+
+
+def _forked_worker(
+    conn: Any,
+    shm: SharedMemory,
+    size: int,
+    entry: tuple[str, Callable, Callable],
+    mode: str,
+) -> None:
+    """Runs one function on all inputs inside a fresh worker. The shared memory
+    mapping is inherited through fork, so the inputs are never sent over a pipe."""
+    try:
+        name, data_func, func = entry
+        inputs = pickle.loads(shm.buf[:size])
+        monitor = GcMonitor(mode)
+        monitor.install()
+        timings: list[float] = []
+        try:
+            for data in inputs:
+                special_data = data_func(data)
+                begin = monitor.begin()
+                start_time = time.perf_counter()
+                func(special_data)
+                end_time = time.perf_counter()
+                monitor.end(name, begin)
+                timings.append(end_time - start_time)
+        finally:
+            monitor.uninstall()
+        series = {key: list(store) for key, store in monitor.series[name].items()}
+        conn.send(("ok", timings, series))
+    except BaseException as e:
+        conn.send(("error", f"{type(e).__name__}: {e}", None))
+    finally:
+        conn.close()
+
+
+def run_forked(
+    entries: list[tuple[str, Callable, Callable]],
+    data: list[Any],
+    mode: str = "disable",
+) -> tuple[dict[str, list[float]], dict[str, dict[str, list[float]]]]:
+    """Times every entry (name, data_func, func) on all inputs in its own forked worker,
+    one worker at a time. The inputs are pickled once into a shared memory block.
+    Returns the timings and the gc series per label."""
+    if "fork" not in mp.get_all_start_methods():
+        raise RuntimeError("Forked workers need the fork start method (Unix)")
+    ctx = mp.get_context("fork")
+    payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    size = len(payload)
+    shm = SharedMemory(create=True, size=max(1, size))
+    shm.buf[:size] = payload
+    del payload
+    timings: dict[str, list[float]] = {}
+    series: dict[str, dict[str, list[float]]] = {}
+    try:
+        for entry in entries:
+            receiver, sender = ctx.Pipe(duplex=False)
+            worker = ctx.Process(
+                target=_forked_worker, args=(sender, shm, size, entry, mode)
+            )
+            worker.start()
+            sender.close()
+            try:
+                status, result, gc_series = receiver.recv()
+            except EOFError:
+                worker.join()  # the exit code is only known after the join
+                status, result, gc_series = "error", f"worker exited with code {worker.exitcode}", None
+            worker.join()
+            receiver.close()
+            if status != "ok":
+                raise RuntimeError(f"Forked worker for {entry[0]} failed: {result}")
+            timings[entry[0]] = result
+            series[entry[0]] = gc_series
+    finally:
+        shm.close()
+        shm.unlink()
+    return timings, series
@@ -0,0 +1,184 @@
+import asyncio
+import inspect
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import cycle
+from typing import Any, Callable, Optional, Sequence
+
+from perf_tester.samples import SampleStore
+from perf_tester.statistics import Metric, percentile_metric
+
+# Inputs are prepared before the run and cycled, so data generation never delays a send.
+INPUT_POOL = 1024
+
+
+@dataclass
+class LoadConfig:
+    """
+    Load mode of the PerformanceTester. Exactly one of rate and concurrency is given.
+    Open loop (rate): requests are sent at a fixed arrival rate (per second) for
+    duration seconds; a request's latency is measured from its intended send time,
+    so time spent waiting behind a stalled call is counted (coordinated omission).
+    Closed loop (concurrency): that many callers issue requests back to back and
+    the latency is the service time of each call.
+    """
+
+    duration: float
+    rate: Optional[float] = None
+    concurrency: Optional[int] = None
+
+    def __post_init__(self):
+        if (self.rate is None) == (self.concurrency is None):
+            raise ValueError("LoadConfig needs exactly one of rate and concurrency")
+        if self.duration <= 0 or (self.rate is not None and self.rate <= 0):
+            raise ValueError("Duration and rate must be positive")
+        if self.concurrency is not None and self.concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+
+    @property
+    def open_loop(self) -> bool:
+        return self.rate is not None
+
+    def describe(self) -> str:
+        if self.open_loop:
+            return f"open loop at {self.rate:g} req/s for {self.duration:g} s"
+        return f"closed loop with concurrency {self.concurrency} for {self.duration:g} s"
+
+
+@dataclass
+class LoadResult:
+    """Latencies of one label under load. service holds the pure call durations."""
+
+    latencies: SampleStore = field(default_factory=SampleStore)
+    service: SampleStore = field(default_factory=SampleStore)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def latency_metrics() -> list[Metric]:
+    return [percentile_metric(f"p{q:g}", q) for q in (50, 99, 99.9)]
+
+
+def _open_loop(call: Callable[[Any], Any], inputs: Sequence[Any], config: LoadConfig) -> LoadResult:
+    result = LoadResult()
+    interval = 1 / config.rate  # type: ignore
+    start = time.perf_counter()
+    end = start + config.duration
+    for i, special_data in enumerate(cycle(inputs)):
+        intended = start + i * interval
+        if intended >= end:
+            break
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sent = time.perf_counter()
+        call(special_data)
+        done = time.perf_counter()
+        result.latencies.append(done - intended)
+        result.service.append(done - sent)
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _closed_loop(call: Callable[[Any], Any], inputs: Sequence[Any], config: LoadConfig) -> LoadResult:
+    result = LoadResult()
+    lock = threading.Lock()
+    start = time.perf_counter()
+    end = start + config.duration
+
+    def caller(offset: int) -> None:
+        timings: list[float] = []
+        i = offset
+        while time.perf_counter() < end:
+            special_data = inputs[i % len(inputs)]
+            sent = time.perf_counter()
+            call(special_data)
+            timings.append(time.perf_counter() - sent)
+            i += 1
+        with lock:
+            result.latencies.extend(timings)
+            result.service.extend(timings)
+
+    threads = [threading.Thread(target=caller, args=(n,)) for n in range(config.concurrency)]  # type: ignore
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+async def _open_loop_async(
+    call: Callable[[Any], Any], inputs: Sequence[Any], config: LoadConfig
+) -> LoadResult:
+    result = LoadResult()
+    loop = asyncio.get_running_loop()
+    interval = 1 / config.rate  # type: ignore
+    start = loop.time()
+    clock_offset = time.perf_counter() - start
+    end = start + config.duration
+
+    async def request(special_data: Any, intended: float) -> None:
+        sent = time.perf_counter()
+        await call(special_data)
+        done = time.perf_counter()
+        result.latencies.append(done - (intended + clock_offset))
+        result.service.append(done - sent)
+
+    tasks: list[asyncio.Task] = []
+    for i, special_data in enumerate(cycle(inputs)):
+        intended = start + i * interval
+        if intended >= end:
+            break
+        delay = intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(loop.create_task(request(special_data, intended)))
+    await asyncio.gather(*tasks)
+    result.elapsed = loop.time() - start
+    return result
+
+
+async def _closed_loop_async(
+    call: Callable[[Any], Any], inputs: Sequence[Any], config: LoadConfig
+) -> LoadResult:
+    result = LoadResult()
+    start = time.perf_counter()
+    end = start + config.duration
+
+    async def caller(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < end:
+            sent = time.perf_counter()
+            await call(inputs[i % len(inputs)])
+            elapsed = time.perf_counter() - sent
+            result.latencies.append(elapsed)
+            result.service.append(elapsed)
+            i += 1
+
+    await asyncio.gather(*(caller(n) for n in range(config.concurrency)))  # type: ignore
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def run_load(
+    call: Callable[[Any], Any],
+    inputs: Sequence[Any],
+    config: LoadConfig,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+) -> LoadResult:
+    """Drives call with the prepared inputs according to config. Coroutine functions
+    are driven on the given event loop, which is reused across calls."""
+    if not inputs:
+        raise ValueError("Load mode needs at least one input")
+    if inspect.iscoroutinefunction(call):
+        if loop is None:
+            raise ValueError("Coroutine functions need an event loop")
+        runner = _open_loop_async if config.open_loop else _closed_loop_async
+        return loop.run_until_complete(runner(call, inputs, config))
+    runner = _open_loop if config.open_loop else _closed_loop
+    return runner(call, inputs, config)
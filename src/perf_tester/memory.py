@@ -0,0 +1,126 @@
+import hashlib
+import os
+import tracemalloc
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+from perf_tester.cli import BuildJob, run_builds
+from perf_tester.statistics import Metric, default_mean, running_max, running_mean
+from perf_tester.utils.process_utils import check_child, run_child
+
+T = TypeVar("T")
+
+LAUNCHER_DIR = ".perf_launcher"
+
+# A child forked from the tester starts with the tester's RSS high-water mark, which
+# the kernel keeps in ru_maxrss across exec. The launcher is tiny, so the program it
+# forks reports (nearly) only its own peak. stdout of the program goes to /dev/null,
+# the launcher prints the peak in bytes and exits with the program's status.
+_RSS_LAUNCHER_C = r"""#include <fcntl.h>
+#include <stdio.h>
+#include <sys/resource.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+int main(int argc, char **argv) {
+    if (argc < 2) {
+        fprintf(stderr, "usage: %s program [args...]\n", argv[0]);
+        return 2;
+    }
+    pid_t pid = fork();
+    if (pid < 0) {
+        perror("fork");
+        return 2;
+    }
+    if (pid == 0) {
+        int devnull = open("/dev/null", O_WRONLY);
+        if (devnull >= 0)
+            dup2(devnull, STDOUT_FILENO);
+        execvp(argv[1], argv + 1);
+        perror(argv[1]);
+        _exit(127);
+    }
+    int status;
+    struct rusage usage;
+    if (wait4(pid, &status, 0, &usage) < 0) {
+        perror("wait4");
+        return 2;
+    }
+#ifdef __APPLE__
+    long long peak = usage.ru_maxrss;
+#else
+    long long peak = (long long)usage.ru_maxrss * 1024;
+#endif
+    printf("%lld\n", peak);
+    return WIFEXITED(status) ? WEXITSTATUS(status) : 128 + WTERMSIG(status);
+}
+"""
+
+
+def measure_allocations(func: Callable[[T], Any], special_data: T) -> tuple[int, int]:
+    """Peak and net Python heap allocation (bytes) of one call, using tracemalloc.
+    tracemalloc must already be tracing; the result is still referenced when
+    the net allocation is taken, so it counts as retained memory."""
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    res = func(special_data)
+    current, peak = tracemalloc.get_traced_memory()
+    del res
+    return peak - before, current - before
+
+
+def _file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def write_launcher_source(path: str) -> bool:
+    """Writes the launcher source to path unless the file already has the same content
+    hash, so a launcher left by an older version is replaced. Returns whether it wrote."""
+    data = _RSS_LAUNCHER_C.encode()
+    if _file_hash(path) == hashlib.sha256(data).hexdigest():
+        return False
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)  # concurrent testers never see a partial source
+    return True
+
+
+def build_rss_launcher(directory: str) -> Optional[str]:
+    """Builds the peak RSS launcher into directory/.perf_launcher (rebuilt only when
+    its source changed, see cli.run_builds). Returns its path, or None without
+    fork/wait4 or a compiler."""
+    if not hasattr(os, "wait4"):
+        return None
+    launcher_dir = os.path.join(directory, LAUNCHER_DIR)
+    os.makedirs(launcher_dir, exist_ok=True)
+    source = os.path.join(launcher_dir, "rss_launcher.c")
+    write_launcher_source(source)
+    job = BuildJob(source, os.path.join(launcher_dir, "rss_launcher"), ("-O2",))
+    try:
+        run_builds([job])
+    except OSError:  # no compiler
+        return None
+    return job.output if os.path.exists(job.output) else None
+
+
+def measure_peak_rss(launcher: str, command: Sequence[str], cwd=None) -> int:
+    """Peak resident set size (bytes) of one program run, as reported by the
+    launcher from build_rss_launcher for the child it forked."""
+    child = run_child([launcher, *command], cwd)
+    check_child(command, child)
+    return int(child.stdout.split()[-1])
+
+
+def python_memory_metrics() -> list[Metric]:
+    return [
+        Metric("mem peak", max, "B", series="mem_peak", moment=running_max),
+        Metric("mem net", default_mean, "B", series="mem_net", moment=running_mean),
+    ]
+
+
+def c_memory_metrics() -> list[Metric]:
+    return [Metric("peak rss", max, "B", series="peak_rss", moment=running_max)]
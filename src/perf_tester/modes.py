@@ -0,0 +1,27 @@
+from collections.abc import Iterable
+
+# The run modes of compare_performance replace the timing loop of a plain serial run,
+# so at most one of them can be selected per call.
+SERIAL = "serial"
+
+
+def select_mode(modes: dict[str, bool]) -> str:
+    """Name of the only enabled run mode, SERIAL if none is enabled.
+    Raises ValueError if several are enabled instead of silently ignoring all but one."""
+    enabled = [name for name, selected in modes.items() if selected]
+    if len(enabled) > 1:
+        raise ValueError(
+            f"compare_performance options {' and '.join(enabled)} select different run modes "
+            "and cannot be combined"
+        )
+    return enabled[0] if enabled else SERIAL
+
+
+def require_mode(option: str, mode: str, supported: Iterable[str]) -> None:
+    """Raises ValueError if an add-on option does not apply to the selected run mode."""
+    supported = tuple(supported)
+    if mode not in supported:
+        raise ValueError(
+            f"compare_performance option {option} is not supported in {mode} runs "
+            f"(only {', '.join(supported)})"
+        )
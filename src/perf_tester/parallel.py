@@ -0,0 +1,86 @@
+import multiprocessing as mp
+from typing import Any, Callable, Optional, TypeVar, Union
+
+from perf_tester.statistics import LogHistogram
+from perf_tester.utils.system_utils import available_cores, pin_to_core
+
+A = TypeVar("A")
+
+# Worker-side state, installed by the pool initializer.
+_entries: list[Any] = []
+_block_runner: Optional[Callable[[Any, list[Any]], list[float]]] = None
+_histogram: Optional[dict[str, Any]] = None
+
+
+def _init_worker(
+    entries: list[Any], block_runner: Callable, cores: Any, histogram: Optional[dict[str, Any]]
+) -> None:
+    global _entries, _block_runner, _histogram
+    _entries = entries
+    _block_runner = block_runner
+    _histogram = histogram
+    pin_to_core(cores.get())
+
+
+def _run_block(index: int, data_block: list[Any]) -> Union[list[float], dict[str, Any]]:
+    assert _block_runner is not None
+    timings = _block_runner(_entries[index], data_block)
+    if _histogram is None:
+        return timings
+    return LogHistogram.from_values(timings, **_histogram).to_dict()
+
+
+def split_blocks(data: list[A], num_blocks: int) -> list[list[A]]:
+    """Splits data into at most num_blocks contiguous blocks of near equal size."""
+    num_blocks = max(1, min(num_blocks, len(data)))
+    size, rest = divmod(len(data), num_blocks)
+    blocks: list[list[A]] = []
+    start = 0
+    for i in range(num_blocks):
+        end = start + size + (1 if i < rest else 0)
+        blocks.append(data[start:end])
+        start = end
+    return blocks
+
+
+def run_parallel(
+    entries: list[Any],
+    block_runner: Callable[[Any, list[A]], list[float]],
+    data: list[A],
+    workers: Optional[int] = None,
+    histogram: Optional[dict[str, Any]] = None,
+) -> tuple[list[Any], int]:
+    """Runs block_runner(entry, block) for every entry and data block on a process pool.
+
+    Every worker is pinned to its own core, so at most one worker per available core is
+    started. Where the platform supports fork, entries and block_runner are inherited by
+    the workers and do not need to be picklable.
+    Returns the timings per entry (in data order) and the number of workers used.
+    With a histogram config (LogHistogram.config()) every worker sends back one
+    fixed-size histogram per block instead of its samples, and the result per entry
+    is the merged LogHistogram.
+    """
+    cores = available_cores()
+    workers = max(1, min(workers or len(cores), len(cores)))
+    blocks = split_blocks(data, workers)
+
+    ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else None)
+    core_queue = ctx.Queue()
+    for core in cores[:workers]:
+        core_queue.put(core)
+
+    tasks = [(i, block) for i in range(len(entries)) for block in blocks]
+    with ctx.Pool(
+        workers, initializer=_init_worker, initargs=(entries, block_runner, core_queue, histogram)
+    ) as pool:
+        timings = pool.starmap(_run_block, tasks)
+
+    if histogram is not None:
+        merged = [LogHistogram(**histogram) for _ in entries]
+        for (index, _), state in zip(tasks, timings):
+            merged[index].merge(LogHistogram.from_dict(state))
+        return merged, workers
+    results: list[list[float]] = [[] for _ in entries]
+    for (index, _), block_timings in zip(tasks, timings):
+        results[index].extend(block_timings)
+    return results, workers
@@ -1,15 +1,40 @@
+import asyncio
+import ctypes
+import random
 import time
+import tracemalloc
 from collections import defaultdict
-from collections.abc import Iterable
-from typing import Any, Callable, Generic, TypeVar
+from typing import Any, Callable, Generic, Optional, Sequence, TypeVar
 
-from perf_tester.statistics import StatsCollection
-from perf_tester.utils.progress_bar import ProgressBar
+from perf_tester.adaptive import AdaptiveConfig
+from perf_tester.c_library import CFunction
+from perf_tester.calibration import autorange, empty_call_overhead, time_drain, time_loop, timer_overhead
+from perf_tester.complexity import SweepResult, run_sweep
+from perf_tester.isolation import GcMonitor, IsolationConfig, gc_metrics, run_forked
+from perf_tester.load import INPUT_POOL, LoadConfig, LoadResult, latency_metrics, run_load
+from perf_tester.memory import measure_allocations, python_memory_metrics
+from perf_tester.modes import SERIAL, require_mode, select_mode
+from perf_tester.parallel import run_parallel
+from perf_tester.prefetch import InputPrefetcher, input_generation_note
+from perf_tester.profiling import OutlierProfiler
+from perf_tester.result_cache import ResultCache, python_fingerprint
+from perf_tester.result_store import ResultStore, RunWriter
+from perf_tester.samples import RecordingResults, SampleStore
+from perf_tester.scheduling import NoiseMonitor, Schedule
+from perf_tester.selfbench import Overheads
+from perf_tester.statistics import LogHistogram, Metric, StatsCollection, default_mean, running_mean
+from perf_tester.utils.dashboard import Dashboard
 
 A = TypeVar('A')
 T = TypeVar('T')
 R = TypeVar('R')
 
+# Run modes whose calls are timed by _measure, so the profiler and the GcMonitor see them.
+MEASURED_MODES = (SERIAL, "prefetch", "adaptive", "cache")
+# Run modes timing single calls in this process like the self-benchmark does, so the
+# call overhead of selfbench.Overheads can be subtracted from their samples.
+PLAIN_TIMING_MODES = MEASURED_MODES + ("schedule/noise",)
+
 class PerformanceTester(Generic[A]):
     """Compares the performance of multiple functions.
     All registered functions must be linked to a special function that
@@ -21,41 +46,544 @@ class PerformanceTester(Generic[A]):
         self.num_tests = num_tests
         self.functions: list[tuple[str, Callable[[A], Any], Callable[[Any], Any]]] = []
         self.generate_data: Callable[[], A] = gen_data
-        self.results: dict[str, list[float]] = defaultdict(list)
+        self.results: dict[str, SampleStore] = defaultdict(SampleStore)
+        self.histograms: dict[str, LogHistogram] = {}
         self.stats_collection = StatsCollection()
+        self.stop_reasons: dict[str, str] = {}
+        self.drained: set[str] = set()
+        self.drain_times: dict[str, SampleStore] = defaultdict(SampleStore)
+        self.loops: dict[str, int] = {}
+        self.pure_data: set[str] = set()
+        self.prep_times: dict[str, SampleStore] = defaultdict(SampleStore)
+        self.generator_times = SampleStore()
+        self.run_writer: Optional[RunWriter] = None
+        self.memory: dict[str, dict[str, SampleStore]] = defaultdict(
+            lambda: defaultdict(SampleStore)
+        )
+        self.load_results: dict[str, LoadResult] = {}
+        self.profiler: Optional[OutlierProfiler] = None
+        self.gc_monitor: Optional[GcMonitor] = None
+        self.gc_stats: dict[str, dict[str, SampleStore]] = defaultdict(
+            lambda: defaultdict(SampleStore)
+        )
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def record_to(self, store: ResultStore, metadata: Optional[dict[str, Any]] = None) -> str:
+        """Streams every sample into the result store as it is measured, until the
+        end of the next compare_performance. Returns the id of the recorded run."""
+        self.run_writer = store.open_run({"tester": "python", **(metadata or {})})
+        self.results = RecordingResults(self.run_writer.append, self.results)
+        return self.run_writer.run_id
 
-    def add_function(self, name: str, func: Callable[[T], Any], data_func: Callable[[A], T]) -> None:
-        """Add one function to test with its name and data preparation function."""
+    def _stop_recording(self) -> None:
+        """Closes the run writer of record_to (its file and lock); samples measured
+        afterwards are no longer recorded."""
+        if self.run_writer is None:
+            return
+        self.run_writer.close()
+        self.run_writer = None
+        for store in self.results.values():
+            store.sink = None
+        self.results = defaultdict(SampleStore, self.results)
+
+    def add_function(
+        self,
+        name: str,
+        func: Callable[[T], Any],
+        data_func: Callable[[A], T],
+        drain: bool = False,
+        pure_data: bool = False,
+    ) -> None:
+        """Add one function to test with its name and data preparation function.
+        With drain=True an iterable result is exhausted after the timed call and the
+        time needed for that is reported in its own "drain" column (serial runs only).
+        pure_data=True declares the data function pure, so prefetched runs may
+        memoize its result per input."""
         if not name:
             name = func.__name__
         self.functions.append((name, data_func, func))
+        if drain:
+            self.drained.add(name)
+        if pure_data:
+            self.pure_data.add(name)
+
+    def add_c_function(
+        self,
+        name: str,
+        library_path: str,
+        symbol: str,
+        marshal: Callable[[A], Sequence[Any]],
+        restype: Any = ctypes.c_int,
+        argtypes: Optional[Sequence[Any]] = None,
+    ) -> None:
+        """Add an exported C function of a shared library (see c_library.compile_shared_library).
+        The marshal function converts the general data into the tuple of ctypes arguments
+        and runs outside the timed region, like any other data preparation function."""
+        self.add_function(name, CFunction(library_path, symbol, restype, argtypes), marshal)
 
     def run_tests(self) -> None:
-        prog_bar = ProgressBar(self.num_tests)
-        for i in range(self.num_tests):
-            prog_bar.update(i)
-            data = self.generate_data()
-            for name, data_func, func in self.functions:
-                special_data = data_func(data)
-                start_time = time.perf_counter()
-                res = func(special_data)
-                if isinstance(res, Iterable):
-                    for _ in res:  # type: ignore
-                        pass
-                end_time = time.perf_counter()
-                self.results[name].append(end_time - start_time)
+        with self._dashboard(self.num_tests) as prog_bar:
+            for i in range(self.num_tests):
+                prog_bar.update(i)
+                data = self.generate_data()
+                for name, data_func, func in self.functions:
+                    special_data = data_func(data)
+                    self._measure(name, func, special_data)
+
+    def _add_cached(self, name: str, samples: SampleStore) -> None:
+        """Adds cached samples as a plain store, so they are not streamed into the
+        run recorded with record_to as if they had just been measured."""
+        store = SampleStore(self.results.get(name, ()))
+        store.extend(samples)
+        self.results[name] = store
+
+    def run_tests_cached(self, cache: ResultCache) -> list[str]:
+        """Like run_tests, but functions whose fingerprint (see result_cache) is in the
+        cache reuse the stored samples and only the others are measured. With a cache
+        seed the random module is seeded before the inputs are generated.
+        Returns the names served from the cache."""
+        keys = {
+            name: python_fingerprint(func, data_func, self.generate_data, self.num_tests, cache.seed)
+            for name, data_func, func in self.functions
+        }
+        cached: list[str] = []
+        misses = []
+        for entry in self.functions:
+            samples = cache.get(keys[entry[0]])
+            if samples is None:
+                misses.append(entry)
+            else:
+                self._add_cached(entry[0], samples)
+                cached.append(entry[0])
+        if misses:
+            if cache.seed is not None:
+                random.seed(cache.seed)
+            functions, self.functions = self.functions, misses
+            try:
+                self.run_tests()
+            finally:
+                self.functions = functions
+            for name, _, _ in misses:
+                cache.put(keys[name], name, self.results[name])
+        cache.save()
+        return cached
+
+    def run_memory_pass(self, num_tests: int) -> None:
+        """Separate pass that records the tracemalloc peak and net allocation of every call.
+        It runs after the timing pass, so tracing never slows down the timed calls."""
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            with self._dashboard(num_tests, live=False) as prog_bar:
+                for i in range(num_tests):
+                    prog_bar.update(i)
+                    data = self.generate_data()
+                    for name, data_func, func in self.functions:
+                        special_data = data_func(data)
+                        peak, net = measure_allocations(func, special_data)
+                        self.memory[name]["mem_peak"].append(peak)
+                        self.memory[name]["mem_net"].append(net)
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    def run_tests_prefetched(self, mode: str = "thread") -> None:
+        """Like run_tests, but inputs are generated and transformed ahead of time by an
+        InputPrefetcher, so the loop only pulls ready inputs. Generator and data
+        function times are recorded separately from the measured times."""
+        entries = [(name, data_func) for name, data_func, _ in self.functions]
+        prefetcher = InputPrefetcher(
+            self.generate_data, entries, self.num_tests, self.pure_data, mode
+        )
+        with self._dashboard(self.num_tests) as prog_bar:
+            for i, prepared in enumerate(prefetcher):
+                prog_bar.update(i)
+                self.generator_times.append(prepared.gen_time)
+                for (name, _, func), special_data, prep_time in zip(
+                    self.functions, prepared.special_data, prepared.prep_times
+                ):
+                    self.prep_times[name].append(prep_time)
+                    self._measure(name, func, special_data)
+
+    def run_tests_scheduled(self, schedule: Schedule, monitor: Optional[NoiseMonitor] = None) -> None:
+        """Like run_tests, but the functions run in a randomized order per iteration
+        (see Schedule) and iterations under detected interference are flagged or dropped."""
+
+        def measure(entry: tuple[str, Callable, Callable], data: A) -> float:
+            _, data_func, func = entry
+            return self.time_call(func, data_func(data))
+
+        with self._dashboard(self.num_tests) as prog_bar:
+            for i, timings in enumerate(
+                schedule.run(self.functions, self.generate_data, measure, self.num_tests, monitor)
+            ):
+                prog_bar.update(i)
+                for name, times in timings.items():
+                    self.results[name].extend(times)
+
+    def run_tests_forked(self, config: IsolationConfig) -> None:
+        """Generates all data up front and times every function in its own fresh forked
+        worker, which reads the inputs from shared memory (see isolation.run_forked).
+        The gc mode of the config applies inside the workers. Iterable results are not drained."""
+        data = [self.generate_data() for _ in range(self.num_tests)]
+        timings, gc_series = run_forked(self.functions, data, config.gc)
+        for name, times in timings.items():
+            self.results[name].extend(times)
+            for key, values in gc_series[name].items():
+                self.gc_stats[name][key].extend(values)
+
+    def run_tests_load(self, config: LoadConfig) -> None:
+        """Drives every function for config.duration seconds at a fixed arrival rate or
+        concurrency (see LoadConfig). Coroutine functions run on one event loop that is
+        reused across functions and runs. The latencies become the function's results."""
+        pool_size = max(1, min(self.num_tests, INPUT_POOL))
+        for name, data_func, func in self.functions:
+            inputs = [data_func(self.generate_data()) for _ in range(pool_size)]
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+            result = run_load(func, inputs, config, self.loop)
+            self.load_results[name] = result
+            self.results[name].extend(result.latencies)
+
+    def run_tests_calibrated(self, min_sample_time: float = 1e-3) -> tuple[float, float]:
+        """timeit-style run for very fast functions. Every function is first calibrated to a
+        number of calls per sample lasting at least min_sample_time. Each sample is then the
+        per-call time of such a loop, minus the timer overhead and the cost of calling an
+        empty function in the same loop.
+        Returns the timer overhead and the largest empty-call overhead."""
+        overhead = timer_overhead()
+        data = self.generate_data()
+        call_overheads: dict[str, float] = {}
+        for name, data_func, func in self.functions:
+            special_data = data_func(data)
+            self.loops[name] = autorange(func, special_data, min_sample_time)
+            call_overheads[name] = empty_call_overhead(func, special_data, self.loops[name], overhead)
+
+        with self._dashboard(self.num_tests) as prog_bar:
+            for i in range(self.num_tests):
+                prog_bar.update(i)
+                data = self.generate_data()
+                for name, data_func, func in self.functions:
+                    special_data = data_func(data)
+                    number = self.loops[name]
+                    elapsed = time_loop(func, special_data, number)
+                    self.results[name].append((elapsed - overhead) / number - call_overheads[name])
+                    if name in self.drained:
+                        self.drain_times[name].append(time_drain(func(special_data)))
+        return overhead, max(call_overheads.values(), default=0.0)
+
+    def run_tests_adaptive(self, config: AdaptiveConfig) -> None:
+        """Samples every function until its estimate converges (see AdaptiveConfig).
+        Converged functions are dropped from the loop; the stop reason is recorded."""
+        active = list(self.functions)
+        start_time = time.perf_counter()
+        with self._dashboard(len(active)) as prog_bar:
+            while active:
+                data = self.generate_data()
+                for entry in list(active):
+                    name, data_func, func = entry
+                    special_data = data_func(data)
+                    self._measure(name, func, special_data)
+                    reason = config.stop_reason(self.results[name], time.perf_counter() - start_time)
+                    if reason is not None:
+                        self.stop_reasons[name] = reason
+                        active.remove(entry)
+                        prog_bar.step()
+
+    def _dashboard(self, total: int, live: bool = True) -> Dashboard:
+        """Live progress display; with live=True it also shows running stats per function."""
+        labels = [name for name, _, _ in self.functions]
+        return Dashboard(total, self.results if live else None, labels)
+
+    def _measure(self, name: str, func: Callable[[T], Any], special_data: T) -> None:
+        profiler, monitor = self.profiler, self.gc_monitor
+        if monitor is not None:
+            gc_begin = monitor.begin()
+        if profiler is not None:
+            profiler.arm()
+        start_time = time.perf_counter()
+        res = func(special_data)
+        end_time = time.perf_counter()
+        if profiler is not None:
+            profiler.disarm(name, end_time - start_time)
+        if monitor is not None:
+            monitor.end(name, gc_begin)
+        self.results[name].append(end_time - start_time)
+        if name in self.drained:
+            self.drain_times[name].append(time_drain(res))
+
+    @staticmethod
+    def time_call(func: Callable[[T], Any], special_data: T) -> float:
+        """Times a single call. Iterable results are not drained."""
+        start_time = time.perf_counter()
+        func(special_data)
+        end_time = time.perf_counter()
+        return end_time - start_time
+
+    def run_tests_parallel(
+        self, workers: Optional[int] = None, histogram: Optional[LogHistogram] = None
+    ) -> int:
+        """Generates all data up front, splits it into blocks and times the blocks
+        on a pool of worker processes pinned to separate cores.
+        With a histogram (its range and precision are used) every worker returns one
+        histogram per block, which are merged into `histograms` instead of `results`.
+        Returns the number of workers used."""
+        data = [self.generate_data() for _ in range(self.num_tests)]
+        timings, used_workers = run_parallel(
+            self.functions, self._run_block, data, workers,
+            None if histogram is None else histogram.config(),
+        )
+        for (name, _, _), res in zip(self.functions, timings):
+            if histogram is None:
+                self.results[name].extend(res)
+            elif name in self.histograms:
+                self.histograms[name].merge(res)
+            else:
+                self.histograms[name] = res
+        return used_workers
+
+    @staticmethod
+    def _run_block(entry: tuple[str, Callable, Callable], data_block: list[A]) -> list[float]:
+        _, data_func, func = entry
+        return PerformanceTester.run_test_mp(func, data_func, data_block)
 
     @staticmethod
     def run_test_mp(func: Callable[[T], R], data_func: Callable[[A], T], data_block: list[A]) -> list[float]:
-        return []
+        """Times func on every element of data_block. Executed inside a worker process."""
+        return [
+            PerformanceTester.time_call(func, data_func(data)) for data in data_block
+        ]
+
+    def sweep(
+        self,
+        sizes: Sequence[Any],
+        gen_sized: Callable[[Any], A],
+        size_of: Optional[Callable[[Any], float]] = None,
+        csv_path: Optional[str] = None,
+        parallel: bool = False,
+        workers: Optional[int] = None,
+        adaptive: Optional[AdaptiveConfig] = None,
+        prefetch: Optional[str] = None,
+        schedule: Optional[Schedule] = None,
+        noise: Optional[NoiseMonitor] = None,
+    ) -> SweepResult:
+        """Runs num_tests iterations per input size with gen_sized(size) as generator,
+        fits every label to the candidate complexity models and prints one table per
+        label, the best fits and the predicted crossover points (see complexity.run_sweep).
+        Every size is measured in the run mode selected by parallel, adaptive,
+        prefetch or schedule/noise, as in compare_performance (combining them raises
+        ValueError); labels measured at fewer than three sizes are not fitted."""
+        mode = select_mode({
+            "parallel": parallel,
+            "adaptive": adaptive is not None,
+            "prefetch": prefetch is not None,
+            "schedule/noise": schedule is not None or noise is not None,
+        })
+        runs: dict[str, Callable[[], Any]] = {
+            SERIAL: self.run_tests,
+            "parallel": lambda: self.run_tests_parallel(workers),
+            "adaptive": lambda: self.run_tests_adaptive(adaptive),  # type: ignore
+            "prefetch": lambda: self.run_tests_prefetched(prefetch),  # type: ignore
+            "schedule/noise": lambda: self.run_tests_scheduled(schedule or Schedule(), noise),
+        }
+        return run_sweep(self, sizes, gen_sized, size_of, csv_path, run=runs[mode])
+
+    def compare_performance(
+        self,
+        parallel: bool = False,
+        workers: Optional[int] = None,
+        adaptive: Optional[AdaptiveConfig] = None,
+        calibrate: bool = False,
+        min_sample_time: float = 1e-3,
+        prefetch: Optional[str] = None,
+        memory: int = 0,
+        schedule: Optional[Schedule] = None,
+        noise: Optional[NoiseMonitor] = None,
+        load: Optional[LoadConfig] = None,
+        profiler: Optional[OutlierProfiler] = None,
+        isolation: Optional[IsolationConfig] = None,
+        overheads: Optional[Overheads] = None,
+        cache: Optional[ResultCache] = None,
+        histogram: Optional[LogHistogram] = None,
+    ) -> None:
+        """Runs the tests and prints the results.
+        With parallel=True the tests are distributed over a process pool. With a
+        LogHistogram as well, the workers send back fixed-size histograms (with its range
+        and precision) that are merged, instead of all samples; the table is answered
+        from the histograms and the samples are not kept or recorded.
+        With an AdaptiveConfig every function is sampled until it converges
+        instead of num_tests times.
+        With calibrate=True every sample loops the function long enough for
+        sub-microsecond timings and the measured overhead is subtracted.
+        With prefetch="thread" or "process" inputs are prepared in the background.
+        With memory > 0 a separate pass of that many iterations records the peak
+        and net allocation per call.
+        With a Schedule and/or a NoiseMonitor the functions run in a randomized,
+        seeded order and noisy iterations are flagged or dropped.
+        With a LoadConfig the functions are driven at a target rate or concurrency
+        and latency percentiles and the achieved throughput are reported.
+        With an OutlierProfiler the Python stacks of the slowest iterations are
+        sampled and written as collapsed stacks (run_tests, prefetch and adaptive runs).
+        With an IsolationConfig garbage collection is disabled or forced between calls
+        (run_tests, prefetch and adaptive runs) or every function runs in its own forked
+        worker; collections and pause totals are reported per label.
+        With Overheads (see selfbench) the measured empty-call overhead is subtracted
+        from every sample in the table in plain timing modes (not in calibrated, load,
+        forked or parallel runs); the stored results stay raw.
+        With a ResultCache (plain serial runs) unchanged functions reuse their cached
+        samples and only changed ones are measured; cached rows are marked.
+        parallel, adaptive, calibrate, prefetch, schedule/noise, load, cache and a forking
+        IsolationConfig each select a run mode; combining them raises ValueError, as does
+        an OutlierProfiler or gc isolation in a mode they do not apply to."""
+        mode = select_mode({
+            "isolation(fork=True)": isolation is not None and isolation.fork,
+            "load": load is not None,
+            "parallel": parallel,
+            "adaptive": adaptive is not None,
+            "calibrate": calibrate,
+            "prefetch": prefetch is not None,
+            "schedule/noise": schedule is not None or noise is not None,
+            "cache": cache is not None,
+        })
+        if histogram is not None:
+            require_mode("histogram", mode, ("parallel",))
+        if profiler is not None:
+            require_mode("profiler", mode, MEASURED_MODES)
+        if isolation is not None and not isolation.fork:
+            require_mode("isolation", mode, MEASURED_MODES)
+        monitor = None
+        if isolation is not None and not isolation.fork:
+            monitor = GcMonitor(isolation.gc)
+            monitor.install()
+            self.gc_monitor = monitor
+        if profiler is not None:
+            profiler.expect(self.num_tests)
+            profiler.install()
+            self.profiler = profiler
+        try:
+            if mode == "isolation(fork=True)":
+                self.run_tests_forked(isolation)  # type: ignore
+            elif mode == "load":
+                self.run_tests_load(load)
+                self.stats_collection.register_metrics(latency_metrics())
+                self.stats_collection.add_note(f"Load mode: {load.describe()}")
+                for name, result in self.load_results.items():
+                    self.stats_collection.set_info(name, "throughput", f"{result.throughput:.1f} req/s")
+                    if load.open_loop and result.throughput < 0.95 * load.rate:  # type: ignore
+                        self.stats_collection.add_note(
+                            f"{name} did not sustain the target rate ({result.throughput:.1f} req/s)"
+                        )
+            elif mode == "parallel":
+                used_workers = self.run_tests_parallel(workers, histogram)
+                self.stats_collection.add_note(
+                    f"Parallel run: {used_workers} worker process(es)"
+                    + (", merged histograms" if histogram is not None else "")
+                )
+            elif mode == "adaptive":
+                self.run_tests_adaptive(adaptive)  # type: ignore
+            elif mode == "calibrate":
+                overhead, call_overhead = self.run_tests_calibrated(min_sample_time)
+                self.stats_collection.add_note(
+                    f"Subtracted timer overhead {overhead * 1e9:.1f} ns per sample "
+                    f"and up to {call_overhead * 1e9:.1f} ns empty-call overhead per call"
+                )
+                for name, number in self.loops.items():
+                    self.stats_collection.set_info(name, "loops", str(number))
+            elif mode == "prefetch":
+                self.run_tests_prefetched(prefetch)  # type: ignore
+                self.stats_collection.add_note(input_generation_note(self.generator_times, self.results))
+            elif mode == "schedule/noise":
+                schedule = schedule or Schedule()
+                self.run_tests_scheduled(schedule, noise)
+                self.stats_collection.add_note(schedule.note())
+            elif mode == "cache":
+                cached = self.run_tests_cached(cache)  # type: ignore
+                for name, _, _ in self.functions:
+                    self.stats_collection.set_info(name, "cache", "cached" if name in cached else "measured")
+                self.stats_collection.add_note(cache.note())
+            else:
+                self.run_tests()
+        finally:
+            if profiler is not None:
+                self.profiler = None
+                profiler.uninstall()
+            if monitor is not None:
+                self.gc_monitor = None
+                monitor.uninstall()
+                for name, stats in monitor.series.items():
+                    self.gc_stats[name].update(stats)
+            # All samples are measured; also releases the run writer if a benchmark raised.
+            self._stop_recording()
+
+        if profiler is not None:
+            paths = profiler.write(self.results)
+            self.stats_collection.add_note(
+                f"Stacks of iterations above p{profiler.percentile:g} written to "
+                f"{profiler.outdir} ({len(paths)} file(s))"
+            )
+            if profiler.unsampled:
+                self.stats_collection.add_note(
+                    f"No profiler samples for {', '.join(profiler.unsampled)} "
+                    f"(calls much shorter than the {profiler.interval * 1e3:g} ms interval "
+                    "are rarely sampled"
+                    + (")" if profiler.wall else ", try wall=True)")
+                )
+            if profiler.harness_ticks:
+                ticks = ", ".join(f"{label}: {n}" for label, n in profiler.harness_ticks.items())
+                self.stats_collection.add_note(
+                    f"Profiler ticks in the timing harness, not in the call, were dropped ({ticks})"
+                )
+
+        if isolation is not None:
+            self.stats_collection.add_note(isolation.describe())
 
-    def compare_performance(self) -> None:
-        """Runs the tests and prints the results."""
-        self.run_tests()
+        if memory > 0:
+            self.run_memory_pass(memory)
 
+        series: dict[str, dict[str, SampleStore]] = defaultdict(dict)
+        if self.memory:
+            self.stats_collection.register_metrics(python_memory_metrics())
+            for name, usage in self.memory.items():
+                series[name].update(usage)
+        if self.gc_stats:
+            self.stats_collection.register_metrics(
+                gc_metrics(between=any("gc_between" in stats for stats in self.gc_stats.values()))
+            )
+            for name, stats in self.gc_stats.items():
+                series[name].update(stats)
+                self.stats_collection.set_info(name, "gc runs", str(int(sum(stats["gc_runs"]))))
+        if self.drain_times:
+            self.stats_collection.register_metric(
+                Metric("drain", default_mean, "s", series="drain", moment=running_mean)
+            )
+            for name, times in self.drain_times.items():
+                series[name]["drain"] = times
+        if self.prep_times:
+            self.stats_collection.register_metric(
+                Metric("prep", default_mean, "s", series="prep", moment=running_mean)
+            )
+            for name, times in self.prep_times.items():
+                series[name]["prep"] = times
+        results: dict[str, Any] = self.results
+        if overheads is not None and mode in PLAIN_TIMING_MODES:
+            results, clamped = overheads.subtract(self.results, overheads.call)
+            for name, count in clamped.items():
+                self.stats_collection.set_info(name, "clamped", str(count))
+            self.stats_collection.add_note(overheads.note(overheads.call, sum(clamped.values())))
+        elif overheads is not None:
+            self.stats_collection.add_note(f"Harness overhead not subtracted in {mode} runs")
+        if self.histograms:
+            results = {**results, **self.histograms}
         # Create Stats objects for each function and store them in the stats_collection.
-        for name, res in self.results.items():
-            self.stats_collection.add_stats(name, res)
+        self.stats_collection.add_all_stats(results, series=series)
+        for name, reason in self.stop_reasons.items():
+            self.stats_collection.set_info(name, "n", str(len(self.results[name])))
+            self.stats_collection.set_info(name, "stop", reason)
+        if noise is not None:
+            for name, count in noise.noisy_samples.items():
+                self.stats_collection.set_info(name, "noisy", str(count))
+            self.stats_collection.add_note(noise.note())
 
         # Print all stats in the stats_collection.
         self.stats_collection.print_all_stats()
@@ -0,0 +1,165 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from perf_tester.samples import SampleStore
+
+MODES = ("thread", "process")
+
+# How often the consumer checks that the producer is still alive while waiting.
+POLL_INTERVAL = 0.5
+
+
+class PreparedInput(NamedTuple):
+    """One generated input, transformed by every registered data function."""
+
+    special_data: list[Any]
+    prep_times: list[float]
+    gen_time: float
+
+
+class _Done:
+    pass
+
+
+def _produce(
+    generate_data: Callable[[], Any],
+    entries: list[tuple[str, Callable[[Any], Any]]],
+    pure: frozenset,
+    count: int,
+    memo_size: int,
+    put: Callable[[Any], Optional[bool]],
+) -> None:
+    memo: OrderedDict[Hashable, Any] = OrderedDict()
+    try:
+        for _ in range(count):
+            start_time = time.perf_counter()
+            data = generate_data()
+            gen_time = time.perf_counter() - start_time
+
+            special_data: list[Any] = []
+            prep_times: list[float] = []
+            for name, data_func in entries:
+                start_time = time.perf_counter()
+                key: Optional[Hashable] = None
+                if name in pure:
+                    try:
+                        key = (name, data)
+                        hash(key)
+                    except TypeError:  # unhashable inputs are not memoized
+                        key = None
+                if key is not None and key in memo:
+                    memo.move_to_end(key)
+                    value = memo[key]
+                else:
+                    value = data_func(data)
+                    if key is not None:
+                        memo[key] = value
+                        if len(memo) > memo_size:
+                            memo.popitem(last=False)
+                special_data.append(value)
+                prep_times.append(time.perf_counter() - start_time)
+            if put(PreparedInput(special_data, prep_times, gen_time)) is False:
+                return  # the consumer stopped early
+    except Exception as e:
+        put(e)
+    put(_Done())
+
+
+def _next_item(items: Any, worker: Any) -> Any:
+    """Next queued item. Raises if the producer died without finishing (e.g. killed
+    or crashed in a forked process) instead of waiting forever."""
+    while True:
+        try:
+            return items.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            if worker.is_alive():
+                continue
+        try:  # items put right before the producer exited
+            return items.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            exitcode = getattr(worker, "exitcode", None)
+            status = f" with code {exitcode}" if exitcode is not None else ""
+            raise RuntimeError(f"Input producer exited{status} before all inputs were generated")
+
+
+class InputPrefetcher:
+    """
+    Generates and transforms `count` inputs ahead of the timed loop.
+    A producer thread (or forked process) fills a bounded queue; iterating the
+    prefetcher only pulls ready inputs. Transformed inputs of data functions
+    declared pure are memoized per (name, input) for hashable inputs.
+
+    A producer thread shares the GIL with the timed calls, so "process" mode
+    should be preferred for Python functions. It requires picklable inputs.
+    """
+
+    def __init__(
+        self,
+        generate_data: Callable[[], Any],
+        entries: list[tuple[str, Callable[[Any], Any]]],
+        count: int,
+        pure: Optional[set[str]] = None,
+        mode: str = "thread",
+        depth: int = 32,
+        memo_size: int = 4096,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown prefetch mode {mode!r}, expected one of {MODES}")
+        self.args = (generate_data, entries, frozenset(pure or ()), count, memo_size)
+        self.mode = mode
+        self.depth = depth
+
+    def __iter__(self) -> Iterator[PreparedInput]:
+        worker: Any
+        stop = threading.Event()
+        if self.mode == "thread":
+            items: Any = queue.Queue(maxsize=self.depth)
+
+            def put(item: Any) -> bool:
+                # Give up once the consumer stopped, instead of blocking forever
+                while not stop.is_set():
+                    try:
+                        items.put(item, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+
+            worker = threading.Thread(target=_produce, args=(*self.args, put), daemon=True)
+        else:
+            ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else None)
+            items = ctx.Queue(maxsize=self.depth)
+            worker = ctx.Process(target=_produce, args=(*self.args, items.put), daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = _next_item(items, worker)
+                if isinstance(item, _Done):
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            if self.mode == "process" and worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+
+def _total(samples: SampleStore) -> float:
+    return samples.running.mean * len(samples) if len(samples) else 0.0
+
+
+def input_generation_note(generator_times: SampleStore, results: dict[str, SampleStore]) -> str:
+    """Summary line comparing the background input generation with the measured time."""
+    generated = _total(generator_times)
+    measured = sum(_total(res) for res in results.values())
+    return (
+        f"Input generation (off the timed path): {generated:.4g} s, "
+        f"measured: {measured:.4g} s"
+    )
@@ -0,0 +1,285 @@
+import dis
+import heapq
+import os
+import random
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+from collections import Counter, defaultdict
+from math import ceil
+from types import FrameType
+from typing import Any, Callable, Optional, Sequence
+
+from perf_tester.statistics import default_percentile
+
+
+def collapsed_name(label: str) -> str:
+    """File name for the collapsed stacks of a label."""
+    return re.sub(r"[^\w.-]+", "_", label).strip("_") + ".collapsed"
+
+
+def write_collapsed(path: str, stacks: Counter) -> None:
+    """Writes stacks in the collapsed format of flamegraph.pl / speedscope ("a;b;c count")."""
+    with open(path, "w") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+
+
+class OutlierKeeper:
+    """
+    Keeps the payloads of the `capacity` slowest iterations per label in a min-heap,
+    so memory stays bounded while the final percentile is not yet known.
+    Evicted payloads are passed to on_evict (e.g. to delete a file).
+    """
+
+    def __init__(self, capacity: int, on_evict: Optional[Callable[[Any], None]] = None):
+        self.capacity = max(1, capacity)
+        self.on_evict = on_evict
+        self.heaps: dict[str, list[tuple[float, int, Any]]] = defaultdict(list)
+        self._counter = 0
+
+    def offer(self, label: str, elapsed: float, payload: Any) -> None:
+        heap = self.heaps[label]
+        self._counter += 1
+        entry = (elapsed, self._counter, payload)
+        if len(heap) < self.capacity:
+            heapq.heappush(heap, entry)
+            return
+        if elapsed <= heap[0][0]:
+            evicted = payload
+        else:
+            evicted = heapq.heapreplace(heap, entry)[2]
+        if self.on_evict is not None:
+            self.on_evict(evicted)
+
+    def outliers(self, label: str, samples: Sequence[float], percentile: float) -> list[Any]:
+        """Payloads of the kept iterations slower than the percentile of all samples.
+        The others are evicted."""
+        threshold = default_percentile(samples, percentile)
+        kept: list[Any] = []
+        for elapsed, _, payload in self.heaps.pop(label, []):
+            if elapsed > threshold:
+                kept.append(payload)
+            elif self.on_evict is not None:
+                self.on_evict(payload)
+        return kept
+
+
+def _capacity(expected: int, percentile: float) -> int:
+    return ceil(expected * (100 - percentile) / 100) + 1
+
+
+class OutlierProfiler:
+    """
+    Signal-based sampling profiler for PerformanceTester (Linux/Unix, main thread).
+    An interval timer is armed only around each timed call, with a random first tick
+    within the interval, so a call shorter than the interval is still sampled with
+    probability duration / interval; every tick records the Python stack of the
+    call. The stacks of the iterations slower than `percentile`
+    of their label are written to <outdir>/<label>.collapsed for flame graphs.
+    With wall=True the timer counts wall-clock time (also samples sleeping/blocked
+    calls), otherwise process CPU time. The kernel checks CPU time timers only on
+    scheduler ticks, so calls far below a tick need wall=True to be sampled.
+    Python runs the handler only between bytecodes, so a tick during a call into C
+    code (builtins, C extensions) is seen right after that call returns; such ticks
+    get a "[native]" leaf below the Python frame that made the call. Ticks seen in
+    the timing frame itself (the timer reads around the call, or a benchmarked
+    builtin without a Python frame of its own) are not attributed to the call: they
+    are dropped and counted per label in `harness_ticks`. Labels whose outliers got
+    no sample at all are listed in `unsampled` after write().
+    """
+
+    def __init__(
+        self,
+        outdir: str,
+        percentile: float = 95.0,
+        interval: float = 0.001,
+        wall: bool = False,
+    ):
+        if not hasattr(signal, "setitimer"):
+            raise RuntimeError("The sampling profiler needs signal.setitimer (Unix)")
+        self.outdir = outdir
+        self.percentile = percentile
+        self.interval = interval
+        self.wall = wall
+        self.timer = signal.ITIMER_REAL if wall else signal.ITIMER_PROF
+        self.signum = signal.SIGALRM if wall else signal.SIGPROF
+        self.keeper = OutlierKeeper(_capacity(1000, percentile))
+        self._stacks: Counter = Counter()
+        self._harness = 0
+        self.harness_ticks: Counter = Counter()
+        self._boundary: Optional[FrameType] = None
+        self._previous_handler: Any = None
+        self._rng = random.Random()
+        self.unsampled: list[str] = []
+
+    def expect(self, iterations: int) -> None:
+        """Sizes the outlier buffers for the number of iterations per label."""
+        self.keeper.capacity = _capacity(iterations, self.percentile)
+
+    def install(self) -> None:
+        self.harness_ticks = Counter()
+        self._previous_handler = signal.signal(self.signum, self._sample)
+
+    def uninstall(self) -> None:
+        signal.setitimer(self.timer, 0)
+        if self._previous_handler is not None:
+            signal.signal(self.signum, self._previous_handler)
+            self._previous_handler = None
+
+    def _sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        if frame is not None and frame.f_code in _PROFILER_CODES:
+            return  # the tick hit the profiler itself (or its handler), not the timed call
+        if frame is None or frame is self._boundary:
+            self._harness += 1
+            return
+        names: list[str] = []
+        if _in_call(frame):
+            names.append("[native]")  # the tick came during a call into C code
+        while frame is not None and frame is not self._boundary:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        if frame is self._boundary:
+            self._stacks[";".join(reversed(names))] += 1
+
+    def arm(self) -> None:
+        """Starts sampling; frames from the caller upwards are not recorded."""
+        self._boundary = sys._getframe(1)
+        self._stacks = Counter()
+        self._harness = 0
+        # A zero delay would disarm the timer instead.
+        first = max(self._rng.uniform(0, self.interval), 1e-6)
+        signal.setitimer(self.timer, first, self.interval)
+
+    def disarm(self, label: str, elapsed: float) -> None:
+        signal.setitimer(self.timer, 0)
+        self._boundary = None
+        if self._harness:
+            self.harness_ticks[label] += self._harness
+        self.keeper.offer(label, elapsed, self._stacks)
+
+    def write(self, results: dict[str, Sequence[float]]) -> list[str]:
+        """Writes the merged outlier stacks per label. Returns the written paths;
+        labels without any sampled stack are collected in `unsampled`."""
+        os.makedirs(self.outdir, exist_ok=True)
+        paths: list[str] = []
+        self.unsampled = []
+        for label, samples in results.items():
+            stacks: Counter = Counter()
+            for iteration_stacks in self.keeper.outliers(label, samples, self.percentile):
+                stacks.update(iteration_stacks)
+            if stacks:
+                path = os.path.join(self.outdir, collapsed_name(label))
+                write_collapsed(path, stacks)
+                paths.append(path)
+            else:
+                self.unsampled.append(label)
+        return paths
+
+
+_PROFILER_CODES = frozenset(
+    method.__code__ for method in (OutlierProfiler.arm, OutlierProfiler.disarm, OutlierProfiler._sample)
+)
+_CALL_OPCODES = frozenset(
+    dis.opmap[name] for name in ("CALL", "CALL_KW", "CALL_FUNCTION_EX") if name in dis.opmap
+)
+
+
+def _in_call(frame: FrameType) -> bool:
+    """Whether the frame's current instruction is a call that already returned,
+    i.e. the signal arrived while C code called from this frame was running."""
+    code = frame.f_code.co_code
+    return 0 <= frame.f_lasti < len(code) and code[frame.f_lasti] in _CALL_OPCODES
+
+
+def collapse_perf_script(output: str) -> Counter:
+    """Collapses `perf script` output (samples separated by blank lines, innermost
+    frame first) into "outer;...;inner" stacks."""
+    stacks: Counter = Counter()
+    frames: list[str] = []
+    in_sample = False
+    for line in output.splitlines() + [""]:
+        if not line.strip():
+            if frames:
+                stacks[";".join(reversed(frames))] += 1
+            frames = []
+            in_sample = False
+        elif not in_sample:
+            in_sample = True  # sample header: comm pid time event
+        else:
+            parts = line.split(maxsplit=1)
+            symbol = parts[1] if len(parts) > 1 else parts[0]
+            frames.append(re.sub(r"\s*\(.*\)$", "", symbol).split("+0x")[0])
+    return stacks
+
+
+class PerfRecorder:
+    """
+    Optional `perf record` profiler for CPerformanceTester. The timing pass runs
+    unchanged and only remembers the commands of the iterations slower than
+    `percentile` (non server mode programs). Afterwards, in a separate pass, each
+    of those commands is replayed under `perf record -g` and the recordings are
+    converted with `perf script` to collapsed stacks in <outdir>/<label>.collapsed.
+    Outliers caused by interference rather than by the input may not reproduce.
+    """
+
+    def __init__(
+        self,
+        outdir: str,
+        percentile: float = 95.0,
+        frequency: int = 999,
+        perf: str = "perf",
+    ):
+        self.outdir = outdir
+        self.percentile = percentile
+        self.frequency = frequency
+        self.perf = shutil.which(perf)
+        self.keeper = OutlierKeeper(_capacity(1000, percentile))
+
+    def expect(self, iterations: int) -> None:
+        """Sizes the outlier buffers for the number of iterations per label."""
+        self.keeper.capacity = _capacity(iterations, self.percentile)
+
+    @property
+    def available(self) -> bool:
+        return self.perf is not None
+
+    def offer(self, label: str, elapsed: float, command: list[str]) -> None:
+        """Remembers the command of a timed invocation if it is among the slowest."""
+        self.keeper.offer(label, elapsed, command)
+
+    def record(self, command: list[str], cwd, data: str) -> Counter:
+        """Runs command once under perf record and returns its collapsed stacks."""
+        prefix = [self.perf, "record", "-q", "-g", "-F", str(self.frequency), "-o", data, "--"]
+        subprocess.run(
+            prefix + command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL  # type: ignore
+        )
+        script = subprocess.run(
+            [self.perf, "script", "-i", data], capture_output=True, text=True  # type: ignore
+        )
+        try:
+            os.remove(data)
+        except OSError:
+            pass
+        return collapse_perf_script(script.stdout)
+
+    def write(self, results: dict[str, Sequence[float]], cwd=None) -> list[str]:
+        """Replays the outlier commands of every label under perf record and writes
+        the merged stacks. Returns the written paths."""
+        os.makedirs(self.outdir, exist_ok=True)
+        paths: list[str] = []
+        with tempfile.TemporaryDirectory(prefix="perf_record_") as tmpdir:
+            data = os.path.join(tmpdir, "perf.data")
+            for label, samples in results.items():
+                stacks: Counter = Counter()
+                for command in self.keeper.outliers(label, samples, self.percentile):
+                    stacks.update(self.record(command, cwd, data))
+                if stacks:
+                    path = os.path.join(self.outdir, collapsed_name(label))
+                    write_collapsed(path, stacks)
+                    paths.append(path)
+        return paths
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from math import erfc, nan, sqrt
+from statistics import median
+from typing import Any, Dict, List, Sequence, Tuple
+
+FASTER = "faster"
+SLOWER = "slower"
+UNCHANGED = "unchanged"
+NEW = "new"
+MISSING = "missing"
+
+REGRESSION_EXIT_STATUS = 1
+
+
+def weighted_values(data: Any) -> List[Tuple[float, int]]:
+    """(value, count) pairs of raw samples (count 1 each) or of the buckets of a
+    statistics.LogHistogram (its weighted_values), so both can be ranked."""
+    buckets = getattr(data, "weighted_values", None)
+    if buckets is not None:
+        return list(buckets())
+    return [(value, 1) for value in data]
+
+
+def data_median(data: Any) -> float:
+    """Median of raw samples, or the bucket median of a LogHistogram."""
+    if len(data) == 0:
+        return nan
+    percentile = getattr(data, "percentile", None)
+    return percentile(50) if percentile is not None else median(data)
+
+
+def mann_whitney_u(x: Sequence[float], y: Sequence[float]) -> Tuple[float, float]:
+    """
+    Mann-Whitney U statistic of x against y and its two-sided p-value
+    (normal approximation with tie and continuity correction).
+    """
+    return weighted_mann_whitney_u(weighted_values(x), weighted_values(y))
+
+
+def weighted_mann_whitney_u(
+    x: Sequence[Tuple[float, int]], y: Sequence[Tuple[float, int]]
+) -> Tuple[float, float]:
+    """mann_whitney_u over (value, count) pairs; a histogram bucket counts as `count`
+    tied samples at its representative value."""
+    n1, n2 = sum(count for _, count in x), sum(count for _, count in y)
+    if n1 == 0 or n2 == 0:
+        return nan, nan
+    combined = sorted([(v, 0, c) for v, c in x if c] + [(v, 1, c) for v, c in y if c])
+    n = n1 + n2
+    rank_sum_x = 0.0
+    tie_term = 0.0
+    below = 0  # samples ranked before the current group of equal values
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        group = combined[i : j + 1]
+        ties = sum(count for _, _, count in group)
+        average_rank = below + (ties + 1) / 2
+        tie_term += ties**3 - ties
+        rank_sum_x += average_rank * sum(count for _, side, count in group if side == 0)
+        below += ties
+        i = j + 1
+
+    u = rank_sum_x - n1 * (n1 + 1) / 2
+    mu = n1 * n2 / 2
+    sigma = sqrt(n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))) if n > 1 else 0.0
+    if sigma == 0:
+        return u, 1.0
+    diff = u - mu
+    z = (diff - 0.5 * (1 if diff > 0 else -1 if diff < 0 else 0)) / sigma
+    return u, min(1.0, erfc(abs(z) / sqrt(2)))
+
+
+@dataclass
+class Comparison:
+    """Result of comparing the samples of one label against its baseline."""
+
+    label: str
+    baseline: float
+    current: float
+    change: float
+    p_value: float
+    effect_size: float
+    verdict: str
+
+
+def compare_samples(
+    label: str,
+    baseline: Sequence[float],
+    current: Sequence[float],
+    alpha: float = 0.05,
+    threshold: float = 0.02,
+) -> Comparison:
+    """
+    Compares medians with a Mann-Whitney U test. The effect size is the rank-biserial
+    correlation (positive: current tends to be slower). A label is only reported
+    faster/slower if p < alpha and the median changed by at least `threshold`.
+    Either side may be a LogHistogram; it is then compared at bucket resolution.
+    """
+    if len(baseline) == 0:
+        return Comparison(label, nan, data_median(current), nan, nan, nan, NEW)
+    if len(current) == 0:
+        return Comparison(label, data_median(baseline), nan, nan, nan, nan, MISSING)
+    baseline_median, current_median = data_median(baseline), data_median(current)
+    u, p_value = weighted_mann_whitney_u(weighted_values(current), weighted_values(baseline))
+    effect_size = 2 * u / (len(current) * len(baseline)) - 1
+    change = (current_median - baseline_median) / baseline_median if baseline_median else nan
+    verdict = UNCHANGED
+    if p_value < alpha and abs(change) >= threshold:
+        verdict = SLOWER if change > 0 else FASTER
+    return Comparison(label, baseline_median, current_median, change, p_value, effect_size, verdict)
+
+
+def compare_runs(
+    baseline: Dict[str, Sequence[float]],
+    current: Dict[str, Sequence[float]],
+    alpha: float = 0.05,
+    threshold: float = 0.02,
+) -> List[Comparison]:
+    """Comparisons of every label of either run; labels only in the baseline are
+    reported as missing, labels only in the current run as new."""
+    return [
+        compare_samples(label, baseline.get(label, ()), current.get(label, ()), alpha, threshold)
+        for label in sorted(set(baseline) | set(current))
+    ]
+
+
+def exit_status(comparisons: List[Comparison]) -> int:
+    """Non-zero if any label got significantly slower."""
+    return REGRESSION_EXIT_STATUS if any(c.verdict == SLOWER for c in comparisons) else 0
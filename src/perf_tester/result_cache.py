@@ -0,0 +1,321 @@
+import functools
+import hashlib
+import json
+import os
+import platform
+import socket
+import sys
+import sysconfig
+import time
+import types
+from array import array
+from typing import Any, Callable, Optional
+
+from perf_tester.samples import SampleStore
+
+# Constants that are hashed by value; anything else only by type and name.
+_PLAIN = (int, float, complex, str, bytes, bool, type(None))
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _code_names(code: types.CodeType) -> set[str]:
+    """Global and attribute names used by code and the functions nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def _update_code(digest: Any, code: types.CodeType) -> None:
+    digest.update(code.co_code)
+    digest.update("\0".join(code.co_names + code.co_varnames).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _update_code(digest, const)
+        else:
+            _update_value(digest, const, set())
+
+
+def _update_value(digest: Any, value: Any, reached: set[str], depth: int = 0) -> None:
+    if isinstance(value, _PLAIN):
+        digest.update(repr(value).encode())
+    elif isinstance(value, (tuple, list, frozenset)) and depth < 4:
+        digest.update(type(value).__name__.encode())
+        for item in value:
+            _update_value(digest, item, reached, depth + 1)
+    elif isinstance(value, types.ModuleType):
+        reached.add(value.__name__)
+    elif callable(value) and depth < 4:
+        _update_callable(digest, value, reached, depth + 1)
+    else:
+        digest.update(f"<{type(value).__module__}.{type(value).__qualname__}>".encode())
+
+
+def _update_callable(digest: Any, func: Any, reached: set[str], depth: int = 0) -> None:
+    if isinstance(func, functools.partial):
+        _update_callable(digest, func.func, reached, depth + 1)
+        _update_value(digest, func.args, reached, depth + 1)
+        _update_value(digest, tuple(sorted(func.keywords.items())), reached, depth + 1)
+        return
+    library_path = getattr(func, "library_path", None)
+    if library_path is not None:  # c_library.CFunction: the shared library itself
+        digest.update(f"{file_hash(library_path)}:{func.__name__}".encode())
+        return
+    func = getattr(func, "__func__", func)
+    code = getattr(func, "__code__", None)
+    if code is None:  # builtins and other callables
+        name = getattr(func, "__qualname__", type(func).__qualname__)
+        module = getattr(func, "__module__", None)
+        digest.update(f"{module or ''}.{name}".encode())
+        if isinstance(module, str):
+            reached.add(module)
+        return
+    _update_code(digest, code)
+    _update_value(digest, func.__defaults__, reached, depth + 1)
+    # Helper functions of the same module are hashed by bytecode, everything the
+    # function uses from other modules by the source of those modules.
+    module_globals = getattr(func, "__globals__", {})
+    for name in sorted(_code_names(code)):
+        value = module_globals.get(name)
+        if isinstance(value, types.ModuleType):
+            reached.add(value.__name__)
+        elif isinstance(value, types.FunctionType) and value.__module__ == func.__module__:
+            if value is not func and depth < 4:
+                _update_callable(digest, value, reached, depth + 1)
+        elif value is not None:
+            module = getattr(value, "__module__", None)
+            if isinstance(module, str) and module != func.__module__:
+                reached.add(module)
+    for cell in func.__closure__ or ():
+        try:
+            _update_value(digest, cell.cell_contents, reached, depth + 1)
+        except ValueError:  # empty cell
+            pass
+
+
+def _realpath(path: Optional[str]) -> str:
+    return os.path.join(os.path.realpath(path), "") if path else "\0"
+
+
+# Installed packages are keyed by their version, the standard library by sys.version.
+_INSTALLED = tuple({_realpath(sysconfig.get_path(key)) for key in ("purelib", "platlib")})
+_STDLIB = tuple({_realpath(sysconfig.get_path(key)) for key in ("stdlib", "platstdlib")})
+
+
+def _update_modules(digest: Any, reached: set[str]) -> None:
+    """Source file hashes of the reached modules and, transitively, of the modules
+    they use; installed packages only by version and the standard library not at all."""
+    keys: dict[str, str] = {}
+    pending = sorted(reached)
+    seen: set[str] = set()
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        path = getattr(sys.modules.get(name), "__file__", None)
+        if not path or not os.path.isfile(path):  # builtin, frozen or namespace modules
+            continue
+        path = os.path.realpath(path)
+        if path.startswith(_INSTALLED):
+            top = name.partition(".")[0]
+            keys[top] = str(getattr(sys.modules.get(top), "__version__", ""))
+            continue
+        if path.startswith(_STDLIB):
+            continue
+        keys[name] = file_hash(path)
+        for value in list(vars(sys.modules[name]).values()):
+            if isinstance(value, types.ModuleType):
+                pending.append(value.__name__)
+            else:
+                module = getattr(value, "__module__", None)
+                if isinstance(module, str):
+                    pending.append(module)
+    for name in sorted(keys):
+        digest.update(f"{name}:{keys[name]}\0".encode())
+
+
+def callable_hash(func: Callable[..., Any]) -> str:
+    """Hash of a callable's bytecode, constants, defaults, closure values and the
+    same-module helper functions it calls, so it changes when the implementation
+    changes but not for comments or formatting. Modules the function uses (imported
+    modules and functions or classes from them) are hashed by their source files,
+    including the modules those import in turn; installed packages by version.
+    Shared library functions are hashed by their library file."""
+    digest = hashlib.sha256()
+    reached: set[str] = set()
+    _update_callable(digest, func, reached)
+    while isinstance(func, functools.partial):
+        func = func.func
+    module = getattr(getattr(func, "__func__", func), "__module__", None)
+    reached.discard(module)  # its own module is covered by the bytecode above
+    _update_modules(digest, reached)
+    return digest.hexdigest()
+
+
+def host_key() -> str:
+    return f"{socket.gethostname()}/{platform.machine()}/{platform.processor()}"
+
+
+def fingerprint(*parts: Any) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def python_fingerprint(
+    func: Callable, data_func: Callable, gen_data: Callable, num_tests: int, seed: Optional[int]
+) -> str:
+    """Key of a Python function's samples: function, data function and generator
+    bytecode, input seed, iteration count, interpreter version and host."""
+    return fingerprint(
+        "python",
+        callable_hash(func),
+        callable_hash(data_func),
+        callable_hash(gen_data),
+        num_tests,
+        seed,
+        sys.version,
+        host_key(),
+    )
+
+
+def program_fingerprint(
+    binary: str,
+    data_func: Callable,
+    gen_data: Callable,
+    num_tests: int,
+    seed: Optional[int],
+    compiler: str,
+    server: bool = False,
+) -> str:
+    """Key of a C program's samples: binary hash, data function and generator bytecode,
+    input seed, iteration count, compiler version and host."""
+    return fingerprint(
+        "program",
+        file_hash(binary),
+        callable_hash(data_func),
+        callable_hash(gen_data),
+        num_tests,
+        seed,
+        compiler,
+        server,
+        host_key(),
+    )
+
+
+class ResultCache:
+    """
+    On-disk cache of measured samples keyed by a fingerprint (see python_fingerprint,
+    program_fingerprint). Samples are raw float64 files next to an index.json with
+    the label, creation and last use time of every entry. Entries older than max_age
+    seconds are dropped, and beyond max_entries the least recently used ones.
+    With a seed, the testers seed `random` before generating inputs, so the cached
+    and the newly measured labels see the same input sequence. Without a seed the
+    cache is neither read nor written, as cached rows would have seen other inputs.
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(
+        self,
+        path: str = ".perf_cache",
+        seed: Optional[int] = None,
+        max_entries: int = 256,
+        max_age: float = 7 * 24 * 3600,
+    ):
+        self.path = path
+        self.seed = seed
+        self.max_entries = max_entries
+        self.max_age = max_age
+        os.makedirs(path, exist_ok=True)
+        self.index_path = os.path.join(path, self.INDEX_FILE)
+        self.index: dict[str, dict[str, Any]] = self._load_index()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self) -> dict[str, dict[str, Any]]:
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _store_index(self) -> None:
+        tmp = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def _data_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.f64")
+
+    def _drop(self, key: str) -> None:
+        self.index.pop(key, None)
+        try:
+            os.remove(self._data_path(key))
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Optional[SampleStore]:
+        if self.seed is None:
+            self.misses += 1
+            return None
+        entry = self.index.get(key)
+        now = time.time()
+        if entry is not None and now - entry["created"] > self.max_age:
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        samples = array("d")
+        try:
+            with open(self._data_path(key), "rb") as f:
+                samples.frombytes(f.read())
+        except OSError:
+            self._drop(key)
+            self.misses += 1
+            return None
+        entry["used"] = now
+        self.hits += 1
+        return SampleStore(samples)
+
+    def put(self, key: str, label: str, samples: Any) -> None:
+        if self.seed is None:
+            return
+        with open(self._data_path(key), "wb") as f:
+            f.write(array("d", samples).tobytes())
+        now = time.time()
+        self.index[key] = {"label": label, "created": now, "used": now, "count": len(samples)}
+
+    def evict(self) -> None:
+        now = time.time()
+        for key in [k for k, e in self.index.items() if now - e["created"] > self.max_age]:
+            self._drop(key)
+        by_use = sorted(self.index, key=lambda k: self.index[k]["used"])
+        for key in by_use[: max(0, len(by_use) - self.max_entries)]:
+            self._drop(key)
+
+    def save(self) -> None:
+        """Evicts and writes the index; call after a run."""
+        self.evict()
+        self._store_index()
+
+    def note(self) -> str:
+        if self.seed is None:
+            return (
+                f"Warning: result cache {self.path} not used, it needs a seed so that cached "
+                "and measured rows see the same inputs (ResultCache(seed=...))"
+            )
+        return f"Result cache {self.path}: {self.hits} cached, {self.misses} measured (seed {self.seed})"
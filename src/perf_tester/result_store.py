@@ -0,0 +1,195 @@
+import json
+import mmap
+import os
+import socket
+import subprocess
+import time
+import uuid
+from array import array
+from typing import Any, Callable, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, writers are then not serialized
+    fcntl = None
+
+Samples = Union[memoryview, array]
+
+
+def git_revision(cwd: Optional[str] = None) -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True
+        )
+    except OSError:
+        return ""
+    return result.stdout.strip() if result.returncode == 0 else ""
+
+
+def default_metadata() -> dict[str, Any]:
+    return {"git": git_revision(), "host": socket.gethostname(), "time": time.time()}
+
+
+class ResultStore:
+    """
+    Append-only on-disk store of benchmark samples.
+
+    All samples live in one raw float64 column file (samples.f64); an index
+    (index.jsonl) records the metadata of every run and the offset/count of every
+    segment of samples a label wrote. Reading maps the column file into memory,
+    so a label stored in a single segment is returned without copying.
+    """
+
+    DATA_FILE = "samples.f64"
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.data_path = os.path.join(path, self.DATA_FILE)
+        self.index_path = os.path.join(path, self.INDEX_FILE)
+        self._map: Optional[mmap.mmap] = None
+
+    def open_run(
+        self,
+        metadata: Optional[dict[str, Any]] = None,
+        label_metadata: Optional[Callable[[str], dict[str, Any]]] = None,
+    ) -> "RunWriter":
+        run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        return RunWriter(self, run_id, {**default_metadata(), **(metadata or {})}, label_metadata)
+
+    def _records(self) -> list[dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return []
+        with open(self.index_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def runs(self) -> list[dict[str, Any]]:
+        """Metadata of all runs, oldest first."""
+        return [r for r in self._records() if r["type"] == "run"]
+
+    def labels(self, run_id: str) -> dict[str, dict[str, Any]]:
+        """Metadata (group, compiler flags, ...) of every label in a run."""
+        return {
+            r["label"]: r["meta"]
+            for r in self._records()
+            if r["type"] == "label" and r["run"] == run_id
+        }
+
+    def _mapped(self, end: int) -> memoryview:
+        if self._map is None or len(self._map) < end:
+            # An outdated map is left to the garbage collector, views into it may still exist
+            with open(self.data_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._map)
+
+    def load_run(self, run_id: str) -> dict[str, Samples]:
+        """Samples of every label of a run. Labels stored in one segment are
+        zero-copy float64 views of the mapped file."""
+        segments: dict[str, list[tuple[int, int]]] = {}
+        for r in self._records():
+            if r["type"] == "segment" and r["run"] == run_id:
+                segments.setdefault(r["label"], []).append((r["offset"], r["count"]))
+        if not segments:
+            return {}
+        end = max(offset + 8 * count for parts in segments.values() for offset, count in parts)
+        view = self._mapped(end)
+        loaded: dict[str, Samples] = {}
+        for label, parts in segments.items():
+            views = [view[offset : offset + 8 * count] for offset, count in parts]
+            if len(views) == 1:
+                loaded[label] = views[0].cast("d")
+            else:
+                merged = array("d")
+                for part in views:
+                    merged.frombytes(part)
+                loaded[label] = merged
+        return loaded
+
+    def load(self, run_id: str, label: str) -> Samples:
+        return self.load_run(run_id)[label]
+
+    def latest_run(self, **match: Any) -> Optional[dict[str, Any]]:
+        """The most recent run whose metadata contains all given key/value pairs."""
+        for run in reversed(self.runs()):
+            if all(run.get(key) == value for key, value in match.items()):
+                return run
+        return None
+
+    def close(self) -> None:
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:  # loaded samples still reference the map
+                pass
+            self._map = None
+
+
+class RunWriter:
+    """Streams the samples of one run into a ResultStore.
+    Samples are buffered per label and written as segments of `chunk` samples."""
+
+    def __init__(
+        self,
+        store: ResultStore,
+        run_id: str,
+        metadata: dict[str, Any],
+        label_metadata: Optional[Callable[[str], dict[str, Any]]] = None,
+        chunk: int = 65536,
+    ):
+        self.store = store
+        self.run_id = run_id
+        self.chunk = chunk
+        self.label_metadata = label_metadata or (lambda label: {})
+        self.buffers: dict[str, array] = {}
+        self._data = open(store.data_path, "ab")
+        self._append_index([{"type": "run", "run": run_id, **metadata}])
+
+    def _append_index(self, records: list[dict[str, Any]]) -> None:
+        with open(self.store.index_path, "a") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in records))
+
+    def append(self, label: str, value: float) -> None:
+        buffer = self.buffers.get(label)
+        if buffer is None:
+            buffer = self.buffers[label] = array("d")
+            meta = self.label_metadata(label)
+            self._append_index([{"type": "label", "run": self.run_id, "label": label, "meta": meta}])
+        buffer.append(value)
+        if len(buffer) >= self.chunk:
+            self._flush_label(label)
+
+    def _flush_label(self, label: str) -> None:
+        buffer = self.buffers[label]
+        if not buffer:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._data, fcntl.LOCK_EX)
+        try:
+            self._data.seek(0, os.SEEK_END)
+            offset = self._data.tell()
+            self._data.write(buffer.tobytes())
+            self._data.flush()
+            self._append_index(
+                [{"type": "segment", "run": self.run_id, "label": label, "offset": offset, "count": len(buffer)}]
+            )
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._data, fcntl.LOCK_UN)
+        del buffer[:]
+
+    def flush(self) -> None:
+        for label in self.buffers:
+            self._flush_label(label)
+
+    def close(self) -> None:
+        if self._data.closed:
+            return
+        self.flush()
+        self._data.close()
+
+    def __enter__(self) -> "RunWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
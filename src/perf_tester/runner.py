@@ -0,0 +1,223 @@
+"""
+Benchmark discovery and suite runner behind `python -m perf_tester run <paths>`.
+
+Convention: files named bench_*.py, *_bench.py or *_test.py (or any .py file given
+explicitly) are scanned for top-level names starting with bench_. A bench_ function is a suite
+factory returning a tester (anything with compare_performance), a bench_ variable is
+a tester instance. Files are only parsed here, never imported; every suite is
+imported and run inside a worker process, so the CLI does not pay for the imports
+of the benchmarks (or of the testers and NumPy) before the workers start.
+"""
+import ast
+import fnmatch
+import io
+import os
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from typing import Any, Optional, Sequence
+
+BENCH_PREFIX = "bench_"
+# *_test.py files only yield suites if they define bench_ names (e.g. perf-test/prime_fac).
+BENCH_FILES = ("bench_*.py", "*_bench.py", "*_test.py")
+
+# Cold start budget of `python -m perf_tester list`, on top of the bare interpreter start.
+STARTUP_TARGET = 0.05
+
+
+@dataclass(frozen=True)
+class Suite:
+    path: str
+    name: str
+
+    @property
+    def id(self) -> str:
+        return f"{self.path}::{self.name}"
+
+
+@dataclass
+class SuiteReport:
+    suite: Suite
+    output: str = ""
+    summary: dict[str, tuple[int, float, float]] = field(default_factory=dict)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+def bench_names(path: str) -> list[str]:
+    """Top-level bench_ functions and variables of a file, found by parsing it."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    names: list[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            targets = [node.name]
+        elif isinstance(node, ast.Assign):
+            targets = [target.id for target in node.targets if isinstance(target, ast.Name)]
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            targets = [node.target.id]
+        else:
+            continue
+        names.extend(name for name in targets if name.startswith(BENCH_PREFIX) and name not in names)
+    return names
+
+
+def _bench_files(directory: str) -> list[str]:
+    files: list[str] = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith((".", "__")))
+        files.extend(
+            os.path.join(root, name)
+            for name in sorted(names)
+            if any(fnmatch.fnmatch(name, pattern) for pattern in BENCH_FILES)
+        )
+    return files
+
+
+def discover(paths: Sequence[str], pattern: Optional[str] = None) -> list[Suite]:
+    """Suites in the given files and directories. A path of the form file.py::bench_name
+    selects a single suite; pattern filters suite names with shell wildcards."""
+    suites: list[Suite] = []
+    for path in paths:
+        path, _, selected = path.partition("::")
+        files = _bench_files(path) if os.path.isdir(path) else [path]
+        for file in files:
+            for name in bench_names(file):
+                if selected and name != selected:
+                    continue
+                if pattern and not fnmatch.fnmatch(name, pattern):
+                    continue
+                suites.append(Suite(os.path.abspath(file), name))
+    return suites
+
+
+def _load(suite: Suite) -> Any:
+    import importlib.util
+
+    directory = os.path.dirname(suite.path)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    module_name = os.path.splitext(os.path.basename(suite.path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, suite.path)
+    module = importlib.util.module_from_spec(spec)  # type: ignore
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)  # type: ignore
+    return getattr(module, suite.name)
+
+
+def run_suite(suite: Suite) -> SuiteReport:
+    """Imports and runs one suite; the printed report of the tester is captured."""
+    report = SuiteReport(suite)
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            obj = _load(suite)
+            tester = obj if hasattr(obj, "compare_performance") else obj()
+            tester.compare_performance()
+        for label, store in tester.results.items():
+            running = getattr(store, "running", None)
+            if running is None:
+                from perf_tester.samples import RunningStats
+
+                running = RunningStats.from_values(store)
+            report.summary[label] = (running.count, running.mean, running.min)
+    except BaseException:
+        report.error = traceback.format_exc()
+    report.elapsed = time.perf_counter() - start
+    report.output = output.getvalue()
+    return report
+
+
+def _suite_worker(suite: Suite, core: int, conn: Any) -> None:
+    from perf_tester.utils.system_utils import pin_to_core
+
+    pin_to_core(core)
+    conn.send(run_suite(suite))
+    conn.close()
+
+
+def run_suites(suites: Sequence[Suite], jobs: Optional[int] = None) -> list[SuiteReport]:
+    """Runs every suite in its own fresh worker process, at most one worker per core
+    and each pinned to its core; a finished worker hands its core to the next suite.
+    Reports are returned in suite order."""
+    import multiprocessing as mp
+    from multiprocessing.connection import wait
+
+    from perf_tester.utils.system_utils import available_cores
+
+    cores = available_cores()
+    jobs = max(1, min(jobs or len(cores), len(cores), len(suites) or 1))
+    ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+    free = cores[:jobs]
+    pending = list(enumerate(suites))
+    running: dict[Any, tuple[int, int, Any]] = {}
+    reports: list[Optional[SuiteReport]] = [None] * len(suites)
+    while pending or running:
+        while pending and free:
+            index, suite = pending.pop(0)
+            receiver, sender = ctx.Pipe(duplex=False)
+            core = free.pop(0)
+            worker = ctx.Process(target=_suite_worker, args=(suite, core, sender))
+            worker.start()
+            sender.close()
+            running[receiver] = (index, core, worker)
+        for receiver in wait(list(running)):
+            index, core, worker = running.pop(receiver)
+            try:
+                reports[index] = receiver.recv()
+            except EOFError:
+                worker.join()  # the exit code is only known after the join
+                reports[index] = SuiteReport(
+                    suites[index], error=f"Worker exited with code {worker.exitcode}\n"
+                )
+            receiver.close()
+            worker.join()
+            free.append(core)
+    return reports  # type: ignore
+
+
+def print_report(reports: Sequence[SuiteReport], elapsed: float) -> None:
+    """Prints the captured output of every suite followed by one combined summary table."""
+    from perf_tester.statistics import Metric, default_mean
+    from perf_tester.utils.table_printer import print_table
+
+    time_metric = Metric("time", default_mean, "s")
+
+    def fmt(value: float) -> str:
+        scaled, unit = time_metric.scale_value(value)
+        return f"{scaled:6.3f} {unit}"
+
+    rows: list[list[Any]] = [["Suite", "Label", "n", "avg", "min"], ["__sep"]]
+    for report in reports:
+        print(f"== {report.suite.id} ({report.elapsed:.2f} s) ==")
+        if report.output:
+            print(report.output.rstrip("\n"))
+        if report.error is not None:
+            print(report.error.rstrip("\n"))
+            rows.append([report.suite.name, "FAILED", "", "", ""])
+        for label, (count, mean, minimum) in report.summary.items():
+            rows.append([report.suite.name, label, count, fmt(mean), fmt(minimum)])
+        print()
+    print_table(rows)
+    failed = sum(report.error is not None for report in reports)
+    print(f"{len(reports)} suite(s), {failed} failed, {elapsed:.2f} s wall time")
+
+
+def measure_cold_start(argv: Sequence[str], runs: int = 10) -> tuple[float, float]:
+    """Median wall time of `python <argv>` and of a bare `python -c pass` over fresh
+    interpreters (the environment, e.g. PYTHONPATH, is inherited)."""
+    import statistics
+    import subprocess
+
+    def median_time(command: list[str]) -> float:
+        times: list[float] = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+    return median_time([sys.executable, *argv]), median_time([sys.executable, "-c", "pass"])
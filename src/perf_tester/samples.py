@@ -0,0 +1,120 @@
+from array import array
+from collections.abc import Iterable, Iterator
+from math import inf, nan
+from typing import Callable, Optional
+
+
+class RunningStats:
+    """Single-pass moments (Welford) plus min/max, updated on every sample."""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = nan
+        self._m2 = 0.0
+        self.min = inf
+        self.max = -inf
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> "RunningStats":
+        running = cls()
+        for value in values:
+            running.add(value)
+        return running
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+        else:
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningStats") -> None:
+        """Combines the moments of another accumulator (Chan et al.)."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self, ddof: int = 1) -> float:
+        return nan if self.count < 2 else self._m2 / (self.count - ddof)
+
+    def stddev(self, ddof: int = 1) -> float:
+        return self.variance(ddof) ** 0.5
+
+
+class SampleStore:
+    """Append-only float64 samples in a compact array('d') buffer.
+    A RunningStats accumulator is kept up to date, so moment-only metrics
+    never need to scan the buffer. An optional sink receives every sample
+    as it is appended (e.g. to stream it into a ResultStore)."""
+
+    __slots__ = ("samples", "running", "sink")
+
+    def __init__(
+        self, values: Iterable[float] = (), sink: Optional[Callable[[float], None]] = None
+    ) -> None:
+        self.samples = array("d")
+        self.running = RunningStats()
+        self.sink = sink
+        self.extend(values)
+
+    def append(self, value: float) -> None:
+        self.samples.append(value)
+        self.running.add(value)
+        if self.sink is not None:
+            self.sink(value)
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.append(value)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self.samples)
+
+    def __getitem__(self, index):
+        return self.samples[index]
+
+    def __repr__(self) -> str:
+        return f"SampleStore(n={len(self)}, mean={self.running.mean:.3g})"
+
+
+class RecordingResults(dict):
+    """Results dict (label -> SampleStore) whose stores stream every sample
+    to record(label, value)."""
+
+    def __init__(self, record: Callable[[str, float], None], existing: Optional[dict] = None):
+        super().__init__()
+        self.record = record
+        for label, store in (existing or {}).items():
+            # Samples measured before recording started are kept but not recorded
+            copy = SampleStore(store)
+            copy.sink = self._sink(label)
+            self[label] = copy
+
+    def _sink(self, label: str) -> Callable[[float], None]:
+        return lambda value: self.record(label, value)
+
+    def __missing__(self, label: str) -> SampleStore:
+        store = SampleStore(sink=self._sink(label))
+        self[label] = store
+        return store
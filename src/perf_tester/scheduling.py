@@ -0,0 +1,201 @@
+import glob
+import os
+import random
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, Sequence, TypeVar
+
+from perf_tester.utils.system_utils import available_cores
+
+try:
+    import resource
+except ImportError:  # not available on Windows, context switches are then not watched
+    resource = None
+
+E = TypeVar("E", bound=tuple)
+
+CPU_FREQ_GLOB = "/sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq"
+
+LOAD = "load"
+FREQUENCY = "cpu frequency"
+SWITCHES = "context switches"
+
+
+@dataclass
+class Environment:
+    """Snapshot of the machine state next to a measured iteration."""
+
+    load: Optional[float]
+    frequency: Optional[float]
+    switches: Optional[int]
+
+
+def cpu_frequency() -> Optional[float]:
+    """Mean current frequency (kHz) of the cores, or None where cpufreq is not exposed."""
+    values: list[float] = []
+    for path in glob.glob(CPU_FREQ_GLOB):
+        try:
+            with open(path) as f:
+                values.append(float(f.read()))
+        except (OSError, ValueError):
+            continue
+    return sum(values) / len(values) if values else None
+
+
+def load_average() -> Optional[float]:
+    """1-minute load average, or None where the platform does not have one (Windows)."""
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def involuntary_switches() -> Optional[int]:
+    """Involuntary context switches of this process and its reaped children so far,
+    or None without the resource module."""
+    if resource is None:
+        return None
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_nivcsw
+        + resource.getrusage(resource.RUSAGE_CHILDREN).ru_nivcsw
+    )
+
+
+def snapshot() -> Environment:
+    return Environment(load_average(), cpu_frequency(), involuntary_switches())
+
+
+class NoiseMonitor:
+    """
+    Watches for interference around every iteration of a scheduled run:
+    a 1-minute load average above max_load (default: number of usable cores + 0.5),
+    a CPU frequency more than freq_tolerance away from the start of the run or
+    changing within the iteration, and more than max_switches involuntary context
+    switches per measured call. With drop=True flagged iterations are discarded.
+    Signals the platform does not provide (load average and context switches on
+    Windows, frequency without cpufreq) are not checked and listed in the note.
+    """
+
+    def __init__(
+        self,
+        max_load: Optional[float] = None,
+        freq_tolerance: float = 0.05,
+        max_switches: int = 2,
+        drop: bool = False,
+    ):
+        self.max_load = max_load if max_load is not None else len(available_cores()) + 0.5
+        self.freq_tolerance = freq_tolerance
+        self.max_switches = max_switches
+        self.drop = drop
+        self.baseline_frequency: Optional[float] = None
+        self.iterations = 0
+        self.flagged = 0
+        self.reasons: Counter[str] = Counter()
+        self.noisy_samples: dict[str, int] = defaultdict(int)
+        self.unavailable: set[str] = set()
+
+    def _frequency_off(self, frequency: Optional[float], reference: Optional[float]) -> bool:
+        if frequency is None or not reference:
+            return False
+        return abs(frequency - reference) / reference > self.freq_tolerance
+
+    def check(self, before: Environment, after: Environment, calls: int) -> list[str]:
+        """Reasons why the iteration between the two snapshots is considered noisy."""
+        if self.baseline_frequency is None:
+            self.baseline_frequency = before.frequency
+        for signal, value in ((LOAD, after.load), (FREQUENCY, after.frequency), (SWITCHES, after.switches)):
+            if value is None:
+                self.unavailable.add(signal)
+        reasons: list[str] = []
+        loads = [load for load in (before.load, after.load) if load is not None]
+        if loads and max(loads) > self.max_load:
+            reasons.append(LOAD)
+        if self._frequency_off(after.frequency, self.baseline_frequency) or self._frequency_off(
+            after.frequency, before.frequency
+        ):
+            reasons.append(FREQUENCY)
+        if (
+            before.switches is not None
+            and after.switches is not None
+            and after.switches - before.switches > self.max_switches * calls
+        ):
+            reasons.append(SWITCHES)
+        return reasons
+
+    def record(self, reasons: list[str], labels: Sequence[str]) -> None:
+        self.iterations += 1
+        if not reasons:
+            return
+        self.flagged += 1
+        self.reasons.update(reasons)
+        if not self.drop:
+            for label in labels:
+                self.noisy_samples[label] += 1
+
+    @property
+    def score(self) -> float:
+        """Fraction of iterations taken under detected interference (0 = quiet machine)."""
+        return self.flagged / self.iterations if self.iterations else 0.0
+
+    def note(self) -> str:
+        details = ", ".join(
+            f"{reason} {self.reasons[reason]}"
+            for reason in (LOAD, FREQUENCY, SWITCHES)
+            if reason not in self.unavailable
+        )
+        handling = "dropped" if self.drop else "kept and flagged"
+        note = (
+            f"Noise score {self.score:.2f}: {self.flagged} of {self.iterations} iterations "
+            f"under interference ({details or 'no signals'}), {handling}"
+        )
+        if self.unavailable:
+            note += f"; not available here: {', '.join(sorted(self.unavailable))}"
+        return note
+
+
+class Schedule:
+    """
+    Randomized interleaving of the measured entries. Every iteration runs the entries
+    in a new order drawn from a seeded generator; the seed is recorded, so a run can be
+    repeated with the same order. With pairs=True every entry is measured twice per
+    iteration in ABAB fashion (the shuffled order run twice in a row).
+    """
+
+    def __init__(self, seed: Optional[int] = None, pairs: bool = False):
+        self.seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        self.pairs = pairs
+
+    def order(self, rng: random.Random, entries: Sequence[E]) -> list[E]:
+        order = list(entries)
+        rng.shuffle(order)
+        return order * 2 if self.pairs else order
+
+    def run(
+        self,
+        entries: Sequence[E],
+        generate_data: Callable[[], Any],
+        measure: Callable[[E, Any], float],
+        num_tests: int,
+        monitor: Optional[NoiseMonitor] = None,
+    ) -> Iterator[dict[str, list[float]]]:
+        """Yields the measurements of every kept iteration, keyed by the entry label
+        (the first element of an entry). Data generation happens before the
+        environment snapshot, so only the measured calls are watched."""
+        rng = random.Random(self.seed)
+        for _ in range(num_tests):
+            data = generate_data()
+            order = self.order(rng, entries)
+            before = snapshot() if monitor is not None else None
+            timings: dict[str, list[float]] = defaultdict(list)
+            for entry in order:
+                timings[entry[0]].append(measure(entry, data))
+            if monitor is not None:
+                reasons = monitor.check(before, snapshot(), len(order))
+                monitor.record(reasons, list(timings))
+                if reasons and monitor.drop:
+                    yield {}
+                    continue
+            yield timings
+
+    def note(self) -> str:
+        return f"Randomized schedule, seed {self.seed}" + (" (ABAB pairs)" if self.pairs else "")
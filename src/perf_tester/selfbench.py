@@ -0,0 +1,233 @@
+import os
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from statistics import median
+from typing import Any, Optional, Sequence
+
+from perf_tester.calibration import time_drain, time_loop
+from perf_tester.result_store import ResultStore
+from perf_tester.samples import SampleStore
+from perf_tester.statistics import Metric, StatsCollection, default_median
+from perf_tester.utils.dashboard import Dashboard
+from perf_tester.utils.table_printer import Seperator, construct_table
+
+SELFBENCH_DIR = ".perf_selfbench"
+SELFBENCH_TESTER = "selfbench"
+
+EMPTY_FUNCTION = "empty function"
+EMPTY_PROGRAM = "empty program"
+
+_EMPTY_C = "int main(void) { return 0; }\n"
+
+
+def _empty(_: Any) -> None:
+    return None
+
+
+def _identity(data: Any) -> Any:
+    return data
+
+
+@dataclass
+class Overheads:
+    """
+    Harness overheads from a self-benchmark run: the median sample the
+    PerformanceTester reports for an empty function (timer pair plus call) and the
+    median wall time the CPerformanceTester reports for an empty C program (spawn).
+    Pass it as `overheads=` to compare_performance to subtract it from every sample.
+    """
+
+    call: float
+    spawn: float
+    run_id: str = ""
+
+    @classmethod
+    def from_results(cls, results: dict[str, Sequence[float]], run_id: str = "") -> "Overheads":
+        call = results.get(EMPTY_FUNCTION)
+        spawn = results.get(EMPTY_PROGRAM)
+        return cls(
+            median(call) if call else 0.0,
+            median(spawn) if spawn else 0.0,
+            run_id,
+        )
+
+    @classmethod
+    def load(cls, path: str = SELFBENCH_DIR) -> Optional["Overheads"]:
+        """Overheads of the latest self-benchmark run stored under path, if any."""
+        store = ResultStore(path)
+        run = store.latest_run(tester=SELFBENCH_TESTER)
+        if run is None:
+            return None
+        overheads = cls.from_results(store.load_run(run["run"]), run["run"])
+        store.close()
+        return overheads
+
+    @staticmethod
+    def subtract(
+        results: dict[str, Sequence[float]], overhead: float
+    ) -> tuple[dict[str, SampleStore], dict[str, int]]:
+        """Copies of the samples with the overhead subtracted, and per label the number
+        of samples that were below the overhead and clamped to zero.
+        Only meaningful for samples timed like the self-benchmark measured the overhead
+        (plain serial timing), not for load latencies or forked and parallel runs."""
+        subtracted: dict[str, SampleStore] = {}
+        clamped: dict[str, int] = {}
+        for label, samples in results.items():
+            store = SampleStore()
+            count = 0
+            for value in samples:
+                value -= overhead
+                if value < 0:
+                    value = 0.0
+                    count += 1
+                store.append(value)
+            subtracted[label] = store
+            if count:
+                clamped[label] = count
+        return subtracted, clamped
+
+    def note(self, overhead: float, clamped: int = 0) -> str:
+        scaled, unit = Metric("overhead", default_median, "s").scale_value(overhead)
+        source = f" (self-benchmark {self.run_id})" if self.run_id else ""
+        text = f"Subtracted harness overhead of {scaled:.3f} {unit} per sample{source}"
+        if clamped:
+            text += f"; {clamped} sample(s) were below it and set to 0 (see the clamped column)"
+        return text
+
+
+def _per_call(func: Any, data: Any, number: int, repeat: int) -> SampleStore:
+    return SampleStore(time_loop(func, data, number) / number for _ in range(repeat))
+
+
+def _timed(func: Any, repeat: int) -> SampleStore:
+    samples = SampleStore()
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start_time)
+    return samples
+
+
+def bench_python_harness(num_tests: int, repeat: int) -> dict[str, SampleStore]:
+    """Empty function as measured by the PerformanceTester, the full cost of one
+    run_tests iteration around it, and the pieces of that iteration."""
+    from perf_tester.performance_testing import PerformanceTester
+
+    results: dict[str, SampleStore] = {}
+    iteration = SampleStore()
+    calls = SampleStore()
+    for _ in range(repeat):
+        tester = PerformanceTester(num_tests, lambda: None)
+        tester.add_function(EMPTY_FUNCTION, _empty, _identity)
+        start_time = time.perf_counter()
+        tester.run_tests()
+        iteration.append((time.perf_counter() - start_time) / num_tests)
+        calls.extend(tester.results[EMPTY_FUNCTION])
+    results[EMPTY_FUNCTION] = calls
+    results["run_tests iteration"] = iteration
+
+    timer = time.perf_counter
+    pairs = SampleStore()
+    for _ in range(num_tests):
+        start_time = timer()
+        end_time = timer()
+        pairs.append(end_time - start_time)
+    results["timer pair"] = pairs
+    results["data_func call"] = _per_call(_identity, None, num_tests, repeat)
+    dashboard = Dashboard(num_tests, enabled=False)
+    results["dashboard update"] = _per_call(dashboard.update, 1, num_tests, repeat)
+    results["drain (empty list)"] = _per_call(time_drain, [], num_tests, repeat)
+    return results
+
+
+def bench_spawn(directory: str, num_tests: int) -> dict[str, SampleStore]:
+    """Empty C program as measured by the CPerformanceTester (fork/exec, wait, rusage).
+    Needs gcc; the program is built once and cached in directory."""
+    from perf_tester.cperf_test import CPerformanceTester
+
+    os.makedirs(directory, exist_ok=True)
+    source = os.path.join(directory, "empty.c")
+    if not os.path.exists(source):
+        with open(source, "w") as f:
+            f.write(_EMPTY_C)
+    tester = CPerformanceTester(num_tests, lambda: None, directory)
+    tester.add_program(EMPTY_PROGRAM, "empty", lambda data: [])
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        tester.build()
+    if not os.path.exists(os.path.join(directory, "empty")):
+        return {}
+    tester.run_tests()
+    return {EMPTY_PROGRAM: tester.results[EMPTY_PROGRAM]}
+
+
+def bench_table(rows: int, cols: int, repeat: int) -> dict[str, SampleStore]:
+    grid: list[list[Any]] = [[f"r{r}c{c}" for c in range(cols)] for r in range(rows)]
+    grid.insert(1, ["__sep"])
+    sep = Seperator()
+    return {f"construct_table {rows}x{cols}": _timed(lambda: construct_table(grid, sep), repeat)}
+
+
+def bench_stats(samples: int, repeat: int) -> dict[str, SampleStore]:
+    """StatsCollection over one label with `samples` values: from a plain list (every
+    metric scans the data), from a SampleStore (moments) and vectorized if NumPy is there."""
+    import random
+
+    values = [random.random() for _ in range(samples)]
+    store = SampleStore(values)
+    results = {
+        f"stats {samples:.0e} list": _timed(
+            lambda: StatsCollection(vectorized=False).add_all_stats({"x": values}), repeat
+        ),
+        f"stats {samples:.0e} store": _timed(
+            lambda: StatsCollection(vectorized=False).add_all_stats({"x": store}), repeat
+        ),
+    }
+    if StatsCollection(vectorized=True).vectorized:
+        results[f"stats {samples:.0e} vectorized"] = _timed(
+            lambda: StatsCollection(vectorized=True).add_all_stats({"x": values}), repeat
+        )
+    return results
+
+
+def run_selfbench(path: str = SELFBENCH_DIR, quick: bool = False) -> int:
+    """
+    Runs the self-benchmark suite, prints its table and the comparison with the
+    previous self-benchmark run stored under path, then stores this run (tagged with
+    the git revision, see result_store.default_metadata) for the next comparison.
+    Returns the regression exit status of the comparison (0 without a previous run).
+    """
+    num_tests, repeat = (200, 3) if quick else (2000, 5)
+    samples, rows = (10**5, 1000) if quick else (10**6, 10_000)
+
+    results: dict[str, SampleStore] = {}
+    results.update(bench_python_harness(num_tests, repeat))
+    results.update(bench_spawn(os.path.join(path, "programs"), num_tests // 10))
+    results.update(bench_table(rows, 10, repeat))
+    results.update(bench_stats(samples, repeat))
+
+    collection = StatsCollection()
+    collection.register_metric(Metric("median", default_median, "s"))
+    collection.add_all_stats(results)
+    if EMPTY_PROGRAM not in results:
+        collection.add_note("gcc not available, empty program baseline skipped")
+
+    store = ResultStore(path)
+    previous = store.latest_run(tester=SELFBENCH_TESTER)
+    with store.open_run({"tester": SELFBENCH_TESTER, "quick": quick}) as writer:
+        for label, values in results.items():
+            for value in values:
+                writer.append(label, value)
+    overheads = Overheads.from_results(results, writer.run_id)
+    collection.add_note(
+        f"Overheads to subtract: {overheads.call * 1e9:.1f} ns per Python call, "
+        f"{overheads.spawn * 1e6:.1f} µs per program run (Overheads.load({path!r}))"
+    )
+    collection.print_all_stats()
+
+    status = 0
+    if previous is not None and previous.get("quick") == quick:
+        print(f"Compared with self-benchmark {previous['run']} (git {previous.get('git') or '-'}):")
+        status = collection.compare_with_baseline(store.load_run(previous["run"]))
+    store.close()
+    return status
@@ -0,0 +1,129 @@
+import os
+import selectors
+import subprocess
+import time
+from typing import Optional, Sequence
+
+from perf_tester.utils.process_utils import resolve_program
+
+SERVER_FLAG = "--perf-server"
+HANDSHAKE = "PERF_SERVER 1"
+# Seconds to wait for the handshake or for the answer to one request.
+DEFAULT_TIMEOUT = 60.0
+# select() only supports sockets on Windows, so the timeout is not enforced there.
+_SELECTABLE_PIPES = os.name != "nt"
+
+
+class ServerProtocolError(Exception):
+    """Raised when a program does not follow the server mode protocol."""
+
+
+class ServerTimeoutError(ServerProtocolError):
+    """Raised when a program does not answer in time; the program is killed."""
+
+
+class ProgramServer:
+    """A C benchmark program kept alive in server mode (see include/perf_server.h).
+
+    The program is started once with --perf-server. Every request sends one input line
+    and reads back one "<elapsed ns>\\t<result>" line, so the timing is measured by the
+    program itself and excludes process creation and pipe overhead.
+    A program that does not answer the handshake or a request within `timeout` seconds
+    (None waits forever) is killed and ServerTimeoutError is raised.
+    """
+
+    def __init__(self, program_path: str, cwd=None, timeout: Optional[float] = DEFAULT_TIMEOUT):
+        self.command = [resolve_program(program_path, cwd), SERVER_FLAG]
+        self.cwd = cwd
+        self.timeout = timeout
+        self.proc: Optional[subprocess.Popen] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._buffer = b""
+
+    def start(self) -> None:
+        self.proc = subprocess.Popen(
+            self.command,
+            cwd=self.cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        self._buffer = b""
+        try:
+            if _SELECTABLE_PIPES:
+                self._selector = selectors.DefaultSelector()
+                self._selector.register(self.proc.stdout, selectors.EVENT_READ)  # type: ignore
+            handshake = self._readline()
+            if handshake != HANDSHAKE:
+                raise ServerProtocolError(
+                    f"{self.command[0]} does not support server mode (got {handshake!r})"
+                )
+        except BaseException:
+            self.kill()
+            raise
+
+    def _readline(self) -> str:
+        """Next output line. The pipe is read directly (not through a buffered file),
+        so the selector sees whether a line is pending."""
+        assert self.proc is not None and self.proc.stdout is not None
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while b"\n" not in self._buffer:
+            if deadline is not None and self._selector is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._selector.select(remaining):
+                    self.kill()
+                    raise ServerTimeoutError(
+                        f"{self.command[0]} did not answer within {self.timeout:g} s and was killed"
+                    )
+            chunk = os.read(self.proc.stdout.fileno(), 65536)
+            if not chunk:
+                raise ServerProtocolError(f"{self.command[0]} closed its output")
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line.decode(errors="replace")
+
+    def request(self, args: Sequence[str]) -> tuple[float, str]:
+        """Sends one input and returns the program-measured time in seconds and its result."""
+        assert self.proc is not None and self.proc.stdin is not None
+        line = " ".join(args)
+        if "\n" in line:
+            raise ValueError("Server mode inputs must not contain newlines")
+        self.proc.stdin.write(line.encode() + b"\n")
+        self.proc.stdin.flush()
+        elapsed_ns, _, result = self._readline().partition("\t")
+        try:
+            return int(elapsed_ns) * 1e-9, result
+        except ValueError:
+            raise ServerProtocolError(f"Malformed response line: {elapsed_ns!r}") from None
+
+    def kill(self) -> None:
+        """Kills the program immediately, e.g. when it hangs."""
+        if self.proc is not None:
+            self.proc.kill()
+            self.close()
+
+    def close(self) -> None:
+        if self.proc is None:
+            return
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+        if self.proc.stdin:
+            try:
+                self.proc.stdin.close()
+            except BrokenPipeError:  # buffered input the program never read
+                pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        if self.proc.stdout:
+            self.proc.stdout.close()
+        self.proc = None
+
+    def __enter__(self) -> "ProgramServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,7 +1,18 @@
+import random
+import warnings
+from array import array
 from collections import defaultdict
-from math import nan
-from typing import Callable, Dict, List, Optional, Tuple
+from functools import partial
+from math import ceil, exp, floor, log, nan
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the pure Python path is used without it
+    np = None
+
+from perf_tester.regression import compare_runs, exit_status
+from perf_tester.samples import RunningStats, SampleStore
 from perf_tester.utils.system_utils import cls
 from perf_tester.utils.table_printer import print_table
 
@@ -13,12 +24,214 @@ def default_mean(data: List[float]) -> float:
 
 
 def default_stddev(data: List[float], ddof: int = 1) -> float:
-    n = len(data)
-    if n < 2:
+    return RunningStats.from_values(data).stddev(ddof)
+
+
+def default_percentile(data: Sequence[float], q: float) -> float:
+    """Percentile with linear interpolation (same definition as numpy's default)."""
+    ordered = sorted(data)
+    if not ordered:
+        return nan
+    pos = (len(ordered) - 1) * q / 100
+    lower = floor(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def default_median(data: Sequence[float]) -> float:
+    return default_percentile(data, 50)
+
+
+def default_mad(data: Sequence[float]) -> float:
+    """Median absolute deviation from the median."""
+    median = default_median(data)
+    return default_median([abs(x - median) for x in data])
+
+
+# --- Vectorized Metric Functions (rows of a NaN padded matrix, NumPy only) ---
+def vector_percentile(matrix: Any, q: float) -> Any:
+    return np.nanpercentile(matrix, q, axis=1)
+
+
+def vector_mad(matrix: Any) -> Any:
+    median = np.nanmedian(matrix, axis=1, keepdims=True)
+    return np.nanmedian(np.abs(matrix - median), axis=1)
+
+
+def _vector_stddev(matrix: Any) -> Any:
+    return np.nanstd(matrix, axis=1, ddof=1)
+
+
+def _vector_reducer(name: str) -> Callable[[Any], Any]:
+    return lambda matrix: getattr(np, name)(matrix, axis=1)
+
+
+# --- Moment Functions (answered from a RunningStats accumulator) ---
+def running_mean(running: RunningStats) -> float:
+    return running.mean
+
+
+def running_stddev(running: RunningStats) -> float:
+    return running.stddev()
+
+
+def running_min(running: RunningStats) -> float:
+    return running.min
+
+
+def running_max(running: RunningStats) -> float:
+    return running.max
+
+
+# --- Log-Bucketed Histogram ---
+class LogHistogram:
+    """
+    HDR-style latency histogram with fixed memory and O(1) record.
+    Values between lowest and highest fall into logarithmic buckets whose
+    representative value is within 10^-significant_digits of every value in
+    the bucket; smaller values share an underflow bucket, larger ones the last.
+    Exact count, mean, stddev, min and max are kept in a RunningStats.
+    Histograms with the same configuration merge exactly.
+    """
+
+    def __init__(self, lowest: float = 1e-9, highest: float = 3600.0, significant_digits: int = 2):
+        if not 0 < lowest < highest:
+            raise ValueError("Histogram range must satisfy 0 < lowest < highest")
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits must be between 1 and 5")
+        self.lowest = lowest
+        self.highest = highest
+        self.significant_digits = significant_digits
+        self._log_lowest = log(lowest)
+        self._inv_log_base = 1 / log(1 + 2 * 10.0**-significant_digits)
+        size = int((log(highest) - self._log_lowest) * self._inv_log_base) + 2
+        self.counts = array("Q", [0]) * size
+        self.running = RunningStats()
+
+    @classmethod
+    def from_values(cls, values: Sequence[float], **config: Any) -> "LogHistogram":
+        histogram = cls(**config)
+        for value in values:
+            histogram.record(value)
+        return histogram
+
+    def _index(self, value: float) -> int:
+        if value < self.lowest:
+            return 0
+        index = int((log(value) - self._log_lowest) * self._inv_log_base) + 1
+        return min(index, len(self.counts) - 1)
+
+    def record(self, value: float) -> None:
+        self.counts[self._index(value)] += 1
+        self.running.add(value)
+
+    def bucket_value(self, index: int) -> float:
+        """Representative (geometric middle) value of a bucket."""
+        if index == 0:
+            return self.lowest
+        return exp(self._log_lowest + (index - 0.5) / self._inv_log_base)
+
+    def percentile(self, q: float) -> float:
+        """Value at or below which q percent of the recorded values lie."""
+        if self.running.count == 0:
+            return nan
+        target = max(1, ceil(q / 100 * self.running.count))
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                value = self.bucket_value(index)
+                return min(max(value, self.running.min), self.running.max)
+        return self.running.max
+
+    def weighted_values(self) -> List[Tuple[float, int]]:
+        """(representative value, count) of every non-empty bucket, clamped to the
+        recorded min and max, e.g. for rank tests at bucket resolution."""
+        running = self.running
+        return [
+            (min(max(self.bucket_value(index), running.min), running.max), count)
+            for index, count in enumerate(self.counts)
+            if count
+        ]
+
+    def config(self) -> Dict[str, Any]:
+        """Range and precision, e.g. to create matching histograms in workers."""
+        return {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "significant_digits": self.significant_digits,
+        }
+
+    def compatible(self, other: "LogHistogram") -> bool:
+        return self.config() == other.config()
+
+    def merge(self, other: "LogHistogram") -> None:
+        """Adds the counts of another histogram with the same configuration."""
+        if not self.compatible(other):
+            raise ValueError("Only histograms with the same range and precision can be merged")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.running.merge(other.running)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable state (sparse counts), e.g. to ship it from a worker."""
+        running = self.running
+        return {
+            **self.config(),
+            "counts": {str(i): c for i, c in enumerate(self.counts) if c},
+            "running": [running.count, running.mean, running._m2, running.min, running.max],
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> "LogHistogram":
+        histogram = cls(state["lowest"], state["highest"], state["significant_digits"])
+        for index, count in state["counts"].items():
+            histogram.counts[int(index)] = count
+        running = histogram.running
+        running.count, running.mean, running._m2, running.min, running.max = state["running"]
+        return histogram
+
+    def __len__(self) -> int:
+        return self.running.count
+
+    def __repr__(self) -> str:
+        return f"LogHistogram(n={len(self)}, buckets={len(self.counts)})"
+
+
+# --- Histogram Functions (answered from a LogHistogram) ---
+def histogram_percentile(histogram: LogHistogram, q: float) -> float:
+    return histogram.percentile(q)
+
+
+def histogram_mad(histogram: LogHistogram) -> float:
+    """Median absolute deviation, using the representative value of every bucket."""
+    if len(histogram) == 0:
         return nan
-    mean_val = default_mean(data)
-    variance = sum((x - mean_val) ** 2 for x in data) / (n - ddof)
-    return variance**0.5
+    median = histogram.percentile(50)
+    deviations = sorted(
+        (abs(histogram.bucket_value(i) - median), count)
+        for i, count in enumerate(histogram.counts)
+        if count
+    )
+    target = ceil(len(histogram) / 2)
+    cumulative = 0
+    for deviation, count in deviations:
+        cumulative += count
+        if cumulative >= target:
+            return deviation
+    return deviations[-1][0]
+
+
+def percentile_metric(label: str, q: float, unit: Optional[str] = "s") -> "Metric":
+    """Percentile metric that works on raw samples, the vectorized engine and histograms."""
+    return Metric(
+        label,
+        partial(default_percentile, q=q),
+        unit,
+        vector=partial(vector_percentile, q=q),
+        histogram=partial(histogram_percentile, q=q),
+    )
 
 
 # --- Metric Definition ---
@@ -26,6 +239,14 @@ class Metric:
     """
     Defines a single metric with a label, a function to compute it,
     and an optional unit. If a unit is provided, the value is auto-scaled.
+    By default a metric is computed over the primary data of a Stats object;
+    if a series name is given, it is computed over that named series instead.
+    Metrics that only need moments can provide a `moment` function, which is
+    answered from the running accumulator of a SampleStore without a scan.
+    A `vector` function computes the metric for all labels at once from a
+    NaN padded NumPy matrix (one row per label) in the vectorized engine.
+    If the data is a LogHistogram the metric is answered by its moment or
+    `histogram` function; metrics with neither are not available (NaN).
     """
 
     def __init__(
@@ -33,17 +254,39 @@ class Metric:
         label: str,
         func: Callable[[List[float]], float],
         unit: Optional[str] = None,
+        series: Optional[str] = None,
+        moment: Optional[Callable[[RunningStats], float]] = None,
+        vector: Optional[Callable[[Any], Any]] = None,
+        histogram: Optional[Callable[[LogHistogram], float]] = None,
     ):
         self.label = label
         self.func = func
         self.unit = unit or ""
+        self.series = series
+        self.moment = moment
+        self.vector = vector
+        self.histogram = histogram
 
-    def compute(self, data: List[float]) -> float:
-        return self.func(data)
+    def compute(self, data: Union[Sequence[float], LogHistogram]) -> float:
+        if isinstance(data, LogHistogram):
+            if self.moment is not None:
+                return self.moment(data.running)
+            if self.histogram is not None:
+                return self.histogram(data)
+            return nan
+        if self.moment is not None and isinstance(data, SampleStore):
+            return self.moment(data.running)
+        return self.func(data)  # type: ignore
 
     def scale_value(self, value: float) -> Tuple[float, str]:
         if not self.unit:
             return value, ""
+        if self.unit == "B":
+            # Byte counts are scaled up with binary prefixes
+            for factor, unit_label in [(1024**3, "GiB"), (1024**2, "MiB"), (1024, "KiB")]:
+                if abs(value) >= factor:
+                    return value / factor, unit_label
+            return value, self.unit
         # Define scaling thresholds (for time-based metrics, for example)
         scales = [
             (1e-9, f"n{self.unit}"),
@@ -57,24 +300,205 @@ class Metric:
         return value, self.unit
 
 
+# --- Bootstrap Confidence Intervals ---
+class BootstrapCI:
+    """
+    Percentile bootstrap confidence interval of the mean or median.
+    The low and high bound are exposed as two metrics; the interval of the
+    most recent data set (or matrix) is cached so it is resampled only once.
+    The cache holds the data itself: a data set is recognized by identity and
+    length (samples are append-only), a matrix by its contents, as the
+    vectorized engine passes a fresh matrix to every metric.
+    With NumPy all resamples of a label are drawn and reduced in vectorized chunks.
+    """
+
+    def __init__(
+        self,
+        statistic: str = "mean",
+        confidence: float = 0.95,
+        resamples: int = 2000,
+        seed: Optional[int] = None,
+    ):
+        if statistic not in ("mean", "median"):
+            raise ValueError(f"Unsupported bootstrap statistic: {statistic}")
+        self.statistic = statistic
+        self.confidence = confidence
+        self.resamples = resamples
+        self.seed = seed
+        self._cache: Tuple[Any, int, Any] = (None, 0, None)
+        self._vector_cache: Tuple[Any, Any] = (None, None)
+
+    @property
+    def _quantiles(self) -> Tuple[float, float]:
+        alpha = 1 - self.confidence
+        return 100 * alpha / 2, 100 * (1 - alpha / 2)
+
+    def _estimates(self, data: Sequence[float]) -> List[float]:
+        rng = random.Random(self.seed)
+        reducer = default_mean if self.statistic == "mean" else default_median
+        n = len(data)
+        return [reducer(rng.choices(data, k=n)) for _ in range(self.resamples)]
+
+    def _vector_estimates(self, values: Any, rng: Any) -> Any:
+        reducer = np.mean if self.statistic == "mean" else np.median
+        n = len(values)
+        # Bound the index matrix of one chunk to ~10^7 entries
+        chunk = max(1, min(self.resamples, 10_000_000 // n))
+        estimates = np.empty(self.resamples)
+        for start in range(0, self.resamples, chunk):
+            size = min(chunk, self.resamples - start)
+            indices = rng.integers(0, n, size=(size, n))
+            estimates[start : start + size] = reducer(values[indices], axis=1)
+        return estimates
+
+    def interval(self, data: Sequence[float]) -> Tuple[float, float]:
+        cached, length, cached_result = self._cache
+        if cached is data and length == len(data):
+            return cached_result
+        if len(data) < 2:
+            result = (nan, nan)
+        elif np is not None:
+            values = np.asarray(data, dtype=float)
+            estimates = self._vector_estimates(values, np.random.default_rng(self.seed))
+            low, high = np.percentile(estimates, self._quantiles)
+            result = (float(low), float(high))
+        else:
+            estimates = self._estimates(list(data))
+            result = (
+                default_percentile(estimates, self._quantiles[0]),
+                default_percentile(estimates, self._quantiles[1]),
+            )
+        self._cache = (data, len(data), result)
+        return result
+
+    def vector_interval(self, matrix: Any) -> Any:
+        cached, cached_result = self._vector_cache
+        if (
+            cached is not None
+            and cached.shape == matrix.shape
+            and np.array_equal(cached, matrix, equal_nan=True)
+        ):
+            return cached_result
+        rng = np.random.default_rng(self.seed)
+        result = np.full((matrix.shape[0], 2), nan)
+        for i, row in enumerate(matrix):
+            values = row[~np.isnan(row)]
+            if len(values) >= 2:
+                result[i] = np.percentile(self._vector_estimates(values, rng), self._quantiles)
+        self._vector_cache = (matrix, result)
+        return result
+
+    def metrics(self, label: str, unit: Optional[str] = None) -> List[Metric]:
+        return [
+            Metric(
+                f"{label} lo",
+                lambda data: self.interval(data)[0],
+                unit,
+                vector=lambda matrix: self.vector_interval(matrix)[:, 0],
+            ),
+            Metric(
+                f"{label} hi",
+                lambda data: self.interval(data)[1],
+                unit,
+                vector=lambda matrix: self.vector_interval(matrix)[:, 1],
+            ),
+        ]
+
+
+def extended_metrics(
+    unit: str = "s", confidence: float = 0.95, resamples: int = 2000
+) -> List[Metric]:
+    """Distribution metrics (median, p90, p99, MAD) and bootstrap intervals
+    of the mean and the median."""
+    return [
+        percentile_metric("median", 50, unit),
+        percentile_metric("p90", 90, unit),
+        percentile_metric("p99", 99, unit),
+        Metric("mad", default_mad, unit, vector=vector_mad, histogram=histogram_mad),
+        *BootstrapCI("mean", confidence, resamples).metrics("avg", unit),
+        *BootstrapCI("median", confidence, resamples).metrics("median", unit),
+    ]
+
+
+def compute_vectorized(
+    metrics: List[Metric], datasets: Dict[str, Sequence[float]]
+) -> Dict[str, Dict[str, float]]:
+    """
+    Computes every metric with a vector function over the primary data of all
+    labels in batched passes over one NaN padded matrix. Moment metrics of
+    SampleStores are read from their accumulators instead.
+    Returns the computed values per label; other metrics are left out.
+    LogHistograms are left to Stats, which answers them from the buckets.
+    """
+    labels = [label for label, data in datasets.items() if not isinstance(data, LogHistogram)]
+    results: Dict[str, Dict[str, float]] = {label: {} for label in labels}
+    matrix = None
+    for metric in metrics:
+        if metric.series is not None or metric.vector is None:
+            continue
+        pending: List[int] = []
+        for i, label in enumerate(labels):
+            data = datasets[label]
+            if metric.moment is not None and isinstance(data, SampleStore):
+                results[label][metric.label] = metric.moment(data.running)
+            else:
+                pending.append(i)
+        if not pending:
+            continue
+        if matrix is None:
+            matrix = _padded_matrix([datasets[label] for label in labels])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # rows without samples
+            values = metric.vector(matrix[pending])
+        for i, value in zip(pending, values):
+            results[labels[i]][metric.label] = float(value)
+    return results
+
+
+def _padded_matrix(datasets: List[Sequence[float]]) -> Any:
+    width = max([len(data) for data in datasets] + [1])
+    matrix = np.full((len(datasets), width), nan)
+    for i, data in enumerate(datasets):
+        raw = data.samples if isinstance(data, SampleStore) else data
+        matrix[i, : len(data)] = np.asarray(raw, dtype=float)
+    return matrix
+
+
 # --- Stats Container for a Single Data Set ---
 class Stats:
     """
-    Computes and stores metrics for a given list of data values.
-    Both raw and scaled values are kept.
+    Computes and stores metrics for a given list of data values or a LogHistogram.
+    Additional named series (e.g. CPU times) can be passed for metrics
+    that declare a series. Both raw and scaled values are kept.
     """
 
-    def __init__(self, data: List[float], metrics: List[Metric]):
+    def __init__(
+        self,
+        data: Union[Sequence[float], LogHistogram],
+        metrics: List[Metric],
+        series: Optional[Dict[str, Sequence[float]]] = None,
+        precomputed: Optional[Dict[str, float]] = None,
+    ):
         self.data = data
+        self.series = series or {}
         self.metrics = metrics
-        self.results: Dict[str, float] = {}
+        self.results: Dict[str, float] = dict(precomputed or {})
         self.scaled_results: Dict[str, Tuple[float, str]] = {}
         self.calculate_metrics()
 
+    def metric_data(self, metric: Metric) -> Optional[Union[Sequence[float], LogHistogram]]:
+        if metric.series is None:
+            return self.data
+        return self.series.get(metric.series)
+
     def calculate_metrics(self) -> None:
         for metric in self.metrics:
-            value = metric.compute(self.data)
-            self.results[metric.label] = value
+            if metric.label in self.results:
+                value = self.results[metric.label]
+            else:
+                data = self.metric_data(metric)
+                value = nan if not data else metric.compute(data)
+                self.results[metric.label] = value
             scaled, scale_label = metric.scale_value(value)
             self.scaled_results[metric.label] = (scaled, scale_label)
 
@@ -101,19 +525,25 @@ class StatsCollection:
     Manages a collection of Stats objects. Metrics are registered once,
     and each data set is added under a label (optionally grouped).
     The final output is printed using the table printer.
+    If NumPy is installed, data sets added together with add_all_stats are
+    computed by the vectorized engine unless vectorized=False.
     """
 
-    def __init__(self, default_metrics: bool = True):
+    def __init__(self, default_metrics: bool = True, vectorized: Optional[bool] = None):
+        self.vectorized = np is not None and vectorized is not False
         self.metrics: List[Metric] = []
         self.stats: Dict[str, Stats] = {}
         self.groups: Dict[str, set] = defaultdict(set)
+        self.notes: List[str] = []
+        self.info_columns: List[str] = []
+        self.info: Dict[str, Dict[str, str]] = defaultdict(dict)
         if default_metrics:
             self.register_metrics(
                 [
-                    Metric("avg", default_mean, "s"),
-                    Metric("std", default_stddev, "s"),
-                    Metric("min", min, "s"),
-                    Metric("max", max, "s"),
+                    Metric("avg", default_mean, "s", moment=running_mean, vector=_vector_reducer("nanmean")),
+                    Metric("std", default_stddev, "s", moment=running_stddev, vector=_vector_stddev),
+                    Metric("min", min, "s", moment=running_min, vector=_vector_reducer("nanmin")),
+                    Metric("max", max, "s", moment=running_max, vector=_vector_reducer("nanmax")),
                 ]
             )
 
@@ -123,38 +553,124 @@ class StatsCollection:
     def register_metrics(self, metrics: List[Metric]) -> None:
         self.metrics.extend(metrics)
 
+    def register_extended_metrics(
+        self, confidence: float = 0.95, resamples: int = 2000
+    ) -> None:
+        """Adds median, p90, p99, MAD and bootstrap intervals of mean and median."""
+        self.register_metrics(extended_metrics("s", confidence, resamples))
+
     def add_stats(
-        self, label: str, data: List[float], group: Optional[str] = None
+        self,
+        label: str,
+        data: Union[Sequence[float], LogHistogram],
+        group: Optional[str] = None,
+        series: Optional[Dict[str, Sequence[float]]] = None,
+        precomputed: Optional[Dict[str, float]] = None,
     ) -> None:
-        stat = Stats(data, self.metrics)
+        stat = Stats(data, self.metrics, series, precomputed)
         self.stats[label] = stat
         if group:
             self.groups[group].add(label)
         else:
             self.groups["_"].add(label)
 
+    def add_all_stats(
+        self,
+        datasets: Dict[str, Union[Sequence[float], LogHistogram]],
+        groups: Optional[Dict[str, str]] = None,
+        series: Optional[Dict[str, Dict[str, Sequence[float]]]] = None,
+    ) -> None:
+        """Adds several data sets at once, using the vectorized engine if enabled."""
+        groups = groups or {}
+        series = series or {}
+        precomputed = compute_vectorized(self.metrics, datasets) if self.vectorized else {}
+        for label, data in datasets.items():
+            self.add_stats(
+                label, data, groups.get(label), series.get(label), precomputed.get(label)
+            )
+
+    def set_info(self, label: str, column: str, text: str) -> None:
+        """Sets a free text cell, shown in an extra column after the metrics."""
+        if column not in self.info_columns:
+            self.info_columns.append(column)
+        self.info[label][column] = text
+
+    def add_note(self, note: str) -> None:
+        """Adds a line that is printed below the table."""
+        self.notes.append(note)
+
     def clear(self) -> None:
         self.stats.clear()
         self.groups = defaultdict(set)
+        self.notes.clear()
+        self.info_columns.clear()
+        self.info.clear()
+
+    def compare_with_baseline(
+        self,
+        baseline: Dict[str, Sequence[float]],
+        alpha: float = 0.05,
+        threshold: float = 0.02,
+    ) -> int:
+        """
+        Compares every label against its baseline samples (e.g. ResultStore.load_run)
+        with a Mann-Whitney U test and prints a diff table. Histogram-backed labels
+        are compared at bucket resolution; baseline labels that were not measured
+        in this run are listed as missing. Returns a non-zero status if a label
+        got significantly slower by at least `threshold`, e.g. for sys.exit in CI.
+        """
+        current = {label: stat.data for label, stat in self.stats.items()}
+        comparisons = compare_runs(baseline, current, alpha, threshold)
+        time_format = Metric("median", default_median, "s")
+
+        def fmt(value: float, spec: Optional[str] = None) -> str:
+            if value != value:  # nan, e.g. for labels without baseline
+                return "-"
+            if spec is not None:
+                return format(value, spec)
+            scaled, unit = time_format.scale_value(value)
+            return f"{scaled:6.3f} {unit}"
+
+        config: List[List[str]] = [
+            ["Label", "baseline", "current", "change", "p-value", "effect", "verdict"],
+            ["__sep"],
+        ]
+        for c in comparisons:
+            config.append(
+                [
+                    c.label,
+                    fmt(c.baseline),
+                    fmt(c.current),
+                    fmt(c.change * 100, "+.2f") + " %" if c.change == c.change else "-",
+                    fmt(c.p_value, ".3g"),
+                    fmt(c.effect_size, "+.3f"),
+                    c.verdict,
+                ]
+            )
+        print_table(config)
+        return exit_status(comparisons)
 
     def print_all_stats(self) -> None:
         """
         Builds a table configuration list and prints it using the table printer.
         This follows the same style as your provided example.
         """
-        header = ["Label"] + [metric.label for metric in self.metrics]
+        header = ["Label"] + [metric.label for metric in self.metrics] + self.info_columns
         config = [header, ["__sep"]]
 
         sorted_groups = sorted(self.groups.items(), key=lambda x: x[0])
         for group_name, labels in sorted_groups:
             for label in sorted(labels):
                 stat = self.stats[label]
-                row = [label] + stat.table_repr()
+                info = self.info.get(label, {})
+                row = [label] + stat.table_repr() + [info.get(c, "") for c in self.info_columns]
                 config.append(row)
             if group_name != sorted_groups[-1][0]:
                 config.append(["__sep"])
         cls()  # Clear the console
         print_table(config)
+        for note in self.notes:
+            print(note)
 
 
 # --- Example Usage ---
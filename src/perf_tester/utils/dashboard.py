@@ -0,0 +1,157 @@
+import shutil
+import sys
+import threading
+import time
+from typing import Mapping, Optional, Sequence, TextIO
+
+from perf_tester.samples import SampleStore
+from perf_tester.statistics import Metric, default_mean
+from perf_tester.utils.progress_bar import ProgressBarConfig
+
+_TIME = Metric("time", default_mean, "s")
+
+
+def _format_time(value: float) -> str:
+    scaled, unit = _TIME.scale_value(value)
+    return f"{scaled:8.3f} {unit:<2}"
+
+
+class Dashboard:
+    """
+    Live progress and running per-label statistics, drawn by a background thread
+    at a fixed refresh rate. The measured loop only calls update/step, which store
+    an integer. Each refresh rebuilds just the rows whose sample count changed and
+    rewrites them in place with ANSI cursor movement; rows beyond the terminal
+    height are summarized in one line and never rendered.
+    Without a terminal (e.g. output redirected to a file) nothing is drawn.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        results: Optional[Mapping[str, SampleStore]] = None,
+        labels: Sequence[str] = (),
+        refresh: float = 0.25,
+        stream: Optional[TextIO] = None,
+        enabled: Optional[bool] = None,
+        bar_length: int = 50,
+        pgc: Optional[ProgressBarConfig] = None,
+    ):
+        self.total = max(1, total)
+        self.current = 0
+        self.results = results
+        self.refresh = refresh
+        self.stream = stream or sys.stdout
+        self.enabled = self.stream.isatty() if enabled is None else enabled
+        self.bar_length = bar_length
+        self._pgc = pgc or ProgressBarConfig()
+        self._label_width = max([len("Label"), *map(len, labels)])
+        self._max_rows = max(1, shutil.get_terminal_size().lines - 4)
+        self._lines: list[str] = []
+        self._row_of: dict[str, int] = {}
+        self._seen: dict[str, int] = {}
+        self._start_time = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def update(self, current: int) -> None:
+        self.current = current
+
+    def step(self) -> None:
+        self.current += 1
+
+    def start(self) -> "Dashboard":
+        self._start_time = time.perf_counter()
+        if self.enabled:
+            self._thread = threading.Thread(target=self._run, name="perf-dashboard", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._draw(final=True)
+
+    def __enter__(self) -> "Dashboard":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh):
+            self._draw()
+
+    def _progress_line(self, final: bool) -> str:
+        current = self.total if final else min(self.current, self.total)
+        elapsed = time.perf_counter() - self._start_time
+        progress = current / self.total
+        block = int(round(self.bar_length * progress))
+        eta = elapsed * (self.total / current - 1) if current > 0 else 0
+        pgc = self._pgc
+        return (
+            f"{pgc.lbound}{pgc.complete * block}{pgc.incomplete * (self.bar_length - block)}{pgc.rbound} "
+            f"{current}/{self.total} ({progress * 100:.2f}%) {pgc.seperator} "
+            f"Elapsed: {time.strftime('%H:%M:%S', time.gmtime(elapsed))} {pgc.seperator} "
+            f"ETA: {time.strftime('%H:%M:%S', time.gmtime(eta))}"
+        )
+
+    def _row(self, label: str, store: SampleStore) -> str:
+        running = store.running
+        return (
+            f"{label[: self._label_width]:<{self._label_width}} "
+            f"n={running.count:<8} avg {_format_time(running.mean)} "
+            f"min {_format_time(running.min)}"
+        )
+
+    def _changed_rows(self) -> dict[int, str]:
+        """Rows (by index, 0 is the progress line) that differ from what is on screen."""
+        changed = {0: self._progress_line(False)}
+        if self.results is None:
+            return changed
+        for label in tuple(self.results):
+            store = self.results.get(label)
+            if store is None:
+                continue
+            count = len(store)
+            if count == 0 or self._seen.get(label) == count:
+                continue
+            self._seen[label] = count
+            index = self._row_of.get(label)
+            if index is None:
+                if len(self._row_of) >= self._max_rows:
+                    hidden = len(self.results) - self._max_rows
+                    changed[self._max_rows + 1] = f"... {hidden} more label(s)"
+                    continue
+                index = self._row_of[label] = len(self._row_of) + 1
+            changed[index] = self._row(label, store)
+        return changed
+
+    def _draw(self, final: bool = False) -> None:
+        changed = self._changed_rows()
+        if final:
+            changed[0] = self._progress_line(True)
+        out: list[str] = []
+        height = len(self._lines)
+        for index in sorted(changed):
+            text = changed[index]
+            if index < height:
+                if self._lines[index] == text:
+                    continue
+                up = height - index
+                # Jump up to the row, rewrite it and return below the last row.
+                out.append(f"\033[{up}A\r\033[2K{text}\033[{up}B\r")
+                self._lines[index] = text
+            else:
+                while len(self._lines) < index:
+                    self._lines.append("")
+                    out.append("\n")
+                self._lines.append(text)
+                out.append(f"{text}\n")
+            height = len(self._lines)
+        if out:
+            self.stream.write("".join(out))
+            self.stream.flush()
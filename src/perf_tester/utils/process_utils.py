@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import os
+import selectors
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+# stderr is only kept for error messages.
+STDERR_LIMIT = 4096
+
+# os.wait4 (and select on pipes) only exist on Unix; elsewhere run_child falls back
+# to subprocess.run and reports no CPU times.
+HAS_RUSAGE = hasattr(os, "wait4")
+# run_child_async watches the exit of a child through a pidfd (Linux), so it can reap
+# the child itself with os.wait4; elsewhere it reports no CPU times either.
+HAS_ASYNC_RUSAGE = HAS_RUSAGE and hasattr(os, "pidfd_open")
+
+
+@dataclass
+class ChildResult:
+    """Timing and resource usage of a single child process."""
+
+    wall: float
+    user: float
+    sys: float
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+
+
+def resolve_program(program_path: str, cwd) -> str:
+    """Resolves a program path relative to cwd, as the shell used to do."""
+    if os.path.isabs(program_path) or cwd is None:
+        return program_path
+    candidate = os.path.join(cwd, program_path)
+    return candidate if os.path.exists(candidate) else program_path
+
+
+class OutputDigest:
+    """
+    Streaming SHA-256 of normalized program output: trailing whitespace of every
+    line (including \r) and trailing blank lines are ignored. Only the current
+    line is buffered, and at most _MAX_PARTIAL bytes of it.
+    """
+
+    _MAX_PARTIAL = 65536
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self._partial = b""
+        self._pending_newlines = 0
+
+    def _emit(self, content: bytes) -> None:
+        if content:
+            self._hash.update(b"\n" * self._pending_newlines + content)
+            self._pending_newlines = 0
+
+    def update(self, chunk: bytes) -> None:
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._emit(line.rstrip())
+            self._pending_newlines += 1
+        if len(self._partial) > self._MAX_PARTIAL:
+            stripped = self._partial.rstrip()
+            self._emit(stripped)
+            self._partial = self._partial[len(stripped):]
+
+    def hexdigest(self) -> str:
+        final = self._hash.copy()
+        stripped = self._partial.rstrip()
+        if stripped:
+            final.update(b"\n" * self._pending_newlines + stripped)
+        return final.hexdigest()
+
+
+def _read_pipes(
+    proc: subprocess.Popen,
+    stdout_limit: Optional[int] = None,
+    digest: Optional[OutputDigest] = None,
+) -> tuple[bytes, bytes]:
+    """Drains stdout and stderr concurrently without reaping the child.
+    At most stdout_limit (None: all) bytes of stdout and STDERR_LIMIT bytes of stderr
+    are kept; the complete stdout is fed to the digest."""
+    pipes = [pipe for pipe in (proc.stdout, proc.stderr) if pipe is not None]
+    limits = {proc.stdout: stdout_limit, proc.stderr: STDERR_LIMIT}
+    chunks: dict = {pipe: bytearray() for pipe in pipes}
+    with selectors.DefaultSelector() as selector:
+        for pipe in pipes:
+            selector.register(pipe, selectors.EVENT_READ)
+        while selector.get_map():
+            for key, _ in selector.select():
+                data = os.read(key.fd, 65536)
+                if not data:
+                    selector.unregister(key.fileobj)
+                    continue
+                if digest is not None and key.fileobj is proc.stdout:
+                    digest.update(data)
+                _keep(chunks[key.fileobj], data, limits[key.fileobj])
+    return bytes(chunks.get(proc.stdout, b"")), bytes(chunks.get(proc.stderr, b""))
+
+
+def _keep(kept: bytearray, data: bytes, limit: Optional[int]) -> None:
+    if limit is None:
+        kept += data
+    elif len(kept) < limit:
+        kept += data[: limit - len(kept)]
+
+
+def run_child(
+    command: Sequence[str],
+    cwd=None,
+    stdout_limit: Optional[int] = None,
+    digest: Optional[OutputDigest] = None,
+) -> ChildResult:
+    """Executes command without a shell and reaps it with os.wait4, so the
+    CPU times of exactly this child are reported. Its ru_maxrss is not: a child forked
+    from the tester starts with the tester's RSS high-water mark (see memory.py).
+    With stdout_limit=0 and no digest stdout goes straight to /dev/null;
+    otherwise at most stdout_limit bytes (None: all) are kept."""
+    discard = stdout_limit == 0 and digest is None
+    if not HAS_RUSAGE:
+        return _run_child_portable(command, cwd, stdout_limit, digest, discard)
+    start_time = time.perf_counter()
+    proc = subprocess.Popen(
+        list(command),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL if discard else subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    stdout, stderr = _read_pipes(proc, stdout_limit, digest)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    end_time = time.perf_counter()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.stdout is not None:
+        proc.stdout.close()
+    proc.stderr.close()  # type: ignore
+    return ChildResult(
+        wall=end_time - start_time,
+        user=rusage.ru_utime,
+        sys=rusage.ru_stime,
+        returncode=proc.returncode,
+        stdout=stdout,
+        stderr=stderr,
+    )
+
+
+def _run_child_portable(
+    command: Sequence[str],
+    cwd,
+    stdout_limit: Optional[int],
+    digest: Optional[OutputDigest],
+    discard: bool,
+) -> ChildResult:
+    """run_child without os.wait4 (Windows): the output is read in full by
+    subprocess.run and then truncated; user and sys are NaN."""
+    start_time = time.perf_counter()
+    proc = subprocess.run(
+        list(command),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL if discard else subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    end_time = time.perf_counter()
+    stdout = proc.stdout or b""
+    if digest is not None:
+        digest.update(stdout)
+    return ChildResult(
+        wall=end_time - start_time,
+        user=float("nan"),
+        sys=float("nan"),
+        returncode=proc.returncode,
+        stdout=stdout if stdout_limit is None else stdout[:stdout_limit],
+        stderr=proc.stderr[:STDERR_LIMIT],
+    )
+
+
+def _read_pipe_async(
+    loop: asyncio.AbstractEventLoop,
+    pipe: Any,
+    limit: Optional[int],
+    digest: Optional[OutputDigest] = None,
+) -> "asyncio.Future[bytes]":
+    """Drains a pipe from the event loop; resolves to the kept bytes at EOF."""
+    done: asyncio.Future[bytes] = loop.create_future()
+    kept = bytearray()
+    fd = pipe.fileno()
+
+    def on_readable() -> None:
+        data = os.read(fd, 65536)
+        if not data:
+            loop.remove_reader(fd)
+            done.set_result(bytes(kept))
+            return
+        if digest is not None:
+            digest.update(data)
+        _keep(kept, data, limit)
+
+    loop.add_reader(fd, on_readable)
+    return done
+
+
+async def _wait_exit(loop: asyncio.AbstractEventLoop, pid: int) -> Any:
+    """Waits until the child exits without reaping it, then reaps it with os.wait4.
+    The exit is signalled by a pidfd becoming readable; kernels without pidfd
+    support wait for it in the loop's default executor instead."""
+    try:
+        pidfd = os.pidfd_open(pid)
+    except OSError:
+        return await loop.run_in_executor(None, os.wait4, pid, 0)
+    exited: asyncio.Future[None] = loop.create_future()
+    loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(pidfd)
+        os.close(pidfd)
+    return os.wait4(pid, 0)
+
+
+async def run_child_async(
+    command: Sequence[str],
+    cwd=None,
+    stdout_limit: Optional[int] = None,
+    digest: Optional[OutputDigest] = None,
+) -> ChildResult:
+    """Event loop counterpart of run_child: the output pipes and the exit of the
+    child are watched by the running loop, so many children can run concurrently
+    on one thread. Like run_child, the child is reaped with os.wait4 for its CPU
+    times. Without pidfd support (see HAS_ASYNC_RUSAGE) the child is run with
+    asyncio.create_subprocess_exec and user and sys are NaN."""
+    discard = stdout_limit == 0 and digest is None
+    if not HAS_ASYNC_RUSAGE:
+        return await _run_child_asyncio(command, cwd, stdout_limit, digest, discard)
+    loop = asyncio.get_running_loop()
+    start_time = time.perf_counter()
+    proc = subprocess.Popen(
+        list(command),
+        cwd=cwd,
+        stdout=subprocess.DEVNULL if discard else subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        reads = [_read_pipe_async(loop, proc.stderr, STDERR_LIMIT)]
+        if proc.stdout is not None:
+            reads.append(_read_pipe_async(loop, proc.stdout, stdout_limit, digest))
+        (_, status, rusage), stderr, *stdout = await asyncio.gather(_wait_exit(loop, proc.pid), *reads)
+        end_time = time.perf_counter()
+    finally:
+        for pipe in (proc.stdout, proc.stderr):
+            if pipe is not None:
+                loop.remove_reader(pipe.fileno())
+                pipe.close()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return ChildResult(
+        wall=end_time - start_time,
+        user=rusage.ru_utime,
+        sys=rusage.ru_stime,
+        returncode=proc.returncode,
+        stdout=stdout[0] if stdout else b"",
+        stderr=stderr,
+    )
+
+
+async def _run_child_asyncio(
+    command: Sequence[str],
+    cwd,
+    stdout_limit: Optional[int],
+    digest: Optional[OutputDigest],
+    discard: bool,
+) -> ChildResult:
+    """run_child_async on asyncio's own subprocess support, which reaps the child
+    itself, so user and sys are NaN."""
+    start_time = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        cwd=cwd,
+        stdout=asyncio.subprocess.DEVNULL if discard else asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    async def drain(stream: Any, limit: Optional[int], digest: Optional[OutputDigest]) -> bytes:
+        kept = bytearray()
+        if stream is not None:
+            while data := await stream.read(65536):
+                if digest is not None:
+                    digest.update(data)
+                _keep(kept, data, limit)
+        return bytes(kept)
+
+    stdout, stderr, returncode = await asyncio.gather(
+        drain(proc.stdout, stdout_limit, digest), drain(proc.stderr, STDERR_LIMIT, None), proc.wait()
+    )
+    end_time = time.perf_counter()
+    return ChildResult(
+        wall=end_time - start_time,
+        user=float("nan"),
+        sys=float("nan"),
+        returncode=returncode,
+        stdout=stdout,
+        stderr=stderr,
+    )
+
+
+def check_child(command: Sequence[str], child: ChildResult) -> None:
+    """Raises if the child failed. Output on stderr alone is not an error."""
+    if child.returncode != 0:
+        raise Exception(
+            f"{command[0]} exited with status {child.returncode}: "
+            f"{child.stderr.decode(errors='replace')}"
+        )
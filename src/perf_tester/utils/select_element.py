@@ -1,13 +1,9 @@
 import math
-import os
-import sys
 import time
-from dataclasses import dataclass
 from typing import Optional, TypeVar
 
-import keyboard
-
-from poll_analyzer.utils.table_printer import Seperator, construct_table
+from perf_tester.utils.system_utils import cls
+from perf_tester.utils.table_printer import Seperator, construct_table
 
 A = TypeVar('A')  # Generic type for elements
 
@@ -36,15 +32,15 @@ def select_element_in_table(
     selected_col = 0
     keyboard_available = False
 
+    # keyboard is optional (and needs root on Linux); fall back to text input without it.
     try:
+        import keyboard
+
         keyboard.on_press_key("w", lambda _: None)
         keyboard.unhook_all()
         keyboard_available = True
-    except:
+    except Exception:
         keyboard_available = False
-
-    def clear_screen():
-        os.system('cls' if os.name == 'nt' else 'clear')
     def get_data_safe(data, row, col):
         try:
             return data[row][col]
@@ -92,7 +88,7 @@ def select_element_in_table(
         return False  
 
     while True:
-        clear_screen()
+        cls()
         print(header)
         lines = construct_table(
             data,
@@ -1,6 +1,25 @@
 import os
+import sys
 
 
 def cls():
-    """Clears the terminal (platform independent)"""
-    os.system("cls" if os.name == "nt" else "clear")
+    """Clears the terminal with ANSI escape codes instead of spawning a shell.
+    Does nothing if stdout is not a terminal."""
+    if sys.stdout.isatty():
+        sys.stdout.write("\033[H\033[2J\033[3J")
+        sys.stdout.flush()
+
+
+def available_cores() -> list[int]:
+    """Returns the ids of the cores this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_to_core(core: int) -> bool:
+    """Pins the current process to a single core. Returns False where unsupported."""
+    if not hasattr(os, "sched_setaffinity"):
+        return False
+    os.sched_setaffinity(0, {core})
+    return True
@@ -1,7 +1,8 @@
+import sys
 import time
 from dataclasses import dataclass
 from functools import partial
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 
 @dataclass(frozen=True)
@@ -11,11 +12,18 @@ class Seperator:
     intersection: str = "+"
 
 def calculate_width(data: list[list[Any]]) -> list[int]:
-    row_item_widths: list[list[int]] = [[] for _ in range(len(data[0]))]
+    """Widest cell per column in a single pass; rows may be ragged."""
+    widths: list[int] = []
     for row in data:
+        if "__sep" in row:
+            continue
         for i, element in enumerate(row):
-            row_item_widths[i].append(len(f"{element}"))
-    return [max(col) for col in row_item_widths]
+            width = len(f"{element}")
+            if i == len(widths):
+                widths.append(width)
+            elif width > widths[i]:
+                widths[i] = width
+    return widths
 
 def fetch_entry(row: int, col: int, data: list[list[Any]]) -> Any:
     if len(data) <= row or row < 0:
@@ -42,8 +50,8 @@ def construct_row(
     If highlight is (h_row, h_col) and row_idx == h_row, then the h_col cell is highlighted.
     """
     elements: list[str] = []
-    for col_idx, element in enumerate(row):
-        text = f"{element}"
+    for col_idx in range(len(col_widths)):
+        text = f"{row[col_idx]}" if col_idx < len(row) else ""
         padding = " " * (col_widths[col_idx] - len(text))
 
         # Check if we should highlight this cell
@@ -60,44 +68,48 @@ def construct_row(
 def max_bounds(data: list[list[Any]]) -> tuple[int, int]:
     return len(data), max([len(row) for row in data])
 
-def construct_table(
+def iter_table(
     data: list[list[Any]],
     sep: Seperator,
     seperate_lines: bool = False,
     highlight: Optional[tuple[int, int]] = None,
-) -> list[str]:
-    max_r, max_c = max_bounds(data)
-    updated_data = [
-        [fetch_entry(j, i, data) for i in range(max_c)] for j in range(max_r)
-    ]
-    col_width = calculate_width(updated_data)
+) -> Iterator[str]:
+    """Yields the table line by line. Rows are rendered straight from data;
+    short rows are padded with empty cells instead of copying the grid."""
+    col_width = calculate_width(data)
     constructed_seperator = seperator(col_width, sep)
 
-    output: list[str] = [constructed_seperator]
-    for row_i, row in enumerate(updated_data):
+    yield constructed_seperator
+    for row_i, row in enumerate(data):
         if "__sep" in row:
-            output.append(constructed_seperator)
+            yield constructed_seperator
             continue
-        output.append(
-            construct_row(
-                row, 
-                row_i, 
-                col_width, 
-                sep, 
-                highlight=highlight
-            )
-        )
+        yield construct_row(row, row_i, col_width, sep, highlight=highlight)
         if seperate_lines and row_i != len(data) - 1:
-            output.append(constructed_seperator)
-    output.append(constructed_seperator)
-    return output
+            yield constructed_seperator
+    yield constructed_seperator
+
+def construct_table(
+    data: list[list[Any]],
+    sep: Seperator,
+    seperate_lines: bool = False,
+    highlight: Optional[tuple[int, int]] = None,
+) -> list[str]:
+    return list(iter_table(data, sep, seperate_lines, highlight))
 
 def print_table(
     data: list[list[Any]],
     sep: Seperator = Seperator()  # noqa: B008
 ) -> None:
-    lines = construct_table(data, sep, False)
-    print("\n".join(lines), flush=True)
+    # Written in chunks, so large tables are never joined into one string.
+    chunk: list[str] = []
+    for line in iter_table(data, sep, False):
+        chunk.append(line)
+        if len(chunk) == 1024:
+            sys.stdout.write("\n".join(chunk) + "\n")
+            chunk.clear()
+    sys.stdout.write("\n".join(chunk) + "\n")
+    sys.stdout.flush()
 
 def select_element_in_table[A](
     data: list[A],
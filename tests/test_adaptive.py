@@ -0,0 +1,38 @@
+from perf_tester.adaptive import CONVERGED, MAX_SAMPLES, TIME_BUDGET, AdaptiveConfig
+from perf_tester.performance_testing import PerformanceTester
+from perf_tester.samples import SampleStore
+
+
+def test_stop_reasons():
+    config = AdaptiveConfig(rel_ci_width=0.05, min_samples=5, max_samples=20, time_budget=1.0)
+    steady = SampleStore([1.0, 1.001, 0.999, 1.0])
+    assert config.stop_reason(steady, 0.0) is None  # below min_samples
+    steady.append(1.0)
+    assert config.stop_reason(steady, 0.0) == CONVERGED
+    noisy = SampleStore([1.0, 5.0] * 10)
+    assert config.stop_reason(noisy, 0.0) == MAX_SAMPLES
+    assert config.stop_reason(SampleStore([1.0, 5.0]), 2.0) == TIME_BUDGET
+
+
+def test_relative_ci_width():
+    config = AdaptiveConfig()
+    assert config.relative_ci_width(SampleStore([1.0])) == float("inf")
+    assert config.relative_ci_width(SampleStore([0.0, 0.0])) == float("inf")
+    narrow = config.relative_ci_width(SampleStore([1.0, 1.01] * 50))
+    wide = config.relative_ci_width(SampleStore([1.0, 1.01] * 5))
+    assert 0 < narrow < wide
+
+
+def test_adaptive_run_stops_each_function_separately(monkeypatch):
+    tester = PerformanceTester(1, lambda: None)
+    tester.add_function("steady", lambda _: None, lambda data: data)
+    tester.add_function("noisy", lambda _: None, lambda data: data)
+    # Fixed timings, so the outcome does not depend on the machine's jitter
+    timings = {"steady": iter([1.0] * 100), "noisy": iter([1.0, 5.0] * 50)}
+    monkeypatch.setattr(
+        tester, "_measure", lambda name, func, data: tester.results[name].append(next(timings[name]))
+    )
+    tester.compare_performance(adaptive=AdaptiveConfig(rel_ci_width=0.5, min_samples=5, max_samples=12))
+    assert tester.stop_reasons == {"steady": CONVERGED, "noisy": MAX_SAMPLES}
+    assert len(tester.results["steady"]) == 5 and len(tester.results["noisy"]) == 12
+    assert tester.stats_collection.info["noisy"] == {"n": "12", "stop": MAX_SAMPLES}
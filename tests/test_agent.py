@@ -0,0 +1,152 @@
+import base64
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from perf_tester.agent import (
+    MAX_AUTH_MESSAGE,
+    AgentServer,
+    auth_mac,
+    comparability_issues,
+    read_message,
+    send_message,
+)
+from perf_tester.coordinator import AgentConnection, Coordinator
+from perf_tester.cperf_test import CPerformanceTester
+from perf_tester.statistics import LogHistogram
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def agent(tmp_path):
+    workdir = tmp_path / "agent"
+    workdir.mkdir()
+    server = AgentServer(("127.0.0.1", 0), str(workdir), SECRET)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"{host}:{port}", workdir
+    server.shutdown()
+    server.server_close()
+
+
+def _connect(address):
+    connection = AgentConnection(address, SECRET, timeout=10)
+    connection.hello()
+    return connection
+
+
+def test_authentication(agent):
+    address, _ = agent
+    connection = _connect(address)
+    assert "cpu_model" in connection.info
+    connection.close()
+
+    intruder = AgentConnection(address, "wrong", timeout=10)
+    with pytest.raises(RuntimeError, match="Authentication failed"):
+        intruder.hello()
+    intruder.close()
+
+
+def test_nothing_is_accepted_before_authentication(agent):
+    address, _ = agent
+    connection = AgentConnection(address, SECRET, timeout=10)
+    send_message(connection.wfile, {"type": "have", "files": {}})
+    assert read_message(connection.rfile) is None
+    connection.close()
+
+
+def test_oversized_frames_are_rejected(agent):
+    address, _ = agent
+    host, port = address.rsplit(":", 1)
+    with socket.create_connection((host, int(port)), timeout=10) as sock:
+        sock.sendall(b"x" * (MAX_AUTH_MESSAGE + 10))
+        assert sock.recv(100) == b""  # closed without buffering the rest
+
+
+def test_read_message_limit(tmp_path):
+    path = tmp_path / "frames"
+    path.write_bytes(json.dumps({"type": "x" * 100}).encode() + b"\n")
+    with open(path, "rb") as f:
+        with pytest.raises(ValueError, match="exceeds"):
+            read_message(f, limit=50)
+    with open(path, "rb") as f:
+        assert read_message(f, limit=500) == {"type": "x" * 100}
+
+
+def test_shipped_file_modes_are_masked(agent):
+    address, workdir = agent
+    connection = _connect(address)
+    data = base64.b64encode(b"#!/bin/sh\n").decode()
+    send_message(connection.wfile, {"type": "file", "name": "tool", "data": data, "mode": 0o6777})
+    assert connection.request({"type": "have", "files": {}}) == {"type": "need", "files": []}
+    assert os.stat(workdir / "tool").st_mode & 0o7777 == 0o755
+    with pytest.raises(RuntimeError, match="Invalid file name"):
+        send_message(connection.wfile, {"type": "file", "name": "../escape", "data": data})
+        connection.receive()
+    connection.close()
+
+
+def test_distributed_run(agent, tmp_path):
+    address, _ = agent
+    local = tmp_path / "local"
+    local.mkdir()
+    program = local / "echo_arg"
+    program.write_text("#!/bin/sh\necho $1\n")
+    program.chmod(0o755)
+    tester = CPerformanceTester(8, lambda: 5, str(local))
+    tester.add_program("echo", "echo_arg", lambda data: [str(data)])
+    with Coordinator([address], timeout=30, secret=SECRET) as coordinator:
+        coordinator.run(tester)
+        assert coordinator.shipped[address] == ["echo_arg"]
+    assert len(tester.results["echo"]) == 8
+    assert len(coordinator.host_results[address]["echo"]) == 8
+
+
+def test_coordinator_needs_a_secret(monkeypatch):
+    monkeypatch.delenv("PERF_AGENT_SECRET", raising=False)
+    with pytest.raises(ValueError, match="secret"):
+        Coordinator(["127.0.0.1:1"])
+    assert auth_mac("a", "n") != auth_mac("b", "n")
+
+
+def test_distributed_run_with_histograms(agent, tmp_path):
+    address, _ = agent
+    local = tmp_path / "local"
+    local.mkdir()
+    program = local / "echo_arg"
+    program.write_text("#!/bin/sh\necho $1\n")
+    program.chmod(0o755)
+    tester = CPerformanceTester(8, lambda: 5, str(local))
+    tester.add_program("echo", "echo_arg", lambda data: [str(data)])
+    coordinator = Coordinator([address, address], timeout=30, secret=SECRET, histogram=LogHistogram())
+    with coordinator:
+        coordinator.run(tester)
+    assert not tester.results and not coordinator.tagged
+    merged = coordinator.histograms["echo"]
+    assert len(merged) == 8 and sum(merged.counts) == 8
+    assert len(coordinator.host_results[address]["echo"]) == 8
+
+
+def test_coordinator_with_a_wrong_secret(agent):
+    address, _ = agent
+    coordinator = Coordinator([address], timeout=10, secret="wrong")
+    with pytest.raises(RuntimeError, match="Authentication failed"):
+        coordinator.connect()
+    coordinator.close()
+
+
+def test_strict_coordinator_rejects_differing_hosts(agent, monkeypatch):
+    address, _ = agent
+    infos = iter([{"cpu_model": "A"}, {"cpu_model": "B"}])
+    monkeypatch.setattr(AgentConnection, "hello", lambda self: next(infos))
+    other = "localhost:" + address.rsplit(":", 1)[1]  # the same agent under a second address
+    coordinator = Coordinator([address, other], strict=True, timeout=10, secret=SECRET)
+    with pytest.raises(RuntimeError, match="Hosts differ in cpu_model"):
+        coordinator.connect()
+    assert coordinator.connections == []
+    assert comparability_issues({"a": {"cores": 4}, "b": {"cores": 4}}) == []
@@ -0,0 +1,69 @@
+import asyncio
+import math
+import os
+import shutil
+
+import pytest
+
+from perf_tester.cperf_test import CPerformanceTester
+from perf_tester.utils import process_utils
+from perf_tester.utils.process_utils import HAS_ASYNC_RUSAGE, OutputDigest, run_child, run_child_async
+
+pytestmark = pytest.mark.skipif(shutil.which("sh") is None, reason="needs sh")
+
+BUSY = ["sh", "-c", "i=0; while [ $i -lt 20000 ]; do i=$((i+1)); done; echo done; exit 3"]
+
+
+def test_run_child_async_matches_run_child():
+    child = asyncio.run(run_child_async(BUSY, stdout_limit=None, digest=(digest := OutputDigest())))
+    reference = run_child(BUSY, stdout_limit=None, digest=(expected := OutputDigest()))
+    assert (child.returncode, child.stdout) == (3, b"done\n") == (reference.returncode, reference.stdout)
+    assert digest.hexdigest() == expected.hexdigest()
+    assert child.wall > 0
+    if HAS_ASYNC_RUSAGE:
+        assert child.user + child.sys > 0
+
+
+def test_run_child_async_limits_output():
+    command = ["sh", "-c", "echo 0123456789; echo oops >&2"]
+    child = asyncio.run(run_child_async(command, stdout_limit=4))
+    assert (child.stdout, child.stderr) == (b"0123", b"oops\n")
+    assert asyncio.run(run_child_async(command, stdout_limit=0)).stdout == b""
+
+
+def test_asyncio_subprocess_fallback(monkeypatch):
+    monkeypatch.setattr(process_utils, "HAS_ASYNC_RUSAGE", False)
+    child = asyncio.run(run_child_async(BUSY, stdout_limit=None))
+    assert (child.returncode, child.stdout) == (3, b"done\n")
+    assert math.isnan(child.user) and math.isnan(child.sys)
+
+
+def _script(directory, name, body):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n" + body)
+    os.chmod(path, 0o755)
+
+
+def test_run_tests_async(tmp_path):
+    _script(tmp_path, "double", 'echo $(($1 * 2))\n')
+    _script(tmp_path, "wrong", 'echo $(($1 * 3))\n')
+    tester = CPerformanceTester(6, lambda: 7, str(tmp_path), validate=True)
+    tester.add_program("double", "double", lambda data: [str(data)])
+    tester.add_program("wrong", "wrong", lambda data: [str(data)])
+    tester.add_program("again", "double", lambda data: [str(data)])
+    assert tester.run_tests_async(concurrency=3) == 3
+    assert {name: len(samples) for name, samples in tester.results.items()} == {
+        "double": 6, "wrong": 6, "again": 6
+    }
+    assert dict(tester.mismatches) == {"wrong": 6}
+    if HAS_ASYNC_RUSAGE:
+        assert len(tester.child_usage["double"]["user"]) == 6
+
+
+def test_run_tests_async_reports_the_command(tmp_path):
+    _script(tmp_path, "fails", "echo broken >&2\nexit 2\n")
+    tester = CPerformanceTester(1, lambda: 1, str(tmp_path))
+    tester.add_program("label", "fails", lambda data: ["arg"])
+    with pytest.raises(Exception, match=r"fails exited with status 2: broken"):
+        tester.run_tests_async()
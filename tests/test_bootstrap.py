@@ -0,0 +1,69 @@
+import random
+from math import isnan
+
+import pytest
+
+from perf_tester import statistics
+from perf_tester.samples import SampleStore
+from perf_tester.statistics import (
+    BootstrapCI,
+    StatsCollection,
+    default_mad,
+    default_median,
+    default_percentile,
+    extended_metrics,
+)
+
+
+def _values(n, seed=4):
+    rng = random.Random(seed)
+    return [rng.gauss(10.0, 1.0) for _ in range(n)]
+
+
+def test_percentiles_and_mad():
+    data = [5.0, 1.0, 3.0, 2.0, 4.0]
+    assert default_median(data) == 3.0
+    assert default_percentile(data, 0) == 1.0 and default_percentile(data, 100) == 5.0
+    assert default_percentile(data, 25) == 2.0
+    assert default_mad(data) == 1.0
+
+
+def test_bootstrap_interval_covers_the_estimate(monkeypatch):
+    monkeypatch.setattr(statistics, "np", None)  # the pure Python path
+    data = _values(400)
+    low, high = BootstrapCI("mean", resamples=500, seed=1).interval(data)
+    mean = sum(data) / len(data)
+    assert low < mean < high
+    assert high - low < 0.5
+    median_low, median_high = BootstrapCI("median", resamples=500, seed=1).interval(data)
+    assert median_low < default_median(data) < median_high
+
+
+def test_bootstrap_is_seeded_and_cached(monkeypatch):
+    monkeypatch.setattr(statistics, "np", None)
+    data = SampleStore(_values(50))
+    ci = BootstrapCI(resamples=200, seed=7)
+    first = ci.interval(data)
+    assert BootstrapCI(resamples=200, seed=7).interval(list(data)) == first
+    calls = []
+    monkeypatch.setattr(ci, "_estimates", lambda values: calls.append(values) or [0.0])
+    assert ci.interval(data) == first  # same data set, not resampled
+    data.append(100.0)
+    ci.interval(data)  # appended samples invalidate the cache
+    assert len(calls) == 1
+
+
+def test_bootstrap_needs_two_samples():
+    assert all(isnan(bound) for bound in BootstrapCI().interval([1.0]))
+    with pytest.raises(ValueError, match="Unsupported bootstrap statistic"):
+        BootstrapCI("mode")
+
+
+def test_extended_metrics_in_the_table(monkeypatch):
+    monkeypatch.setattr(statistics, "np", None)
+    collection = StatsCollection(vectorized=False)
+    collection.register_metrics(extended_metrics(resamples=200))
+    collection.add_all_stats({"a": SampleStore(_values(100))})
+    values = collection.stats["a"].results
+    assert values["avg lo"] < values["avg hi"]
+    assert values["median lo"] <= values["median"] <= values["median hi"]
@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from perf_tester.cli import CACHE_FILE, BuildJob, build_key, plan_builds, run_builds, variant_output
+
+pytestmark = pytest.mark.skipif(shutil.which("gcc") is None, reason="needs gcc")
+
+PROGRAM = '#include <stdio.h>\nint main(void) { printf("%d\\n", VALUE); return 0; }\n'
+
+
+def _source(directory, name, value):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write(PROGRAM.replace("VALUE", str(value)))
+    return path
+
+
+def _output(path):
+    return subprocess.run([path], capture_output=True, text=True).stdout.strip()
+
+
+def test_plan_builds(tmp_path):
+    _source(tmp_path, "b.c", 2)
+    _source(tmp_path, "a.c", 1)
+    (tmp_path / "notes.txt").write_text("")
+    jobs = plan_builds(str(tmp_path), ("-O2",))
+    assert [os.path.basename(job.source) for job in jobs] == ["a.c", "b.c"]
+    assert jobs[0].output == str(tmp_path / "a") and jobs[0].flags == ("-O2",)
+    assert variant_output(jobs[0].source, "O3") == str(tmp_path / "a-O3")
+
+
+def test_unchanged_sources_are_not_rebuilt(tmp_path, capsys):
+    _source(tmp_path, "a.c", 1)
+    jobs = plan_builds(str(tmp_path))
+    assert run_builds(jobs) == jobs
+    assert _output(jobs[0].output) == "1"
+    assert run_builds(jobs) == []
+    with open(tmp_path / CACHE_FILE) as f:
+        assert json.load(f) == {"a": build_key(jobs[0])}
+
+    _source(tmp_path, "a.c", 2)
+    assert run_builds(jobs) == jobs
+    assert _output(jobs[0].output) == "2"
+    flagged = [BuildJob(jobs[0].source, jobs[0].output, ("-O2",))]
+    assert run_builds(flagged) == flagged  # the flags are part of the build key
+
+    os.remove(jobs[0].output)
+    assert run_builds(jobs) == jobs  # a deleted executable is rebuilt
+
+
+def test_failed_builds_are_not_cached(tmp_path, capsys):
+    source = tmp_path / "broken.c"
+    source.write_text("int main(void) { return }\n")
+    jobs = plan_builds(str(tmp_path))
+    assert run_builds(jobs) == []
+    assert "Error compiling" in capsys.readouterr().out
+    with open(tmp_path / CACHE_FILE) as f:
+        assert json.load(f) == {}
@@ -0,0 +1,54 @@
+import ctypes
+import shutil
+
+import pytest
+
+from perf_tester.c_library import SHARED_LIBRARY_SUFFIX, CFunction, compile_shared_library
+from perf_tester.performance_testing import PerformanceTester
+
+pytestmark = pytest.mark.skipif(shutil.which("gcc") is None, reason="needs gcc")
+
+SOURCE = """
+long add(long a, long b) { return a + b; }
+double scale(double x, double factor) { return x * factor; }
+"""
+
+
+@pytest.fixture
+def library(tmp_path):
+    source = tmp_path / "mathlib.c"
+    source.write_text(SOURCE)
+    return compile_shared_library([str(source)])
+
+
+def test_compile_shared_library(library, tmp_path):
+    assert library == str(tmp_path / f"mathlib{SHARED_LIBRARY_SUFFIX}")
+    output = str(tmp_path / "other.so")
+    assert compile_shared_library([str(tmp_path / "mathlib.c")], output, ["-O0"]) == output
+
+
+def test_compile_errors_raise(tmp_path):
+    source = tmp_path / "broken.c"
+    source.write_text("int broken( {\n")
+    with pytest.raises(RuntimeError, match="Error compiling"):
+        compile_shared_library([str(source)])
+
+
+def test_c_function(library):
+    add = CFunction(library, "add", ctypes.c_long, [ctypes.c_long, ctypes.c_long])
+    assert add.__name__ == "add"
+    assert add((2, 40)) == 42
+    scale = CFunction(library, "scale", ctypes.c_double, [ctypes.c_double, ctypes.c_double])
+    assert scale((1.5, 4)) == 6.0
+    with pytest.raises(AttributeError):
+        CFunction(library, "missing")
+
+
+def test_tester_times_c_functions(library):
+    tester = PerformanceTester(4, lambda: 20)
+    tester.add_c_function(
+        "add", library, "add", lambda n: (n, 1), ctypes.c_long, [ctypes.c_long, ctypes.c_long]
+    )
+    tester.add_function("python add", lambda args: args[0] + args[1], lambda n: (n, 1))
+    tester.compare_performance()
+    assert len(tester.results["add"]) == 4 and len(tester.results["python add"]) == 4
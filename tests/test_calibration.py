@@ -0,0 +1,48 @@
+from perf_tester import calibration
+from perf_tester.calibration import autorange, empty_call_overhead, time_drain, time_loop, timer_overhead
+from perf_tester.performance_testing import PerformanceTester
+
+
+def test_time_loop_calls_number_times():
+    calls = []
+    assert time_loop(calls.append, 1, 25) >= 0
+    assert calls == [1] * 25
+
+
+def test_autorange_follows_the_1_2_5_sequence(monkeypatch):
+    numbers = []
+
+    def fake_loop(func, special_data, number):
+        numbers.append(number)
+        return number * 1e-3  # every call takes exactly 1 ms
+
+    monkeypatch.setattr(calibration, "time_loop", fake_loop)
+    assert autorange(None, None, 0.004) == 5
+    assert numbers == [1, 2, 5]
+    assert autorange(None, None, 0.15) == 200
+    assert autorange(None, None, 0.0) == 1
+
+
+def test_overheads_are_small_and_positive():
+    overhead = timer_overhead(1000)
+    assert 0 <= overhead < 1e-4
+    python_call = empty_call_overhead(lambda x: x, 1, 1000, overhead)
+    builtin_call = empty_call_overhead(abs, 1, 1000, overhead)
+    assert python_call < 1e-5 and builtin_call < 1e-5
+
+
+def test_time_drain():
+    assert time_drain(42) == 0.0
+    generator = (i for i in range(1000))
+    assert time_drain(generator) > 0
+    assert next(generator, None) is None
+
+
+def test_calibrated_run():
+    tester = PerformanceTester(3, lambda: 5)
+    tester.add_function("neg", lambda x: -x, lambda data: data)
+    tester.compare_performance(calibrate=True, min_sample_time=1e-4)
+    assert tester.loops["neg"] > 1
+    assert len(tester.results["neg"]) == 3
+    assert tester.stats_collection.info["neg"]["loops"] == str(tester.loops["neg"])
+    assert any(note.startswith("Subtracted timer overhead") for note in tester.stats_collection.notes)
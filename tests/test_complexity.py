@@ -0,0 +1,72 @@
+import csv
+
+import pytest
+
+from perf_tester.adaptive import AdaptiveConfig
+from perf_tester.complexity import SweepResult, crossover_points, fit_complexity
+from perf_tester.performance_testing import PerformanceTester
+from perf_tester.samples import SampleStore
+
+NS = [10.0, 100.0, 1000.0, 10000.0]
+
+
+def test_fit_complexity_picks_the_model():
+    assert fit_complexity(NS, [2e-6 * n + 1e-6 for n in NS])[0].model == "O(n)"
+    assert fit_complexity(NS, [1e-9 * n * n for n in NS])[0].model == "O(n^2)"
+    assert fit_complexity(NS, [5e-6] * 4)[0].model == "O(1)"
+    power = fit_complexity(NS, [1e-8 * n**1.5 for n in NS])[0]
+    assert power.describe() == "O(n^1.50)"
+
+
+def test_fit_complexity_needs_three_sizes():
+    with pytest.raises(ValueError, match="three input sizes"):
+        fit_complexity(NS[:2], [1.0, 2.0])
+
+
+def test_crossover_points():
+    linear, quadratic = fit_complexity(NS, [1e-6 * n for n in NS])[0], fit_complexity(NS, [1e-8 * n * n for n in NS])[0]
+    (point,) = crossover_points(linear, quadratic, 1.0, 1e6)
+    assert point == pytest.approx(100.0, rel=1e-3)
+
+
+def test_sweep_result_fits_only_measured_sizes(tmp_path, capsys):
+    result = SweepResult(["a", "b", "c", "d"], NS)
+    for size, n in zip(result.sizes, NS):
+        result.add("linear", size, SampleStore([1e-6 * n]))
+    # "sparse" got no samples at size "b" (e.g. all dropped as noisy)
+    for size, n in [("a", 10.0), ("c", 1000.0), ("d", 10000.0)]:
+        result.add("sparse", size, SampleStore([1e-9 * n * n]))
+    result.add("sparse", "b", SampleStore())
+    result.add("short", "a", SampleStore([1.0]))
+    result.fit()
+    assert result.best("linear").model == "O(n)"
+    assert result.best("sparse").model == "O(n^2)"
+    assert result.medians("sparse") == pytest.approx([1e-7, 1e-3, 1e-1])
+    assert result.unfitted == ["short"]
+    result.print_tables()
+    assert "Not fitted (measured at fewer than three sizes): short" in capsys.readouterr().out
+    path = tmp_path / "sweep.csv"
+    result.write_csv(str(path))
+    with open(path) as f:
+        rows = list(csv.DictReader(f))
+    assert [row["size"] for row in rows if row["label"] == "sparse"] == ["a", "c", "d"]
+    assert [row["fit_model"] for row in rows if row["label"] == "short"] == [""]
+
+
+def _tester():
+    tester = PerformanceTester(3, lambda: 0)
+    tester.add_function("sum", sum, lambda data: data)
+    return tester
+
+
+def test_sweep_runs_in_the_selected_mode():
+    tester = _tester()
+    result = tester.sweep([1000, 2000, 4000], lambda n: range(n), adaptive=AdaptiveConfig(min_samples=5, max_samples=5))
+    assert [len(store) for _, _, store in result.measured("sum")] == [5, 5, 5]
+    assert tester.stop_reasons["sum"]
+    assert list(tester.results) == []  # the tester's results are restored
+
+
+def test_sweep_rejects_combined_modes():
+    with pytest.raises(ValueError, match="cannot be combined"):
+        _tester().sweep([1, 2, 3], lambda n: range(n), parallel=True, prefetch="thread")
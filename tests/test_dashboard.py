@@ -0,0 +1,57 @@
+import io
+
+from perf_tester.samples import SampleStore
+from perf_tester.utils.dashboard import Dashboard
+
+
+def _dashboard(results, **kwargs):
+    stream = io.StringIO()
+    return Dashboard(10, results, list(results), stream=stream, enabled=True, **kwargs), stream
+
+
+def test_first_draw_appends_rows():
+    results = {"a": SampleStore([1e-3]), "b": SampleStore()}
+    dashboard, stream = _dashboard(results)
+    dashboard.update(3)
+    dashboard._draw()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2  # labels without samples are not shown yet
+    assert "3/10 (30.00%)" in lines[0]
+    assert lines[1].startswith("a ") and "n=1" in lines[1] and "ms" in lines[1]
+
+
+def test_only_changed_rows_are_redrawn():
+    results = {"a": SampleStore([1.0]), "b": SampleStore([2.0])}
+    dashboard, stream = _dashboard(results)
+    dashboard._draw()
+    stream.seek(0)
+    stream.truncate()
+    results["b"].append(2.0)
+    dashboard._draw()
+    output = stream.getvalue()
+    assert "n=2" in output and "a " not in output
+    assert "\033[1A\r\033[2K" in output  # b is the last of three rows: one row up
+    assert dashboard._lines[2].startswith("b ") and "n=2" in dashboard._lines[2]
+
+
+def test_rows_beyond_the_terminal_are_summarized():
+    results = {f"label{i}": SampleStore([1.0]) for i in range(5)}
+    dashboard, stream = _dashboard(results)
+    dashboard._max_rows = 2
+    dashboard._draw()
+    assert len(dashboard._row_of) == 2
+    assert dashboard._lines[-1] == "... 3 more label(s)"
+
+
+def test_final_draw_completes_the_bar():
+    dashboard, stream = _dashboard({}, refresh=0.01)
+    with dashboard:
+        dashboard.step()
+    assert "10/10 (100.00%)" in dashboard._lines[0]
+
+
+def test_disabled_without_a_terminal():
+    stream = io.StringIO()
+    with Dashboard(5, {"a": SampleStore([1.0])}, ["a"], stream=stream) as dashboard:
+        dashboard.step()
+    assert not dashboard.enabled and stream.getvalue() == ""
@@ -0,0 +1,93 @@
+import gc
+import os
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from perf_tester import isolation
+from perf_tester.isolation import GcMonitor, IsolationConfig, run_forked
+from perf_tester.performance_testing import PerformanceTester
+
+needs_fork = pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+
+def test_config_validation():
+    with pytest.raises(ValueError, match="Unknown gc mode"):
+        IsolationConfig(gc="off")
+    assert IsolationConfig(fork=True).describe().endswith("one forked worker per function")
+
+
+def test_gc_monitor_counts_collections_in_calls():
+    was_enabled = gc.isenabled()
+    monitor = GcMonitor("disable")
+    monitor.install()
+    try:
+        assert not gc.isenabled()
+        for func in (gc.collect, lambda: None):
+            begin = monitor.begin()
+            func()
+            monitor.end("f", begin)
+    finally:
+        monitor.uninstall()
+    assert gc.isenabled() == was_enabled
+    assert gc.callbacks.count(monitor._callback) == 0
+    series = monitor.series["f"]
+    assert list(series["gc_runs"]) == [1, 0]
+    assert series["gc_pause"][0] > 0 and series["gc_pause"][1] == 0
+    assert len(series["gc_between"]) == 2
+
+
+def test_gc_monitor_track_mode_does_not_collect():
+    monitor = GcMonitor("track")
+    monitor.install()
+    try:
+        monitor.end("f", monitor.begin())
+    finally:
+        monitor.uninstall()
+    assert "gc_between" not in monitor.series["f"]
+
+
+@needs_fork
+def test_run_forked_round_trip(monkeypatch):
+    created = []
+
+    def shared_memory(*args, **kwargs):
+        block = SharedMemory(*args, **kwargs)
+        created.append(block.name)
+        return block
+
+    monkeypatch.setattr(isolation, "SharedMemory", shared_memory)
+    data = [list(range(i, i + 1000)) for i in range(5)]
+    seen = []
+
+    def total(values):
+        seen.append(sum(values))
+
+    timings, series = run_forked([("sum", lambda d: d, total), ("len", lambda d: d, len)], data)
+    assert set(timings) == {"sum", "len"}
+    assert all(len(times) == 5 and min(times) >= 0 for times in timings.values())
+    assert set(series["sum"]) == {"gc_runs", "gc_pause", "gc_between"}
+    assert seen == []  # the functions ran in the workers
+    (name,) = created
+    with pytest.raises(FileNotFoundError):  # the shared memory block is unlinked
+        SharedMemory(name)
+
+
+@needs_fork
+def test_run_forked_reports_worker_errors():
+    def fail(_):
+        raise ValueError("bad input")
+
+    with pytest.raises(RuntimeError, match="Forked worker for fail failed: ValueError: bad input"):
+        run_forked([("fail", lambda d: d, fail)], [1])
+    with pytest.raises(RuntimeError, match="worker exited with code 4"):
+        run_forked([("exit", lambda d: d, lambda _: os._exit(4))], [1])
+
+
+@needs_fork
+def test_tester_forked_isolation():
+    tester = PerformanceTester(3, lambda: 7)
+    tester.add_function("square", lambda x: x * x, lambda data: data)
+    tester.compare_performance(isolation=IsolationConfig(gc="collect", fork=True))
+    assert len(tester.results["square"]) == 3
+    assert tester.stats_collection.info["square"]["gc runs"] == "0"
+    assert IsolationConfig(gc="collect", fork=True).describe() in tester.stats_collection.notes
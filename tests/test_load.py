@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from perf_tester.load import LoadConfig, run_load
+from perf_tester.performance_testing import PerformanceTester
+
+
+def test_config_validation():
+    with pytest.raises(ValueError, match="exactly one"):
+        LoadConfig(1.0)
+    with pytest.raises(ValueError, match="exactly one"):
+        LoadConfig(1.0, rate=10, concurrency=2)
+    with pytest.raises(ValueError, match="positive"):
+        LoadConfig(0.0, rate=10)
+    with pytest.raises(ValueError, match="at least 1"):
+        LoadConfig(1.0, concurrency=0)
+    assert LoadConfig(2, rate=50).describe() == "open loop at 50 req/s for 2 s"
+
+
+def test_open_loop_counts_coordinated_omission():
+    calls = []
+
+    def call(_):
+        calls.append(None)
+        if len(calls) == 1:
+            time.sleep(0.05)  # a stall delays the requests scheduled behind it
+
+    result = run_load(call, [None], LoadConfig(0.1, rate=200))
+    assert len(result.latencies) == len(calls) == 20
+    assert max(result.service) >= 0.05 > sorted(result.service)[-2]
+    # requests scheduled during the stall waited for it: their latency includes the wait
+    assert sum(latency > 0.02 for latency in result.latencies) >= 5
+    assert result.throughput == pytest.approx(20 / result.elapsed)
+
+
+def test_closed_loop_uses_every_caller():
+    inputs = list(range(4))
+    seen = set()
+    result = run_load(lambda x: seen.add(x) or time.sleep(0.001), inputs, LoadConfig(0.05, concurrency=3))
+    assert len(result.latencies) > 3 and list(result.latencies) == list(result.service)
+    assert seen == set(inputs)
+
+
+def test_coroutines_run_on_the_given_loop():
+    async def call(_):
+        await asyncio.sleep(0.01)
+
+    loop = asyncio.new_event_loop()
+    try:
+        closed = run_load(call, [None], LoadConfig(0.05, concurrency=4), loop)
+        opened = run_load(call, [None], LoadConfig(0.05, rate=100), loop)
+    finally:
+        loop.close()
+    # 4 concurrent callers overlap their sleeps
+    assert len(closed.latencies) >= 12
+    assert len(opened.latencies) == 5 and min(opened.service) >= 0.009
+    with pytest.raises(ValueError, match="event loop"):
+        run_load(call, [None], LoadConfig(0.05, rate=100))
+    with pytest.raises(ValueError, match="at least one input"):
+        run_load(call, [], LoadConfig(0.05, rate=100))
+
+
+def test_tester_load_mode():
+    tester = PerformanceTester(8, lambda: 3)
+    tester.add_function("neg", lambda x: -x, lambda data: data)
+    tester.compare_performance(load=LoadConfig(0.05, rate=100))
+    assert len(tester.results["neg"]) == 5
+    assert tester.stats_collection.info["neg"]["throughput"].endswith("req/s")
+    assert "Load mode: open loop at 100 req/s for 0.05 s" in tester.stats_collection.notes
@@ -0,0 +1,68 @@
+import os
+import shutil
+import sys
+import tracemalloc
+
+import pytest
+
+from perf_tester.cli import BuildJob, run_builds
+from perf_tester.memory import (
+    _RSS_LAUNCHER_C,
+    build_rss_launcher,
+    measure_allocations,
+    measure_peak_rss,
+    write_launcher_source,
+)
+
+needs_gcc = pytest.mark.skipif(
+    shutil.which("gcc") is None or not hasattr(os, "wait4"), reason="needs gcc and wait4"
+)
+
+
+def test_measure_allocations():
+    tracemalloc.start()
+    try:
+        peak, net = measure_allocations(lambda n: bytearray(n), 1_000_000)
+        temporary_peak, temporary_net = measure_allocations(lambda n: len(bytearray(n)), 1_000_000)
+    finally:
+        tracemalloc.stop()
+    assert peak >= 1_000_000 and net >= 1_000_000  # the result is still referenced
+    assert temporary_peak >= 1_000_000 and temporary_net < 1_000_000
+
+
+def test_launcher_source_rewritten_when_content_differs(tmp_path):
+    path = str(tmp_path / "rss_launcher.c")
+    assert write_launcher_source(path)
+    assert not write_launcher_source(path)
+    with open(path, "w") as f:
+        f.write("/* launcher of an older version */\nint main(void) { return 0; }\n")
+    assert write_launcher_source(path)
+    with open(path) as f:
+        assert f.read() == _RSS_LAUNCHER_C
+    assert os.listdir(tmp_path) == ["rss_launcher.c"]
+
+
+@needs_gcc
+def test_stale_launcher_is_rebuilt(tmp_path):
+    launcher_dir = tmp_path / ".perf_launcher"
+    launcher_dir.mkdir()
+    source, output = str(launcher_dir / "rss_launcher.c"), str(launcher_dir / "rss_launcher")
+    with open(source, "w") as f:
+        f.write("int main(void) { return 0; }\n")  # launcher of an older version
+    run_builds([BuildJob(source, output, ("-O2",))])
+    stale = os.stat(output).st_mtime_ns
+    assert build_rss_launcher(str(tmp_path)) == output
+    assert os.stat(output).st_mtime_ns != stale
+    rebuilt = os.stat(output).st_mtime_ns
+    assert build_rss_launcher(str(tmp_path)) == output
+    assert os.stat(output).st_mtime_ns == rebuilt  # unchanged source, cached build
+    assert measure_peak_rss(output, ["true"]) > 0
+
+
+@needs_gcc
+def test_measure_peak_rss(tmp_path):
+    launcher = build_rss_launcher(str(tmp_path))
+    small = measure_peak_rss(launcher, [sys.executable, "-c", "pass"])
+    large = measure_peak_rss(launcher, [sys.executable, "-c", "x = b'1' * 200_000_000"])
+    assert 0 < small < large
+    assert large - small > 100_000_000
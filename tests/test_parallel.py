@@ -0,0 +1,67 @@
+import pytest
+
+from perf_tester.adaptive import AdaptiveConfig
+from perf_tester.isolation import IsolationConfig
+from perf_tester.parallel import split_blocks
+from perf_tester.performance_testing import PerformanceTester
+from perf_tester.profiling import OutlierProfiler
+from perf_tester.statistics import LogHistogram
+
+
+def _tester(num_tests=20):
+    tester = PerformanceTester(num_tests, lambda: 3)
+    tester.add_function("square", lambda n: n * n, lambda data: data)
+    tester.add_function("sum", lambda n: sum(range(n)), lambda data: data)
+    return tester
+
+
+@pytest.mark.parametrize("length,blocks", [(10, 3), (2, 5), (7, 1), (0, 4)])
+def test_split_blocks(length, blocks):
+    data = list(range(length))
+    split = split_blocks(data, blocks)
+    assert [item for block in split for item in block] == data
+    assert len(split) == max(1, min(blocks, length))
+    sizes = [len(block) for block in split]
+    assert max(sizes) - min(sizes) <= 1
+
+
+def test_parallel_run_times_every_input():
+    tester = _tester()
+    workers = tester.run_tests_parallel(workers=2)
+    assert 1 <= workers <= 2
+    assert {name: len(samples) for name, samples in tester.results.items()} == {"square": 20, "sum": 20}
+    assert all(value >= 0 for samples in tester.results.values() for value in samples)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"parallel": True, "adaptive": AdaptiveConfig()},
+        {"calibrate": True, "prefetch": "thread"},
+        {"isolation": IsolationConfig(fork=True), "parallel": True},
+    ],
+)
+def test_run_modes_cannot_be_combined(options):
+    tester = _tester()
+    with pytest.raises(ValueError, match="cannot be combined"):
+        tester.compare_performance(**options)
+    assert not tester.results
+
+
+def test_profiler_needs_a_measured_mode(tmp_path):
+    tester = _tester()
+    with pytest.raises(ValueError, match="profiler"):
+        tester.compare_performance(parallel=True, profiler=OutlierProfiler(str(tmp_path)))
+
+
+def test_parallel_run_merges_histograms():
+    tester = _tester(num_tests=30)
+    tester.run_tests_parallel(workers=2, histogram=LogHistogram(significant_digits=3))
+    assert not tester.results
+    assert {name: len(histogram) for name, histogram in tester.histograms.items()} == {"square": 30, "sum": 30}
+    assert all(histogram.significant_digits == 3 for histogram in tester.histograms.values())
+
+
+def test_histogram_needs_parallel_mode():
+    with pytest.raises(ValueError, match="histogram"):
+        _tester().compare_performance(histogram=LogHistogram())
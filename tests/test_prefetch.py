@@ -0,0 +1,82 @@
+import itertools
+import os
+
+import pytest
+
+from perf_tester import prefetch
+from perf_tester.performance_testing import PerformanceTester
+from perf_tester.prefetch import InputPrefetcher
+
+
+@pytest.fixture(autouse=True)
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(prefetch, "POLL_INTERVAL", 0.05)
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_prefetched_inputs_in_order(mode):
+    counter = itertools.count()
+    entries = [("double", lambda x: 2 * x), ("text", str)]
+    items = list(InputPrefetcher(lambda: next(counter), entries, 5, mode=mode))
+    assert [item.special_data for item in items] == [[2 * i, str(i)] for i in range(5)]
+    assert all(len(item.prep_times) == 2 and item.gen_time >= 0 for item in items)
+
+
+def test_pure_data_functions_are_memoized():
+    calls = []
+
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    inputs = iter([1, 2, 1, 1, [3]])
+    entries = [("square", square)]
+    items = list(InputPrefetcher(lambda: next(inputs), entries, 4, pure={"square"}))
+    assert [item.special_data[0] for item in items] == [1, 4, 1, 1]
+    assert calls == [1, 2]
+    with pytest.raises(TypeError):  # unhashable input: computed, not memoized
+        list(InputPrefetcher(lambda: [3], entries, 1, pure={"square"}))
+
+
+def test_producer_exception_is_raised():
+    def generate():
+        raise KeyError("broken generator")
+
+    with pytest.raises(KeyError, match="broken generator"):
+        list(InputPrefetcher(generate, [], 3))
+
+
+def test_producer_death_raises_instead_of_hanging():
+    counter = itertools.count()
+
+    def generate():
+        if next(counter) == 2:
+            os._exit(3)  # the forked producer dies without reporting
+        return 0
+
+    items = []
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        for item in InputPrefetcher(generate, [], 5, mode="process"):
+            items.append(item)
+    assert len(items) <= 2  # items still in the queue's feeder thread die with the producer
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_consumer_stopping_early_releases_the_producer(mode):
+    prefetcher = InputPrefetcher(lambda: 0, [], 1000, mode=mode, depth=1)
+    for _ in prefetcher:
+        break  # the finally clause stops and joins the producer
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError, match="Unknown prefetch mode"):
+        InputPrefetcher(lambda: 0, [], 1, mode="fiber")
+
+
+def test_tester_prefetch_mode():
+    tester = PerformanceTester(4, lambda: 3)
+    tester.add_function("neg", lambda x: -x, lambda data: data)
+    tester.compare_performance(prefetch="thread")
+    assert len(tester.results["neg"]) == 4
+    assert len(tester.generator_times) == 4 and len(tester.prep_times["neg"]) == 4
+    assert any(note.startswith("Input generation") for note in tester.stats_collection.notes)
@@ -0,0 +1,84 @@
+import os
+import sys
+
+import pytest
+
+from perf_tester.performance_testing import PerformanceTester
+from perf_tester.profiling import OutlierKeeper, OutlierProfiler, collapse_perf_script, collapsed_name
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs signal.setitimer")
+
+
+def _native(data):
+    for _ in range(20):
+        sorted(data, reverse=True)
+
+
+def _python(n):
+    total = 0
+    for i in range(n):
+        total += i
+    return total
+
+
+def _read_stacks(path):
+    stacks = {}
+    with open(path) as f:
+        for line in f:
+            stack, count = line.rsplit(" ", 1)
+            stacks[stack] = int(count)
+    return stacks
+
+
+def test_outlier_keeper_keeps_slowest():
+    evicted = []
+    keeper = OutlierKeeper(2, on_evict=evicted.append)
+    for elapsed in (1.0, 5.0, 2.0, 4.0):
+        keeper.offer("a", elapsed, f"p{elapsed:g}")
+    assert sorted(evicted) == ["p1", "p2"]
+    assert sorted(keeper.outliers("a", [1.0, 2.0, 4.0, 5.0], 50)) == ["p4", "p5"]
+    assert "a" not in keeper.heaps
+
+
+def test_collapse_perf_script():
+    output = "prog 1 1.0: cycles:\n\t1 inner+0x4 (/bin/prog)\n\t2 outer (/bin/prog)\n\nprog 1 2.0: cycles:\n\t1 inner+0x8 (/bin/prog)\n\t2 outer (/bin/prog)\n"
+    assert collapse_perf_script(output) == {"outer;inner": 2}
+
+
+def test_collapsed_name():
+    assert collapsed_name("sort (n=10)") == "sort_n_10.collapsed"
+
+
+def _profile(tmp_path, name, func, data):
+    tester = PerformanceTester(5, lambda: data)
+    tester.add_function(name, func, lambda d: d)
+    profiler = OutlierProfiler(str(tmp_path), percentile=0, interval=0.0005, wall=True)
+    tester.compare_performance(profiler=profiler)
+    return profiler, _read_stacks(os.path.join(tmp_path, collapsed_name(name)))
+
+
+def test_native_ticks_are_attributed_to_the_calling_frame(tmp_path):
+    _, stacks = _profile(tmp_path, "native", _native, list(range(200_000)))
+    assert stacks
+    for stack in stacks:
+        frames = stack.split(";")
+        assert frames[0] == "test_profiling.py:_native"
+        assert "[native]" not in frames[:-1]
+    assert any(stack.endswith(";[native]") for stack in stacks)
+
+
+def test_python_ticks_have_no_native_leaf(tmp_path):
+    _, stacks = _profile(tmp_path, "python", _python, 300_000)
+    assert "test_profiling.py:_python" in stacks
+    assert stacks["test_profiling.py:_python"] >= sum(stacks.values()) // 2
+
+
+def test_harness_ticks_are_dropped(tmp_path):
+    # A builtin has no frame of its own, so its ticks are seen in the timing frame
+    tester = PerformanceTester(3, lambda: list(range(300_000)))
+    tester.add_function("builtin", sorted, lambda d: d)
+    builtin_profiler = OutlierProfiler(str(tmp_path), percentile=0, interval=0.0005, wall=True)
+    tester.compare_performance(profiler=builtin_profiler)
+    assert builtin_profiler.harness_ticks["builtin"] > 0
+    assert builtin_profiler.unsampled == ["builtin"]
+    assert any("dropped (builtin:" in note for note in tester.stats_collection.notes)
@@ -0,0 +1,67 @@
+from math import isnan
+
+import pytest
+
+from perf_tester.regression import (
+    MISSING,
+    NEW,
+    SLOWER,
+    UNCHANGED,
+    compare_runs,
+    exit_status,
+    mann_whitney_u,
+    weighted_mann_whitney_u,
+)
+from perf_tester.statistics import LogHistogram
+
+
+def test_mann_whitney_u_known_values():
+    # scipy.stats.mannwhitneyu(x, y, method="asymptotic"), continuity corrected
+    u, p = mann_whitney_u([19, 22, 16, 29, 24], [20, 11, 17, 12])
+    assert u == 17.0
+    assert p == pytest.approx(0.11134688653314041, rel=1e-9)
+
+    u, p = mann_whitney_u([1, 2, 3, 4, 5], [6, 7, 8, 9, 10])
+    assert u == 0.0
+    assert p == pytest.approx(0.012185780355344813, rel=1e-9)
+
+
+def test_mann_whitney_u_ties():
+    # U counts ties as one half: 3 + 3 * 0.5 pairs of x above y
+    u, p = mann_whitney_u([1, 2, 2, 3], [2, 2, 3, 4])
+    brute = sum((a > b) + 0.5 * (a == b) for a in [1, 2, 2, 3] for b in [2, 2, 3, 4])
+    assert u == brute
+    assert 0 < p <= 1
+
+    u, p = mann_whitney_u([1.0, 1.0], [1.0, 1.0])
+    assert (u, p) == (2.0, 1.0)
+
+
+def test_mann_whitney_u_empty():
+    u, p = mann_whitney_u([], [1.0])
+    assert isnan(u) and isnan(p)
+
+
+def test_weighted_matches_expanded():
+    x = [(1.0, 3), (2.0, 1), (5.0, 2)]
+    y = [(1.0, 1), (3.0, 4)]
+    expanded_x = [v for v, c in x for _ in range(c)]
+    expanded_y = [v for v, c in y for _ in range(c)]
+    assert weighted_mann_whitney_u(x, y) == pytest.approx(mann_whitney_u(expanded_x, expanded_y))
+
+
+def test_compare_runs_verdicts():
+    baseline = {"same": [1.0, 1.1, 0.9] * 20, "slow": [1.0, 1.1, 0.9] * 20, "gone": [1.0]}
+    current = {"same": [1.0, 1.1, 0.9] * 20, "slow": [2.0, 2.1, 1.9] * 20, "new": [1.0]}
+    verdicts = {c.label: c.verdict for c in compare_runs(baseline, current)}
+    assert verdicts == {"same": UNCHANGED, "slow": SLOWER, "gone": MISSING, "new": NEW}
+    assert exit_status(compare_runs(baseline, current)) != 0
+    assert exit_status(compare_runs(baseline, {"same": current["same"]})) == 0
+
+
+def test_compare_runs_with_histogram():
+    baseline = {"a": [1.0 + i * 1e-3 for i in range(200)]}
+    current = {"a": LogHistogram.from_values([2.0 + i * 1e-3 for i in range(200)])}
+    (comparison,) = compare_runs(baseline, current)
+    assert comparison.verdict == SLOWER
+    assert comparison.current == pytest.approx(2.1, rel=0.02)
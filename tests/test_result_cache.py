@@ -0,0 +1,86 @@
+import importlib
+import sys
+import textwrap
+
+import pytest
+
+from perf_tester.result_cache import ResultCache, callable_hash
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    """Writes modules into tmp_path and (re)imports them by name."""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    names = []
+
+    def write(name, source):
+        (tmp_path / f"{name}.py").write_text(textwrap.dedent(source))
+        importlib.invalidate_caches()
+        if name in sys.modules:
+            return importlib.reload(sys.modules[name])
+        names.append(name)
+        return importlib.import_module(name)
+
+    yield write
+    for name in names:
+        sys.modules.pop(name, None)
+
+
+def test_hash_changes_with_module_callee(modules):
+    modules("fp_algo", "def work(n):\n    return n + 1\n")
+    bench = modules(
+        "fp_bench",
+        """
+        import fp_algo
+        from fp_algo import work
+
+        def by_module(n):
+            return fp_algo.work(n)
+
+        def by_name(n):
+            return work(n)
+        """,
+    )
+    before = callable_hash(bench.by_module), callable_hash(bench.by_name)
+    assert before == (callable_hash(bench.by_module), callable_hash(bench.by_name))
+
+    modules("fp_algo", "def work(n):\n    return n + 2\n")
+    after = callable_hash(bench.by_module), callable_hash(bench.by_name)
+    assert after[0] != before[0]
+    assert after[1] != before[1]
+
+
+def test_hash_changes_with_transitive_callee(modules):
+    modules("fp_inner", "def inner(n):\n    return n\n")
+    modules("fp_outer", "import fp_inner\n\ndef work(n):\n    return fp_inner.inner(n)\n")
+    bench = modules("fp_bench2", "import fp_outer\n\ndef bench(n):\n    return fp_outer.work(n)\n")
+    before = callable_hash(bench.bench)
+    modules("fp_inner", "def inner(n):\n    return -n\n")
+    assert callable_hash(bench.bench) != before
+
+
+def test_hash_ignores_comments_of_own_module(modules):
+    source = """
+    def helper(n):
+        return n * 2
+
+    def bench(n):
+        return helper(n)
+    """
+    bench = modules("fp_own", source)
+    before = callable_hash(bench.bench)
+    bench = modules("fp_own", "# a comment\n" + textwrap.dedent(source))
+    assert callable_hash(bench.bench) == before
+    bench = modules("fp_own", textwrap.dedent(source).replace("n * 2", "n * 3"))
+    assert callable_hash(bench.bench) != before
+
+
+def test_cache_needs_a_seed(tmp_path):
+    unseeded = ResultCache(str(tmp_path / "a"))
+    unseeded.put("key", "label", [1.0, 2.0])
+    assert unseeded.get("key") is None
+
+    seeded = ResultCache(str(tmp_path / "b"), seed=1)
+    seeded.put("key", "label", [1.0, 2.0])
+    seeded.save()
+    assert list(ResultCache(str(tmp_path / "b"), seed=1).get("key")) == [1.0, 2.0]
@@ -0,0 +1,85 @@
+import multiprocessing as mp
+
+import pytest
+
+from perf_tester.performance_testing import PerformanceTester
+from perf_tester.result_store import ResultStore
+from perf_tester.samples import RecordingResults, SampleStore
+
+
+def test_run_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path))
+    with store.open_run({"tester": "test"}, lambda label: {"group": label[0]}) as writer:
+        for i in range(10):
+            writer.append("a", float(i))
+        writer.append("b", 0.5)
+    assert list(store.load(writer.run_id, "a")) == [float(i) for i in range(10)]
+    assert list(store.load(writer.run_id, "b")) == [0.5]
+    assert store.labels(writer.run_id) == {"a": {"group": "a"}, "b": {"group": "b"}}
+    assert store.latest_run(tester="test")["run"] == writer.run_id
+    assert store.latest_run(tester="other") is None
+    store.close()
+
+
+def test_segments_are_merged(tmp_path):
+    store = ResultStore(str(tmp_path))
+    first = store.open_run()
+    first.chunk = 3
+    second = store.open_run()
+    for i in range(7):
+        first.append("a", float(i))
+        second.append("a", -float(i))
+    first.close()
+    second.close()
+    assert list(store.load(first.run_id, "a")) == [float(i) for i in range(7)]
+    assert list(store.load(second.run_id, "a")) == [-float(i) for i in range(7)]
+    store.close()
+
+
+def _write_run(path: str, sign: float) -> None:
+    store = ResultStore(path)
+    with store.open_run({"sign": sign}) as writer:
+        writer.chunk = 16
+        for i in range(1000):
+            writer.append("x", sign * i)
+
+
+def test_concurrent_writers_do_not_interleave(tmp_path):
+    ctx = mp.get_context("spawn")
+    workers = [ctx.Process(target=_write_run, args=(str(tmp_path), sign)) for sign in (1.0, -1.0)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    store = ResultStore(str(tmp_path))
+    for run in store.runs():
+        assert list(store.load(run["run"], "x")) == [run["sign"] * i for i in range(1000)]
+    store.close()
+
+
+def test_existing_samples_are_not_recorded_again():
+    recorded = []
+    results = RecordingResults(lambda label, value: recorded.append((label, value)), {"a": SampleStore([1.0])})
+    results["a"].append(2.0)
+    results["b"].append(3.0)
+    assert list(results["a"]) == [1.0, 2.0]
+    assert recorded == [("a", 2.0), ("b", 3.0)]
+
+
+def _fail(_):
+    raise RuntimeError("benchmark failed")
+
+
+def test_writer_closed_when_a_benchmark_raises(tmp_path):
+    store = ResultStore(str(tmp_path))
+    tester = PerformanceTester(3, lambda: 1)
+    tester.add_function("ok", lambda x: x, lambda data: data)
+    tester.add_function("fails", _fail, lambda data: data)
+    run_id = tester.record_to(store)
+    writer = tester.run_writer
+    with pytest.raises(RuntimeError):
+        tester.compare_performance()
+    assert tester.run_writer is None and writer._data.closed
+    assert list(store.load(run_id, "ok")) == list(tester.results["ok"])
+    store.close()
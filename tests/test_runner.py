@@ -0,0 +1,75 @@
+import os
+
+from perf_tester.runner import Suite, bench_names, discover, run_suite, run_suites
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SUITE = """
+from perf_tester.performance_testing import PerformanceTester
+
+
+def bench_double():
+    tester = PerformanceTester(3, lambda: 2)
+    tester.add_function("double", lambda x: x * 2, lambda data: data)
+    return tester
+
+
+def helper():
+    pass
+"""
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_bench_names():
+    path = os.path.join(REPO, "perf-test", "prime_fac", "prim_test.py")
+    assert bench_names(path) == ["bench_prime_factorization"]
+
+
+def test_discover_finds_the_example():
+    suites = discover([os.path.join(REPO, "perf-test")])
+    assert [suite.name for suite in suites] == ["bench_prime_factorization"]
+
+
+def test_discover_file_patterns(tmp_path):
+    _write(tmp_path / "bench_a.py", SUITE)
+    _write(tmp_path / "b_bench.py", SUITE)
+    _write(tmp_path / "sub" / "c_test.py", SUITE)
+    _write(tmp_path / "plain_test.py", "def test_nothing():\n    pass\n")
+    _write(tmp_path / "other.py", SUITE)
+    _write(tmp_path / "__pycache__" / "bench_cached.py", SUITE)
+    found = sorted(os.path.basename(suite.path) for suite in discover([str(tmp_path)]))
+    assert found == ["b_bench.py", "bench_a.py", "c_test.py"]
+    explicit = discover([str(tmp_path / "other.py")])
+    assert [suite.name for suite in explicit] == ["bench_double"]
+
+
+def test_discover_selection(tmp_path):
+    _write(tmp_path / "bench_a.py", SUITE + "\nbench_other = None\n")
+    assert [s.name for s in discover([f"{tmp_path / 'bench_a.py'}::bench_other"])] == ["bench_other"]
+    assert [s.name for s in discover([str(tmp_path)], pattern="*double")] == ["bench_double"]
+
+
+def test_run_suite(tmp_path):
+    _write(tmp_path / "bench_a.py", SUITE)
+    report = run_suite(Suite(str(tmp_path / "bench_a.py"), "bench_double"))
+    assert report.error is None
+    assert report.summary["double"][0] == 3
+    assert "double" in report.output
+
+
+def test_run_suite_reports_errors(tmp_path):
+    _write(tmp_path / "bench_a.py", "def bench_broken():\n    raise RuntimeError('boom')\n")
+    report = run_suite(Suite(str(tmp_path / "bench_a.py"), "bench_broken"))
+    assert "RuntimeError: boom" in report.error
+
+
+def test_run_suites_reports_dead_workers(tmp_path):
+    _write(tmp_path / "bench_a.py", SUITE + "\n\ndef bench_dies():\n    import os\n    os._exit(5)\n")
+    reports = run_suites(discover([str(tmp_path)]), jobs=2)
+    assert [report.suite.name for report in reports] == ["bench_double", "bench_dies"]
+    assert reports[0].error is None and reports[0].summary["double"][0] == 3
+    assert reports[1].error == "Worker exited with code 5\n"
@@ -0,0 +1,42 @@
+import random
+import statistics
+
+import pytest
+
+from perf_tester.samples import RunningStats, SampleStore
+
+
+def _values(n, seed=1):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(0, 1) for _ in range(n)]
+
+
+def test_running_stats_matches_statistics():
+    values = _values(1000)
+    running = RunningStats.from_values(values)
+    assert running.count == len(values)
+    assert running.mean == pytest.approx(statistics.fmean(values))
+    assert running.variance() == pytest.approx(statistics.variance(values))
+    assert running.stddev(ddof=0) == pytest.approx(statistics.pstdev(values))
+    assert (running.min, running.max) == (min(values), max(values))
+
+
+@pytest.mark.parametrize("sizes", [(500, 500), (1, 999), (0, 10), (10, 0), (3, 4, 5, 988)])
+def test_running_stats_merge(sizes):
+    values = _values(sum(sizes))
+    merged = RunningStats()
+    start = 0
+    for size in sizes:
+        merged.merge(RunningStats.from_values(values[start : start + size]))
+        start += size
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(statistics.fmean(values))
+    assert merged.variance() == pytest.approx(statistics.variance(values))
+    assert (merged.min, merged.max) == (min(values), max(values))
+
+
+def test_sample_store_keeps_running_stats():
+    values = _values(100)
+    store = SampleStore(values)
+    assert list(store) == values
+    assert store.running.mean == pytest.approx(statistics.fmean(values))
@@ -0,0 +1,84 @@
+import random
+
+from perf_tester import scheduling
+from perf_tester.performance_testing import PerformanceTester
+from perf_tester.scheduling import FREQUENCY, LOAD, SWITCHES, Environment, NoiseMonitor, Schedule
+
+ENTRIES = [("a",), ("b",), ("c",)]
+
+
+def _orders(schedule, iterations=5):
+    orders = []
+
+    def measure(entry, data):
+        orders[-1].append(entry[0])
+        return 0.0
+
+    def generate():
+        orders.append([])
+
+    list(schedule.run(ENTRIES, generate, measure, iterations))
+    return orders
+
+
+def test_schedule_is_seeded():
+    assert _orders(Schedule(seed=3)) == _orders(Schedule(seed=3))
+    assert len({tuple(order) for order in _orders(Schedule(seed=3), 30)}) > 1
+    assert all(sorted(order) == ["a", "b", "c"] for order in _orders(Schedule()))
+    assert "seed 3" in Schedule(seed=3).note()
+
+
+def test_pairs_run_the_order_twice():
+    for order in _orders(Schedule(seed=1, pairs=True)):
+        assert order[:3] == order[3:]
+    assert len(Schedule(seed=1, pairs=True).order(random.Random(0), ENTRIES)) == 6
+
+
+def test_noise_checks():
+    monitor = NoiseMonitor(max_load=2.0, freq_tolerance=0.05, max_switches=1)
+    quiet = Environment(1.0, 2_000_000.0, 10)
+    assert monitor.check(quiet, Environment(1.0, 2_050_000.0, 12), 2) == []
+    assert monitor.check(quiet, Environment(3.0, 2_000_000.0, 10), 2) == [LOAD]
+    assert monitor.check(quiet, Environment(1.0, 1_500_000.0, 10), 2) == [FREQUENCY]
+    assert monitor.check(quiet, Environment(1.0, 2_000_000.0, 13), 2) == [SWITCHES]
+    # drift away from the start of the run counts even if the iteration itself was stable
+    drifted = Environment(1.0, 2_500_000.0, 10)
+    assert monitor.check(drifted, drifted, 1) == [FREQUENCY]
+
+
+def test_unavailable_signals_are_listed():
+    monitor = NoiseMonitor()
+    blind = Environment(None, None, None)
+    assert monitor.check(blind, blind, 1) == []
+    monitor.record([], ["a"])
+    assert "(no signals)" in monitor.note()
+    assert monitor.note().endswith(f"not available here: {', '.join(sorted([LOAD, FREQUENCY, SWITCHES]))}")
+
+
+def _noisy_snapshots(monkeypatch):
+    snapshots = iter([Environment(0.0, None, 0), Environment(100.0, None, 0)] * 100)
+    monkeypatch.setattr(scheduling, "snapshot", lambda: next(snapshots))
+
+
+def test_flagged_iterations_are_kept_or_dropped(monkeypatch):
+    _noisy_snapshots(monkeypatch)
+    kept = NoiseMonitor(max_load=1.0)
+    assert all(Schedule(seed=1).run(ENTRIES, lambda: None, lambda e, d: 1.0, 3, kept))
+    assert kept.noisy_samples == {"a": 3, "b": 3, "c": 3} and kept.score == 1.0
+
+    dropped = NoiseMonitor(max_load=1.0, drop=True)
+    assert list(Schedule(seed=1).run(ENTRIES, lambda: None, lambda e, d: 1.0, 3, dropped)) == [{}] * 3
+    assert dropped.noisy_samples == {}
+    assert "3 of 3 iterations" in dropped.note() and "dropped" in dropped.note()
+
+
+def test_scheduled_tester_run(monkeypatch):
+    _noisy_snapshots(monkeypatch)
+    tester = PerformanceTester(4, lambda: 2)
+    tester.add_function("inc", lambda x: x + 1, lambda data: data)
+    tester.add_function("dec", lambda x: x - 1, lambda data: data)
+    noise = NoiseMonitor(max_load=1.0)
+    tester.compare_performance(schedule=Schedule(seed=5, pairs=True), noise=noise)
+    assert len(tester.results["inc"]) == len(tester.results["dec"]) == 8
+    assert tester.stats_collection.info["inc"]["noisy"] == "4"
+    assert "Randomized schedule, seed 5 (ABAB pairs)" in tester.stats_collection.notes
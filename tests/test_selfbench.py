@@ -0,0 +1,48 @@
+import pytest
+
+from perf_tester.load import LoadConfig
+from perf_tester.performance_testing import PerformanceTester
+from perf_tester.selfbench import EMPTY_FUNCTION, EMPTY_PROGRAM, Overheads, bench_python_harness
+
+
+def test_from_results_takes_medians():
+    overheads = Overheads.from_results({EMPTY_FUNCTION: [3.0, 1.0, 2.0], EMPTY_PROGRAM: [5.0]})
+    assert (overheads.call, overheads.spawn) == (2.0, 5.0)
+    assert Overheads.from_results({}) == Overheads(0.0, 0.0)
+
+
+def test_subtract_counts_clamped_samples():
+    subtracted, clamped = Overheads.subtract({"a": [1.0, 3.0, 0.5], "b": [4.0]}, 2.0)
+    assert list(subtracted["a"]) == [0.0, 1.0, 0.0]
+    assert list(subtracted["b"]) == [2.0]
+    assert clamped == {"a": 2}
+    assert "2 sample(s)" in Overheads(2.0, 0.0).note(2.0, 2)
+
+
+def test_python_harness_bench():
+    results = bench_python_harness(num_tests=20, repeat=2)
+    assert len(results[EMPTY_FUNCTION]) == 40
+    assert {"timer pair", "run_tests iteration"} <= set(results)
+
+
+def _tester():
+    tester = PerformanceTester(5, lambda: 1)
+    tester.add_function("noop", lambda x: x, lambda data: data)
+    return tester
+
+
+def test_overheads_subtracted_in_plain_runs():
+    tester = _tester()
+    tester.compare_performance(overheads=Overheads(call=10.0, spawn=0.0))
+    assert list(tester.stats_collection.stats["noop"].data) == [0.0] * 5
+    assert tester.stats_collection.info["noop"]["clamped"] == "5"
+    assert all(value > 0 for value in tester.results["noop"])  # stored results stay raw
+
+
+def test_overheads_not_subtracted_in_load_runs():
+    tester = _tester()
+    tester.compare_performance(
+        load=LoadConfig(duration=0.05, concurrency=1), overheads=Overheads(call=10.0, spawn=0.0)
+    )
+    assert all(value > 0 for value in tester.stats_collection.stats["noop"].data)
+    assert "Harness overhead not subtracted in load runs" in tester.stats_collection.notes
@@ -0,0 +1,88 @@
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from perf_tester.cli import INCLUDE_DIR
+from perf_tester.server_mode import ProgramServer, ServerProtocolError, ServerTimeoutError
+
+ECHO_SERVER = r"""
+#include <stdlib.h>
+#include "perf_server.h"
+
+static void run(const char *input, perf_result *out) {
+    perf_result_printf(out, "%ld", strtol(input, NULL, 10) * 2);
+}
+
+int main(int argc, char *argv[]) {
+    if (perf_server_requested(argc, argv)) return perf_server_run(run);
+    return 1;
+}
+"""
+
+
+@pytest.fixture(scope="module")
+def program(tmp_path_factory):
+    if shutil.which("gcc") is None:
+        pytest.skip("gcc not available")
+    directory = tmp_path_factory.mktemp("server")
+    source = directory / "double.c"
+    source.write_text(ECHO_SERVER)
+    output = directory / "double"
+    subprocess.run(["gcc", str(source), "-o", str(output), "-I", INCLUDE_DIR], check=True)
+    return str(output)
+
+
+def test_requests(program):
+    with ProgramServer(program) as server:
+        for value in (0, 21, -5):
+            elapsed, result = server.request([str(value)])
+            assert result == str(value * 2)
+            assert 0 <= elapsed < 1
+
+
+def test_rejects_newlines(program):
+    with ProgramServer(program) as server:
+        with pytest.raises(ValueError):
+            server.request(["1\n2"])
+
+
+def test_program_without_server_mode():
+    if shutil.which("true") is None:
+        pytest.skip("true not available")
+    with pytest.raises(ServerProtocolError):
+        ProgramServer(shutil.which("true")).start()
+
+
+def _script(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_text("#!/bin/sh\n" + body)
+    path.chmod(0o755)
+    return str(path)
+
+
+def test_failed_handshake_closes_the_program(tmp_path):
+    server = ProgramServer(_script(tmp_path, "chatty", "echo hello\nexec sleep 30\n"))
+    with pytest.raises(ServerProtocolError, match="does not support server mode"):
+        server.start()
+    assert server.proc is None
+
+
+def test_hung_request_times_out(tmp_path):
+    hung = _script(tmp_path, "hung", 'echo "PERF_SERVER 1"\nexec sleep 30\n')
+    server = ProgramServer(hung, timeout=0.2)
+    server.start()
+    process = server.proc
+    start = time.monotonic()
+    with pytest.raises(ServerTimeoutError):
+        server.request(["1"])
+    assert time.monotonic() - start < 5
+    assert server.proc is None and process.returncode is not None
+
+
+def test_silent_program_times_out_in_handshake(tmp_path):
+    server = ProgramServer(_script(tmp_path, "silent", "exec sleep 30\n"), timeout=0.2)
+    with pytest.raises(ServerTimeoutError):
+        server.start()
+    assert server.proc is None
@@ -0,0 +1,47 @@
+import json
+import random
+import statistics
+
+import pytest
+
+from perf_tester.statistics import LogHistogram
+
+
+def _values(n, seed=1):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(0, 1) for _ in range(n)]
+
+
+def test_log_histogram_round_trip():
+    histogram = LogHistogram.from_values(_values(5000), lowest=1e-6, highest=1e3)
+    restored = LogHistogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+    assert list(restored.counts) == list(histogram.counts)
+    assert len(restored) == len(histogram)
+    assert restored.running.mean == histogram.running.mean
+    assert restored.running.variance() == histogram.running.variance()
+    for q in (1, 50, 90, 99, 100):
+        assert restored.percentile(q) == histogram.percentile(q)
+
+
+def test_log_histogram_merge_equals_combined():
+    first, second = _values(700, seed=2), _values(300, seed=3)
+    merged = LogHistogram.from_values(first)
+    merged.merge(LogHistogram.from_values(second))
+    combined = LogHistogram.from_values(first + second)
+    assert list(merged.counts) == list(combined.counts)
+    assert merged.running.mean == pytest.approx(combined.running.mean)
+    assert merged.running.variance() == pytest.approx(combined.running.variance())
+    assert merged.percentile(50) == combined.percentile(50)
+
+
+def test_log_histogram_precision():
+    values = _values(2000)
+    histogram = LogHistogram.from_values(values, significant_digits=2)
+    exact = statistics.quantiles(values, n=100, method="inclusive")
+    for q in (10, 50, 90):
+        assert histogram.percentile(q) == pytest.approx(exact[q - 1], rel=0.03)
+
+
+def test_log_histogram_merge_rejects_other_config():
+    with pytest.raises(ValueError):
+        LogHistogram(significant_digits=2).merge(LogHistogram(significant_digits=3))
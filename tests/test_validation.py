@@ -0,0 +1,70 @@
+import os
+import shutil
+
+import pytest
+
+from perf_tester.cperf_test import CPerformanceTester
+from perf_tester.utils.process_utils import OutputDigest, run_child
+
+needs_sh = pytest.mark.skipif(shutil.which("sh") is None, reason="needs sh")
+
+
+def _digest(*chunks):
+    digest = OutputDigest()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def test_output_digest_normalizes_whitespace():
+    reference = _digest(b"1 2\n3\n")
+    assert _digest(b"1 2  \r\n3\t\n\n\n") == reference
+    assert _digest(b"1 2\n3") == reference
+    assert _digest(b"1", b" 2\n", b"3\n") == reference  # chunk boundaries do not matter
+    assert _digest(b"1 2\n\n3\n") != reference  # inner blank lines do
+    assert _digest(b"1  2\n3\n") != reference
+
+
+def test_output_digest_bounds_the_partial_line():
+    long_line = b"x" * (3 * OutputDigest._MAX_PARTIAL)
+    digest = OutputDigest()
+    for start in range(0, len(long_line), 1000):
+        digest.update(long_line[start : start + 1000])
+        assert len(digest._partial) <= OutputDigest._MAX_PARTIAL + 1000
+    assert digest.hexdigest() == _digest(long_line)
+
+
+@needs_sh
+def test_run_child_limits_and_digest():
+    command = ["sh", "-c", "echo 0123456789; echo oops >&2"]
+    digest = OutputDigest()
+    child = run_child(command, stdout_limit=4, digest=digest)
+    assert child.stdout == b"0123" and child.stderr == b"oops\n"
+    assert digest.hexdigest() == _digest(b"0123456789\n")
+    assert run_child(command, stdout_limit=0).stdout == b""
+
+
+def _script(directory, name, body):
+    path = os.path.join(directory, name)
+    with open(path, "w") as f:
+        f.write("#!/bin/sh\n" + body)
+    os.chmod(path, 0o755)
+    return path
+
+
+@needs_sh
+def test_mismatching_program_is_flagged(tmp_path, capsys):
+    inputs = iter(range(1, 5))
+    tester = CPerformanceTester(4, lambda: next(inputs), str(tmp_path), output_limit=16, validate=True)
+    tester.add_program("double", _script(tmp_path, "double", "echo $(($1 * 2))\n"), lambda n: [str(n)])
+    tester.add_program("add", _script(tmp_path, "add", "printf '%s  \\n' $(($1 + $1))\n"), lambda n: [str(n)])
+    tester.add_program("square", _script(tmp_path, "square", "echo $(($1 * $1))\n"), lambda n: [str(n)])
+    tester.compare_performance()
+    # square agrees with the others only for 2 (and 0)
+    assert dict(tester.mismatches) == {"square": 3}
+    assert tester.mismatch_examples["square"] == ["1"]
+    assert tester.outputs["add"] == b"8  \n"
+    info = tester.stats_collection.info
+    assert (info["double"]["output"], info["add"]["output"]) == ("ok", "ok")
+    assert info["square"]["output"] == "DIFFERS (3)"
+    assert "Output of square differs from the other programs, e.g. for arguments ['1']" in tester.stats_collection.notes